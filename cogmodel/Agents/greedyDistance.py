@@ -0,0 +1,199 @@
+from array import array
+from heapq import heapify, heappush, heappop
+
+from cogmodel import directions
+from cogmodel.gridEnvironment import TURN_RIGHT, TURN_LEFT, BudgetExhausted
+import numpy as np
+
+
+class greedyDistance(object):
+    """
+        Greedy agent which always heads to the neighbor closest to the
+        target. Unlike ``greedy`` the distance is the length of the shortest
+        path to the target, assuming that all tiles the agent has not seen
+        yet are passable (free space assumption).
+
+        The distances are kept in a distance field over the whole
+        labyrinth. Initially (without any known walls) it is the manhattan
+        distance to the target. Distances can only grow when walls are
+        seen, so only the tiles whose shortest path led through a new wall
+        are updated, see ``_add_walls``.
+    """
+
+    def __init__(self, gridEnvironment, rng=None):
+        self.env = gridEnvironment  # env on which agent runs
+        # random number generator of this run, see cogmodel.seeding. Unused
+        # since the agent is deterministic
+        self.rng = rng if rng is not None else np.random.default_rng()
+        # the labyrinth is surrounded by a border of walls, so that the
+        # neighbors of each tile are always within the lists below. The
+        # tiles are indexed by (row + 1) * _stride + column + 1
+        rows, cols = gridEnvironment.size
+        self._stride = cols + 2
+        # larger than any distance, used for walls and for tiles the
+        # target cannot be reached from
+        self._unreachable = (rows + 2) * self._stride
+        target_i, target_j = gridEnvironment.target
+        # compact arrays instead of lists keep the memory used by the agent
+        # (see GridEnvironment.perform_action) small
+        self.distance = array("l", [self._unreachable]) * self._unreachable
+        self._wall = bytearray(b"\x01") * self._unreachable
+        for i in range(rows):
+            for j in range(cols):
+                self.distance[self._index(i, j)] = abs(i - target_i) + abs(j - target_j)
+                self._wall[self._index(i, j)] = False
+        self._seen = bytearray(self._unreachable)
+        self._seen_count = 0
+
+    def run(self):
+        """
+            Starts the algorithm on labyrinth given in self.env
+        """
+
+        # log header of logging file
+        self.env.start_experiment()
+
+        try:
+            while(self.env.agent_pos != self.env.target):
+                self._observe()
+                self._choose_action()
+        except BudgetExhausted:
+            pass
+
+        # log footer of logging file
+        self.env.finish_experiment()
+
+    def state_hash(self):
+        """
+            The agent's behaviour only depends on the walls it knows, which
+            only ever get more. The number of seen tiles therefore
+            identifies its state.
+        """
+        return self._seen_count
+
+    def _index(self, i, j):
+        """
+            Returns the index of the tile at row i and column j.
+        """
+        return (i + 1) * self._stride + j + 1
+
+    def _observe(self):
+        """
+            Adds the walls within the view cone to the known walls.
+        """
+        walls = []
+        for (i, j), tile in self.env.get_view_cone().items():
+            k = self._index(i, j)
+            if not self._seen[k]:
+                self._seen[k] = True
+                self._seen_count += 1
+                if not tile.passable:
+                    walls.append(k)
+        if walls:
+            self._add_walls(walls)
+
+    def _choose_action(self):
+        """
+            Turns towards the neighbor closest to the target or steps onto
+            it, if the agent already faces it.
+        """
+        heading = self.env.heading
+        best = self._best_heading()
+        if best == heading:
+            x, y = self.env.agent_pos
+            self.env.perform_action(self.env.facing_direction, self)
+            if self.env.agent_pos == (x, y):
+                # ran into a wall the agent could not see
+                i, j = directions.to_absolute(heading, 1, 0)
+                k = self._index(x + i, y + j)
+                if not self._seen[k]:
+                    self._seen[k] = True
+                    self._seen_count += 1
+                self._add_walls([k])
+        elif best == directions.LEFT[heading]:
+            self.env.perform_action(TURN_LEFT, self)
+        else:
+            self.env.perform_action(TURN_RIGHT, self)
+
+    def _best_heading(self):
+        """
+            Determines the direction of the neighbor with the smallest
+            distance to the target. Ties are broken in favor of needing
+            fewer turns (ahead, right, left, behind).
+        """
+        x, y = self.env.agent_pos
+        heading = self.env.heading
+        best = None
+        best_distance = None
+        for candidate in (heading, directions.RIGHT[heading], directions.LEFT[heading],
+                          directions.BACK[heading]):
+            i, j = directions.VECTORS[candidate]
+            k = self._index(x + i, y + j)
+            if not self._wall[k] and (best is None or self.distance[k] < best_distance):
+                best = candidate
+                best_distance = self.distance[k]
+        return best
+
+    def _add_walls(self, walls):
+        """
+            Updates the distance field after the given tiles were found to
+            be walls.
+
+            First all tiles whose distance is no longer supported by a
+            neighbor one step closer to the target are invalidated, in the
+            order of their previous distance. Then their distances are
+            recomputed from their valid neighbors. All other distances stay
+            correct, as distances can only grow when walls are added.
+
+            Parameters
+            ----------
+            walls: list
+                The indices of the new walls.
+        """
+        distance = self.distance
+        wall = self._wall
+        unreachable = self._unreachable
+        stride = self._stride
+
+        # invalidate the walls and the tiles depending on them. Walls are
+        # unreachable, so a tile is supported by a neighbor with a distance
+        # one less than its own
+        heap = []
+        for k in walls:
+            d = distance[k]
+            wall[k] = True
+            distance[k] = unreachable
+            for n in (k - stride, k + stride, k - 1, k + 1):
+                if distance[n] == d + 1:
+                    heap.append((d + 1, n))
+        heapify(heap)
+        invalid = []
+        while heap:
+            d, k = heappop(heap)
+            if distance[k] != d:
+                continue
+            if distance[k - stride] == d - 1 or distance[k + stride] == d - 1 or \
+                    distance[k - 1] == d - 1 or distance[k + 1] == d - 1:
+                continue
+            distance[k] = unreachable
+            invalid.append(k)
+            for n in (k - stride, k + stride, k - 1, k + 1):
+                if distance[n] == d + 1:
+                    heappush(heap, (d + 1, n))
+
+        # recompute the invalidated distances from the valid ones
+        queue = []
+        for k in invalid:
+            d = min(distance[k - stride], distance[k + stride], distance[k - 1], distance[k + 1]) + 1
+            if d < unreachable:
+                distance[k] = d
+                queue.append((d, k))
+        heapify(queue)
+        while queue:
+            d, k = heappop(queue)
+            if distance[k] != d:
+                continue
+            for n in (k - stride, k + stride, k - 1, k + 1):
+                if distance[n] > d + 1 and not wall[n]:
+                    distance[n] = d + 1
+                    heappush(queue, (d + 1, n))
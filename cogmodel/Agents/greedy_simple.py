@@ -1,6 +1,6 @@
 import math
 
-from cogmodel.gridEnvironment import TURN_RIGHT, TURN_LEFT
+from cogmodel.gridEnvironment import TURN_RIGHT, TURN_LEFT, BudgetExhausted
 import numpy as np
 
 #MAX_STEPS = 1000
@@ -13,8 +13,11 @@ class greedy(object):
         uses a greedy heuristic to navigate labyrinth
     """
 
-    def __init__(self, gridEnvironment):
+    def __init__(self, gridEnvironment, rng=None):
         self.env = gridEnvironment  # env on which agent runs
+        # random number generator of this run, see cogmodel.seeding. Unused
+        # since the agent is deterministic
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.visited = {gridEnvironment.agent_pos: 1}
         #self.last_pos = gridEnvironment.agent_pos
         self.options = []
@@ -27,8 +30,11 @@ class greedy(object):
         # log header of logging file
         self.env.start_experiment()
 
-        while(self.env.agent_pos != self.env.target):
-            self._choose_action()
+        try:
+            while(self.env.agent_pos != self.env.target):
+                self._choose_action()
+        except BudgetExhausted:
+            pass
 
         #if i == MAX_STEPS:
         #    print("agent death termination")
@@ -37,27 +43,21 @@ class greedy(object):
         # log footer of logging file
         self.env.finish_experiment()
 
+    def state_hash(self):
+        """
+            The visit counts only ever increase, so the agent never returns
+            to an identical state and is excluded from stall detection.
+        """
+        return None
+
     def _choose_action(self):
         i = 0
         acted = False
         while i < 4 and not acted:
-            for tile in self.env.get_view_cone():
-                if tile == (self.env.agent_pos[0] + self.env.facing_direction[0],
-                            self.env.agent_pos[1] + self.env.facing_direction[1]) and self.env.tiles[tile].passable:
-                    """
-                    if self.tile_score(tile) < self.tile_score(self.env.agent_pos)-AGENT_AMBITION:
-                        self.last_pos = self.env.agent_pos
-                        self.env.perform_action(
-                            self.env.facing_direction, self)
-                        acted = True
-                        if self.env.agent_pos in self.visited.keys():
-                            self.visited[self.env.agent_pos] += 1
-                        else:
-                            self.visited[self.env.agent_pos] = 1
-                    else:
-                    """
-                    self.options.append((self.tile_score(tile), tile))
-                    break
+            if self.env.is_passable_relative(1, 0):
+                tile = (self.env.agent_pos[0] + self.env.facing_direction[0],
+                        self.env.agent_pos[1] + self.env.facing_direction[1])
+                self.options.append((self.tile_score(tile), tile))
             #if not acted:
             self.env.perform_action(TURN_RIGHT, self)
             i += 1
@@ -0,0 +1,243 @@
+from collections import Counter, deque
+from cogmodel import directions
+from cogmodel.gridEnvironment import TURN_RIGHT, TURN_LEFT, BudgetExhausted
+import numpy as np
+
+MARK = None
+FACING = (2, 2)
+CHECK_FUTURE = (3, 3)
+
+# offset (rows, columns) and mark direction (a heading, see
+# cogmodel.directions) of the left, front and right neighbor for each
+# heading, see TremauxCore._check_neighbors
+NEIGHBOR_OFFSETS = (
+    ((-1, -1, 1), (-2, 0, 2), (-1, 1, 3)),  # north
+    ((-1, 1, 2), (0, 2, 3), (1, 1, 0)),  # east
+    ((1, 1, 3), (2, 0, 0), (1, -1, 1)),  # south
+    ((1, -1, 0), (0, -2, 1), (-1, -1, 2)),  # west
+)
+# the same neighbors as (forward, right) relative to the agent
+RELATIVE_NEIGHBORS = ((1, -1), (2, 0), (1, 1))
+
+
+class TremauxCore(object):
+    """
+        Common engine of the agents using the trémaux method to solve
+        labyrinths. The marks are counted in a Counter and the actions are
+        queued in a deque.
+
+        Subclasses choose between the free directions of an intersection
+        by overriding ``_prefer``.
+    """
+
+    def __init__(self, gridEnvironment, rng=None):
+        self.env = gridEnvironment  # env on which agent runs
+        # random number generator of this run, see cogmodel.seeding
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self._action_queue = deque()  # enqueues/dequeues action to be performed by agent
+        # neighbor-coordinates on left/front/right and bool if wall as tuple
+        self._neighbors = [(), (), ()]
+        self._marked = Counter()  # how often each triple (x, y, direction) was marked
+        self._mark_count = 0  # total number of marks
+
+    def run(self):
+        """
+            Starts the algorithm on labyrinth given in self.env
+        """
+
+        # log header of logging file
+        self.env.start_experiment()
+
+        try:
+            self._solve()
+        except BudgetExhausted:
+            pass
+
+        # log footer of logging file
+        self.env.finish_experiment()
+
+    def _solve(self):
+        """
+            Main routine of the algorithm, runs until the target is reached.
+        """
+
+        # set up action queue with first step; assumption: face in direction we can walk in
+        self._first_action()
+        action_functions = (self._go_left, self._go_front, self._go_right)
+
+        # --- MAIN ROUTINE ---
+        while (self.env.agent_pos != self.env.target):
+            # check how many actions are in queue and do all but one
+            while (len(self._action_queue) > 1):
+                if self._action_queue[0] == CHECK_FUTURE:
+                    self._action_queue.popleft()
+                    break
+                # dequeue action to perform
+                self._do_action()
+
+            # check neighbors of current position
+            self._check_neighbors()
+
+            # --- CHOOSE ACTION ---
+            # Case: not at intersection
+            left = self._neighbors[0][1]
+            front = self._neighbors[1][1]
+            right = self._neighbors[2][1]
+            if left and front and right:
+                self._turn_around()
+            elif left and right:
+                self._action_queue.append(self.env.facing_direction)
+            elif left and front:
+                self._go_right(mark=False)
+            elif right and front:
+                self._go_left(mark=False)
+            # Case: intersection
+            else:
+                free = [k for k in range(3) if not self._neighbors[k][1]]
+                self._handle_intersection([self._neighbors[k][0] for k in free],
+                                          [action_functions[k] for k in free])
+
+            # do current action
+            self._do_action()
+
+    def state_hash(self):
+        """
+            Marks are only ever added, so their number together with the
+            queued actions identifies the agent's state.
+        """
+        return hash((self._mark_count, tuple(self._action_queue)))
+
+    def _check_neighbors(self):
+        """
+            Checks neighbors of position agent will be in at the end of while-loop.
+            In the following 0,1,2 are the checked neighbors, A is the current agent position and # is a tile:
+            #1#
+            0#2
+            #A#
+        """
+        # ATTENTION: view cone has to have at least a radius of 2 otherwise we are doomed with this agent!
+        x, y = self.env.agent_pos
+
+        for k, (dx, dy, direction) in enumerate(NEIGHBOR_OFFSETS[self.env.heading]):
+            self._neighbors[k] = ((x + dx, y + dy, direction),
+                                  not self.env.is_passable_relative(*RELATIVE_NEIGHBORS[k]))
+
+    def _do_action(self):
+        """
+            Performs action that is first in action queue.
+        """
+        action = self._action_queue.popleft()
+        if action == FACING:
+            self.env.perform_action(
+                action=self.env.facing_direction, agent=self)
+        elif action:
+            self.env.perform_action(action=action, agent=self)
+        else:
+            self.mark_tile()
+
+    def _first_action(self):
+        """
+        handles starting conditions
+        """
+
+        # turn left until the agent faces a tile it can walk on
+        for turns in range(4):
+            facing = self.env.facing_direction
+            x, y = self.env.agent_pos
+            if self.env.tiles[(x + facing[0], y + facing[1])].passable:
+                self._action_queue.append(facing)
+                return
+            if turns < 3:
+                self.env.perform_action(action=TURN_LEFT, agent=self)
+        raise AttributeError("The agent is surrounded by walls.")
+
+    def _turn_around(self):
+        """
+            Adds action to queue that make agent turn around.
+        """
+        self._action_queue.append(TURN_LEFT)
+        self._action_queue.append(TURN_LEFT)
+        self._action_queue.append(CHECK_FUTURE)
+        self._action_queue.append(FACING)
+
+    def _go_right(self, mark=True):
+        """
+            Adds action to queue that make agent go right.
+        """
+        self._action_queue.append(TURN_RIGHT)
+        self._action_queue.append(CHECK_FUTURE)
+        self._action_queue.append(FACING)
+        if mark:
+            self._action_queue.append(MARK)
+
+    def _go_front(self, mark=True):
+        """
+            Adds action to queue that make agent follow current direction.
+        """
+        if mark:
+            self._action_queue.append(CHECK_FUTURE)
+        self._action_queue.append(self.env.facing_direction)
+        if mark:
+            self._action_queue.append(MARK)
+
+    def _go_left(self, mark=True):
+        """
+            Adds action to queue that make agent go left.
+        """
+        self._action_queue.append(TURN_LEFT)
+        self._action_queue.append(CHECK_FUTURE)
+        self._action_queue.append(FACING)
+        if mark:
+            self._action_queue.append(MARK)
+
+    def _prefer(self, action_functions):
+        """
+            Selects the actions the agent randomly chooses from at an
+            intersection. The trémaux method itself has no preference.
+        ---------------------------------------------------
+        Args:
+            action_functions [function]: non empty list of the action functions of the candidate directions.
+        Returns:
+            [function]: non empty list of the preferred action functions.
+        """
+        return action_functions
+
+    def _handle_intersection(self, free_neighbors, action_functions):
+        """
+        Handles intersections via tremaux algorithm rules.
+        ---------------------------------------------------
+        Args:
+            free_neighbors [(x,y,direction)]: List containing the marks of the free (non wall) neighbor tiles. Length is between 2 and 3.
+            action_functions [function]: list of action functions (_go_left, _go_front, _go_right). Function i should be invoke if direction i in free_neighbors is chosen
+        """
+
+        # mark current position
+        self.mark_tile(goin_in=True)
+
+        # Intersection is unknown
+        if not any(self._marked[tile] for tile in free_neighbors):
+            # selecting random direction
+            candidates = self._prefer(action_functions)
+            candidates[self.rng.integers(0, len(candidates))]()
+
+        # intersection is known
+        else:
+            x, y = self.env.agent_pos
+            if self._marked[(x, y, self.env.heading)] == 1:  # found a loop
+                # mark current position and turn around
+                self.mark_tile(goin_in=True)
+                self._action_queue.popleft()
+                self._turn_around()
+            else:  # already searched whole area
+                minimum_mark_value = min(self._marked[tile] for tile in free_neighbors)
+                candidates = self._prefer([action for tile, action in zip(free_neighbors, action_functions)
+                                           if self._marked[tile] == minimum_mark_value])
+                candidates[self.rng.integers(0, len(candidates))]()
+
+    def mark_tile(self, goin_in=False):
+        x, y = self.env.agent_pos
+        direction = self.env.heading
+        if not goin_in:
+            direction = directions.BACK[direction]
+        self._marked[(x, y, direction)] += 1
+        self._mark_count += 1
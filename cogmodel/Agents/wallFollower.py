@@ -1,8 +1,7 @@
 import logging
-from cogmodel.gridEnvironment import TURN_RIGHT, TURN_LEFT
+from cogmodel.gridEnvironment import TURN_RIGHT, TURN_LEFT, BudgetExhausted
 import numpy as np
 
-MAX_STEPS = 1000
 
 
 class wallFollower(object):
@@ -10,8 +9,11 @@ class wallFollower(object):
         Uses the left hand rule method to solve labyrinths.
     """
 
-    def __init__(self, gridEnvironment):
+    def __init__(self, gridEnvironment, rng=None):
         self.env = gridEnvironment  # env on which agent runs
+        # random number generator of this run, see cogmodel.seeding. Unused
+        # since the agent is deterministic
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     def run(self):
         """
@@ -21,10 +23,13 @@ class wallFollower(object):
         # log header of logging file
         self.env.start_experiment()
 
-        i = 0
-        while(self.env.agent_pos != self.env.target and i < MAX_STEPS):
-            self._choose_action()
-            i += 1
+        # runs until the target is reached or one of the budgets of the
+        # environment is exhausted, see GridEnvironment.set_budget
+        try:
+            while(self.env.agent_pos != self.env.target):
+                self._choose_action()
+        except BudgetExhausted:
+            pass
 
         # log footer of logging file
         self.env.finish_experiment()
@@ -34,11 +39,9 @@ class wallFollower(object):
         i = 0
         self.env.perform_action(TURN_LEFT, self)
         while i < 3 and not acted:
-            for tile in self.env.get_view_cone():
-                if tile == (self.env.agent_pos[0]+self.env.facing_direction[0], self.env.agent_pos[1]+self.env.facing_direction[1]) and self.env.tiles[tile].passable:
-                    self.env.perform_action(self.env.facing_direction, self)
-                    acted = True
-                    break
+            if self.env.is_passable_relative(1, 0):
+                self.env.perform_action(self.env.facing_direction, self)
+                acted = True
             if not acted:
                 self.env.perform_action(TURN_RIGHT, self)
                 i += 1
@@ -30,27 +30,53 @@ def _write_log():
     while True:
         item = log_queue.get()
         if item is None:
+            log_queue.task_done()
             time.sleep(0.1)
             continue
-        path, timestamp, msg = item
-        dir_path = os.path.dirname(path)
-        # Check if there already is a directory for this user:
-        if dir_path and not os.path.isdir(dir_path):
-            os.makedirs(dir_path)
-        with open(path, "a") as f:
-            if timestamp:
-                f.write("{}: {}\n".format(timestamp, msg))
-            elif msg:
-                f.write("{}\n".format(msg))
-            else:
-                f.write("\n")
-
-
-log_thread = threading.Thread(target=_write_log)
-log_thread.setDaemon(True)
+        try:
+            path, timestamp, msg = item
+        except (TypeError, ValueError) as e:
+            print("Invalid log item {!r}: {}".format(item, e))
+            log_queue.task_done()
+            continue
+        try:
+            dir_path = os.path.dirname(path)
+            # Check if there already is a directory for this user:
+            if dir_path and not os.path.isdir(dir_path):
+                os.makedirs(dir_path)
+            with open(path, "a") as f:
+                if timestamp:
+                    f.write("{}: {}\n".format(timestamp, msg))
+                elif msg:
+                    f.write("{}\n".format(msg))
+                else:
+                    f.write("\n")
+        except Exception as e:
+            # Keep the thread alive, otherwise flush would block forever
+            print("Could not write log message to {}: {}".format(path, e))
+        finally:
+            log_queue.task_done()
+
+
+log_thread = threading.Thread(target=_write_log, daemon=True)
 log_thread.start()
 
 
+def _restart_log_thread():
+    """
+        Threads do not survive a fork, so forked processes (e.g. the workers
+        of the pipeline) get their own queue and writer thread.
+    """
+    global log_queue, log_thread
+    log_queue = queue.Queue()
+    log_thread = threading.Thread(target=_write_log, daemon=True)
+    log_thread.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_log_thread)
+
+
 def log(path, timestamp=None, msg=None):
     r""" 
         Function providing logging capabilities to the GridEnvironment (or any)
@@ -76,4 +102,13 @@ def log(path, timestamp=None, msg=None):
     time.sleep(0.001)
 
 
+def flush():
+    r"""
+        Blocks until all messages that were placed into the log_queue so far
+        have been written to their files. Should be called before reading a
+        log-file that was just written, e.g. to evaluate a finished run.
+    """
+    log_queue.join()
+
+
 # Import some modules and classes for easier import on user-level code
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module providing streaming accumulators for aggregating metrics over many
+runs without keeping all the single values in memory.
+
+Accumulators of the same metric can be merged, which allows to aggregate
+partial results computed in different processes (or on different machines)
+in any order.
+"""
+
+import math
+from statistics import NormalDist
+
+
+class QuantileSketch(object):
+    """
+        Small mergeable sketch approximating quantiles of a stream of values.
+        It follows the compactor idea of Manku, Rajagopalan and Lindsay
+        (and later KLL): values are collected in levels, where a value in
+        level h represents 2**h original values. Once a level holds k
+        values, it is sorted and every other value is promoted to the next
+        level.
+
+        As long as fewer than k values were added, all quantiles are exact.
+
+        Parameters
+        ----------
+        k: int, optional (Default: 200)
+            The capacity of each level. Larger values give more accurate
+            quantiles at the cost of memory.
+
+        Attributes
+        ----------
+        levels: list
+            A list of lists containing the values of each level.
+    """
+
+    def __init__(self, k=200):
+        self.k = k
+        self.levels = [[]]
+        self._compactions = 0
+
+    def add(self, value):
+        """
+            Adds a single value to the sketch.
+
+            Parameters
+            ----------
+            value: float
+                The value to add.
+        """
+        self.levels[0].append(value)
+        if len(self.levels[0]) >= self.k:
+            self._compress()
+
+    def merge(self, other):
+        """
+            Merges the values of another sketch into this one.
+
+            Parameters
+            ----------
+            other: QuantileSketch
+                The sketch to merge. It is not changed.
+        """
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append([])
+            self.levels[h].extend(items)
+        self._compress()
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) >= self.k:
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                items = sorted(self.levels[h])
+                # Keep one value on this level if the number is odd so that
+                # the total weight is preserved
+                self.levels[h] = [items.pop()] if len(items) % 2 else []
+                # Alternate the offset to avoid a systematic bias
+                offset = self._compactions % 2
+                self._compactions += 1
+                self.levels[h + 1].extend(items[offset::2])
+            h += 1
+
+    def quantile(self, q):
+        """
+            Parameters
+            ----------
+            q: float
+                The quantile to compute, between 0 and 1.
+
+            Returns
+            -------
+                float
+                The (approximate) q-quantile of the added values or nan, if
+                no values have been added.
+        """
+        weighted = sorted((value, 2 ** h) for h, items in enumerate(self.levels)
+                          for value in items)
+        if not weighted:
+            return float("nan")
+        target = q * sum(w for _, w in weighted)
+        cumulative = 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return weighted[-1][0]
+
+
+class RunningStatistic(object):
+    """
+        Streaming accumulator for a single metric, computing count, mean and
+        variance (using Welford's algorithm), minimum and maximum as well as
+        approximate quantiles.
+
+        Parameters
+        ----------
+        sketch_size: int, optional (Default: 200)
+            The level capacity of the underlying QuantileSketch.
+
+        Attributes
+        ----------
+        count: int
+            The number of added values.
+        mean: float
+            The mean of all added values.
+        min: float
+            The smallest added value.
+        max: float
+            The largest added value.
+        sketch: QuantileSketch
+            The sketch used to answer quantile queries.
+    """
+
+    def __init__(self, sketch_size=200):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(sketch_size)
+
+    def add(self, value):
+        """
+            Adds a single value to the statistic.
+
+            Parameters
+            ----------
+            value: number
+                The value to add.
+        """
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sketch.add(value)
+
+    def merge(self, other):
+        """
+            Merges another statistic of the same metric into this one, using
+            the parallel update formulas by Chan et al.
+
+            Parameters
+            ----------
+            other: RunningStatistic
+                The statistic to merge. It is not changed.
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def variance(self):
+        """
+            The (unbiased) sample variance of the added values. 0 if less than
+            two values were added.
+        """
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self):
+        """
+            The sample standard deviation of the added values.
+        """
+        return math.sqrt(self.variance)
+
+    def confidence_interval(self, level=0.95):
+        """
+            Computes the half width of the confidence interval of the mean,
+            using the normal approximation.
+
+            Parameters
+            ----------
+            level: float, optional (Default: 0.95)
+                The confidence level.
+
+            Returns
+            -------
+                float
+                The half width of the confidence interval, i.e. the mean lies
+                within mean +- the returned value. nan if less than two
+                values were added.
+        """
+        if self.count < 2:
+            return float("nan")
+        z = NormalDist().inv_cdf(0.5 + level / 2)
+        return z * self.std / math.sqrt(self.count)
+
+    def quantile(self, q):
+        """
+            Parameters
+            ----------
+            q: float
+                The quantile to compute, between 0 and 1.
+
+            Returns
+            -------
+                float
+                The (approximate) q-quantile of the added values.
+        """
+        return self.sketch.quantile(q)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module converting trees of log files written by the pipeline (e.g.
+``data/Experiment_data``) into a compact columnar archive, so that old
+results can be analysed again without parsing the text logs.
+
+The tree is expected to have the layout created by the pipeline, i.e.
+``<root>/<lab>_<agent>/<run>/logging.txt``. Each labyrinth + agent
+combination is converted into a single compressed .npz file, in which the
+trajectories of all its runs are concatenated (one array per trajectory,
+see ``evaluation.read_logging``) together with the offsets of each run.
+The archive directory additionally contains an ``index.json`` file listing
+the converted combinations and their runs. The plots stored next to the
+log files are not converted.
+
+Example::
+
+    python -m cogmodel.archive data/Experiment_data data/Experiment_archive -w 8 --validate
+"""
+
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .evaluation import read_logging
+from .parsing import LOG_SECTIONS, ACTIONS, ParseError, tokenize
+
+INDEX_FILE = "index.json"
+LOG_FILE = "logging.txt"
+
+# Trajectories returned by ``evaluation.read_logging`` which are stored as
+# numeric arrays and the types used for them
+ARRAY_TYPES = {"positions": np.int32, "time": np.int64, "load": np.int64,
+               "length": np.int64, "action_values": np.float64}
+
+# Header sections describing the run, see ``GridEnvironment.set_logging``
+HEADER_SECTIONS = ("Name", "AgentType", "Seed")
+
+
+def find_logs(root):
+    """
+        Collects all log files within a tree written by the pipeline.
+
+        Parameters
+        ----------
+        root: str
+            The root of the tree, containing one folder per labyrinth +
+            agent combination.
+
+        Returns
+        -------
+            dict
+            The paths of the log files of each combination (keyed by the
+            name of its folder), as a dictionary from the run index to the
+            path.
+    """
+    pairs = {}
+    for pair in sorted(os.listdir(root)):
+        pair_dir = os.path.join(root, pair)
+        if not os.path.isdir(pair_dir):
+            continue
+        runs = {}
+        for run in os.listdir(pair_dir):
+            path = os.path.join(pair_dir, run, LOG_FILE)
+            if run.isdigit() and os.path.isfile(path):
+                runs[int(run)] = path
+        if runs:
+            pairs[pair] = dict(sorted(runs.items()))
+    return pairs
+
+
+def _read_header(path):
+    """
+        Reads the header sections in HEADER_SECTIONS of a log file. Older
+        log files may not contain all of them.
+    """
+    header = {}
+    with open(path) as file:
+        for token in tokenize(file, LOG_SECTIONS, actions=True):
+            if token.section == ACTIONS:
+                break
+            if token.section in HEADER_SECTIONS:
+                header[token.section] = token.text.strip()
+    return header
+
+
+def _concatenate(values, dtype, shape=()):
+    if not values:
+        return np.zeros((0,) + shape, dtype=dtype)
+    return np.concatenate([np.asarray(v, dtype=dtype).reshape((-1,) + shape) for v in values])
+
+
+def _offsets(values):
+    return np.concatenate([[0], np.cumsum([len(v) for v in values])]).astype(np.int64)
+
+
+def convert_pair(pair, runs, archive_dir):
+    """
+        Converts the log files of a single labyrinth + agent combination
+        into an .npz file.
+
+        Parameters
+        ----------
+        pair: str
+            The name of the combination, which is used as file name.
+        runs: dict
+            The path of the log file of each run, see ``find_logs``. Runs
+            whose log file cannot be read are removed from it.
+        archive_dir: str
+            The directory the .npz file is written to.
+
+        Returns
+        -------
+            dict
+            The entry of the combination in the index of the archive.
+    """
+    logs = []
+    skipped = []
+    for run, path in list(runs.items()):
+        try:
+            logs.append(read_logging(path))
+        except ParseError:
+            # unreadable log files are reported in the index
+            skipped.append(path)
+            del runs[run]
+    header = _read_header(next(iter(runs.values()))) if runs else {}
+    # names of the actions are stored as indices into a small vocabulary
+    names = sorted(set(a for log in logs for a in log[0]))
+    codes = {name: i for i, name in enumerate(names)}
+    actions = [[codes[a] for a in log[0]] for log in logs]
+
+    arrays = {"runs": np.array(list(runs), dtype=np.int32),
+              "termination": np.array([log[7] for log in logs], dtype=str),
+              "action_names": np.array(names, dtype=str),
+              "actions": _concatenate(actions, np.uint8),
+              "actions_offsets": _offsets(actions)}
+    for i, (key, dtype) in enumerate(ARRAY_TYPES.items(), start=1):
+        values = [log[i] for log in logs]
+        arrays[key] = _concatenate(values, dtype, (2,) if key == "positions" else ())
+        arrays[key + "_offsets"] = _offsets(values)
+    labs = [log[6] for log in logs]
+    arrays["lab"] = np.array([row for lab in labs for row in lab], dtype=str)
+    arrays["lab_offsets"] = _offsets(labs)
+
+    file_name = pair + ".npz"
+    np.savez_compressed(os.path.join(archive_dir, file_name), **arrays)
+    terminations = {}
+    for log in logs:
+        terminations[log[7]] = terminations.get(log[7], 0) + 1
+    return {"file": file_name,
+            "lab": header.get("Name"),
+            "agent": header.get("AgentType"),
+            "runs": list(runs),
+            "actions": int(arrays["actions_offsets"][-1]),
+            "terminations": terminations,
+            "skipped": skipped}
+
+
+def load_index(archive_dir):
+    """
+        Loads the index of an archive.
+
+        Parameters
+        ----------
+        archive_dir: str
+            The directory of the archive.
+
+        Returns
+        -------
+            dict
+            The entry of each converted combination, see ``convert_pair``.
+    """
+    with open(os.path.join(archive_dir, INDEX_FILE)) as f:
+        return json.load(f)
+
+
+def load_pair(archive_dir, pair):
+    """
+        Loads the runs of a labyrinth + agent combination from an archive.
+
+        Parameters
+        ----------
+        archive_dir: str
+            The directory of the archive.
+        pair: str
+            The name of the combination, e.g. "lab0_simple".
+
+        Returns
+        -------
+            dict
+            The information of each run (keyed by its index) in the same
+            form as returned by ``evaluation.read_logging``.
+    """
+    with np.load(os.path.join(archive_dir, pair + ".npz")) as data:
+        arrays = {key: data[key] for key in data.files}
+
+    def run_slice(key, i):
+        offsets = arrays[key + "_offsets"]
+        return arrays[key][offsets[i]:offsets[i + 1]]
+
+    names = arrays["action_names"].tolist()
+    result = {}
+    for i, run in enumerate(arrays["runs"].tolist()):
+        result[run] = tuple([[names[code] for code in run_slice("actions", i)]] +
+                            [run_slice(key, i) for key in ARRAY_TYPES] +
+                            [run_slice("lab", i).tolist(), str(arrays["termination"][i])])
+    return result
+
+
+def _equal(original, converted):
+    for expected, value in zip(original, converted):
+        if isinstance(expected, (list, str)):
+            if list(expected) != list(value):
+                return False
+        elif not np.array_equal(np.asarray(expected).reshape(np.shape(value)), value):
+            return False
+    return True
+
+
+def validate_pair(pair, runs, archive_dir):
+    """
+        Checks that the archived runs of a combination are equal to the
+        ones read from their log files.
+
+        Parameters
+        ----------
+        pair: str
+            The name of the combination.
+        runs: dict
+            The path of the log file of each run, see ``find_logs``.
+        archive_dir: str
+            The directory of the archive.
+
+        Returns
+        -------
+            list
+            The paths of the log files whose runs differ.
+    """
+    archived = load_pair(archive_dir, pair)
+    return [path for run, path in runs.items()
+            if run not in archived or not _equal(read_logging(path), archived[run])]
+
+
+def _convert_and_validate(pair, runs, archive_dir, validate):
+    entry = convert_pair(pair, runs, archive_dir)
+    mismatches = validate_pair(pair, runs, archive_dir) if validate else []
+    return entry, mismatches
+
+
+def convert_tree(root, archive_dir, workers=None, validate=False):
+    """
+        Converts all log files within a tree written by the pipeline into
+        an archive. The combinations are converted in parallel.
+
+        Parameters
+        ----------
+        root: str
+            The root of the tree, e.g. "data/Experiment_data".
+        archive_dir: str
+            The directory the archive is written to. Existing files of the
+            same combinations are overwritten.
+        workers: int, optional (Default: None)
+            The number of worker processes, defaults to the number of CPUs.
+        validate: bool, optional (Default: False)
+            If true, each converted combination is loaded again and compared
+            to the output of ``evaluation.read_logging``.
+
+        Returns
+        -------
+        index: dict
+            The index of the archive, see ``load_index``.
+        mismatches: list
+            The paths of the log files that were not converted correctly.
+            Always empty, if validate is false.
+    """
+    pairs = find_logs(root)
+    os.makedirs(archive_dir, exist_ok=True)
+    index = {}
+    mismatches = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {pair: executor.submit(_convert_and_validate, pair, runs, archive_dir, validate)
+                   for pair, runs in pairs.items()}
+        for pair, future in futures.items():
+            index[pair], pair_mismatches = future.result()
+            mismatches += pair_mismatches
+    with open(os.path.join(archive_dir, INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=1)
+    return index, mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Converts the log files written by the pipeline into a compact archive.")
+    parser.add_argument("root", help="Root of the tree containing the log files, e.g. data/Experiment_data")
+    parser.add_argument("archive", help="Directory the archive is written to")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--validate", action="store_true",
+                        help="Compare the archived runs with the original log files")
+    args = parser.parse_args()
+
+    index, mismatches = convert_tree(args.root, args.archive, args.workers, args.validate)
+    print("Converted {} runs of {} labyrinth + agent combinations.".format(
+        sum(len(entry["runs"]) for entry in index.values()), len(index)))
+    if args.validate:
+        for path in mismatches:
+            print("Mismatch: {}".format(path))
+        print("Validation {}.".format("failed" if mismatches else "passed"))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module encoding the facing direction of an agent (its heading) as an
+integer between 0 and 3, clockwise starting with north. Turning and
+converting offsets between the frame of the agent (tiles in front of and
+to the right of it) and the frame of the environment (rows and columns)
+are then simple table lookups.
+
+The direction vectors (``NORTH``, ``EAST``, ... of ``gridEnvironment``)
+are still used in the public interface of the environment and can be
+converted using ``to_heading`` and ``VECTORS``. The headings are named
+``HEADING_NORTH``, ``HEADING_EAST``, ... to avoid confusing them.
+
+Example::
+
+    heading = to_heading(env.facing_direction)
+    VECTORS[RIGHT[heading]]  # direction to the right of the agent
+    to_absolute(heading, 2, 0)  # offset of the tile two steps ahead
+"""
+
+import numpy as np
+
+HEADING_NORTH = 0
+HEADING_EAST = 1
+HEADING_SOUTH = 2
+HEADING_WEST = 3
+
+# (row, column) vector of each heading
+VECTORS = ((-1, 0), (0, 1), (1, 0), (0, -1))
+# the same vectors as an array of shape (4, 2), e.g. for indexing with an
+# array of headings
+VECTOR_ARRAY = np.array(VECTORS, dtype=np.int64)
+# heading of each vector
+INDEX = {vector: heading for heading, vector in enumerate(VECTORS)}
+
+# heading after turning left, right and around
+LEFT = (HEADING_WEST, HEADING_NORTH, HEADING_EAST, HEADING_SOUTH)
+RIGHT = (HEADING_EAST, HEADING_SOUTH, HEADING_WEST, HEADING_NORTH)
+BACK = (HEADING_SOUTH, HEADING_WEST, HEADING_NORTH, HEADING_EAST)
+
+# the forward and right vector of each heading as (forward row, forward
+# column, right row, right column), see to_absolute and to_relative
+FRAMES = tuple(VECTORS[heading] + VECTORS[RIGHT[heading]] for heading in range(4))
+
+
+def to_heading(direction):
+    """
+        Converts a direction to its heading.
+
+        Parameters
+        ----------
+        direction: int, tuple
+            A heading or a direction vector such as ``gridEnvironment.NORTH``.
+
+        Returns
+        -------
+            int
+            The heading of the direction.
+    """
+    if isinstance(direction, (int, np.integer)):
+        return int(direction) % 4
+    try:
+        return INDEX[tuple(direction)]
+    except (KeyError, TypeError):
+        raise ValueError("{} is not a valid direction.".format(direction))
+
+
+def to_absolute(heading, forward, right):
+    """
+        Converts an offset relative to an agent with the given heading into
+        a (row, column) offset.
+
+        Parameters
+        ----------
+        heading: int
+            The heading of the agent.
+        forward: int
+            The number of tiles in front of the agent (negative values are
+            behind it).
+        right: int
+            The number of tiles to the right of the agent (negative values
+            are left of it).
+
+        Returns
+        -------
+            tuple
+            The (row, column) offset.
+    """
+    fi, fj, ri, rj = FRAMES[heading]
+    return (forward * fi + right * ri, forward * fj + right * rj)
+
+
+def to_relative(heading, row, col):
+    """
+        Converts a (row, column) offset into an offset relative to an agent
+        with the given heading, the inverse of ``to_absolute``.
+
+        Returns
+        -------
+            tuple
+            The (forward, right) offset.
+    """
+    fi, fj, ri, rj = FRAMES[heading]
+    return (row * fi + col * fj, row * ri + col * rj)
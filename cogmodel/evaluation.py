@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module computing the per-run metrics reported by the pipeline from the
+recorded information of a run (see ``read_logging``).
+"""
+
+import numpy as np
+
+from .parsing import LOG_SECTIONS, ACTIONS, tokenize, parse_token, split_action, \
+    parse_array, parse_positions
+
+# Names of all metrics in the order they appear in the csv files
+METRICS = ("totalActions", "totalActionValue", "totalMoves", "totalTurns",
+           "totalNorth", "totalEast", "totalSouth", "totalWest", "totalLeft",
+           "totalRight", "totalTime", "timePerAction", "pathlength",
+           "totalVisitedGround", "percVisitedGround", "minCogLoad",
+           "maxCogLoad", "avCogLoad", "startCogLoad", "endCogLoad")
+
+# Header of the evaluation.csv file of each labyrinth + agent combination
+EVALUATION_HEADER = "ID,labID,agentID," + ",".join(METRICS) + ",termination"
+
+# Header of the "Master" .csv file (overall_averages.csv)
+MASTER_HEADER = "labID,agentID," + ",".join(METRICS) + ",termination,runs," + \
+                ",".join(metric + "_std" for metric in METRICS) + "," + \
+                ",".join(metric + "_ci95" for metric in METRICS)
+
+
+def read_logging(path):
+    """
+        Reads the logging information of a run from the log file written by
+        the pipeline (see ``GridEnvironment.set_logging``). Raises a
+        ``parsing.ParseError`` if a section cannot be parsed.
+
+        Parameters
+        ----------
+        path: str
+            Place where log file is saved.
+
+        Returns
+        -------
+        action_types: list(String)
+            List containing all actions taken after each other. Eg ['NORTH', 'EAST']
+        positions: numpy.ndarray
+            Array of positions agent visited after each other
+        time: numpy.ndarray
+            Array of times agent took in step i. (in nano seconds)
+        load: numpy.ndarray
+            Array of cognitive loads agent had at step i.
+        length: numpy.ndarray
+            Array of pathlengths at time i.
+        action_values: numpy.ndarray
+            Array of action values at step i.
+        lab: list(String)
+            List containing strings of labyrinth rows. String at i is labyrinth row i.
+        termination: str
+            The reason the run ended, e.g. "target" or "max_actions". Empty for log files
+            written before termination reasons were recorded.
+    """
+    action_types = []
+    positions = []
+    time = []
+    load = []
+    length = []
+    action_values = []
+    lab = []
+    termination = ""
+    with open(path) as file:
+        for token in tokenize(file, LOG_SECTIONS, actions=True):
+            section = token.section
+            if section == "EnvString":
+                lab.append(token.text.strip())
+            elif section == ACTIONS:
+                action = parse_token(split_action, token, path)[1]
+                if action not in ("Condition starting", "Condition finished"):
+                    action_types.append(action)
+            elif section == "Position":
+                positions = parse_token(parse_positions, token, path)
+            elif section == "Time":
+                time = parse_token(parse_array, token, path)
+            elif section == "Load":
+                load = parse_token(parse_array, token, path)
+            elif section == "Length":
+                length = parse_token(parse_array, token, path)
+            elif section == "Action":
+                action_values = parse_token(parse_array, token, path, np.float64)
+            elif section == "Termination":
+                termination = token.text.strip()
+
+    return action_types, positions, time, load, length, action_values, lab, termination
+
+
+def compute_metrics(action_types, positions, time, load, length, action_values, lab):
+    """
+        Computes all metrics of a single run.
+
+        Parameters
+        ----------
+        action_types: list(String)
+            List containing all actions taken after each other. Eg ['NORTH', 'EAST']
+        positions: list((int,int))
+            List of positions agent visited after each other
+        time: list(int)
+            List of times agent took in step i. (in nano seconds)
+        load: numpy.ndarray
+            Array of cognitive loads agent had at step i.
+        length: list(int)
+            List of pathlengths at time i.
+        action_values: list(float)
+            List of action values at step i.
+        lab: list(String)
+            List containing strings of labyrinth rows.
+
+        Returns
+        -------
+            dict
+            A dictionary containing the value of each metric in METRICS.
+    """
+    # getting information about action types
+    overall_actions = len(action_types)
+    unique, counts = np.unique(action_types, return_counts=True)
+    action_dict = dict(zip(unique, counts))
+    north_number = int(action_dict.get('NORTH') or 0)
+    east_number = int(action_dict.get('EAST') or 0)
+    south_number = int(action_dict.get('SOUTH') or 0)
+    west_number = int(action_dict.get('WEST') or 0)
+    left_number = int(action_dict.get('TURN LEFT') or 0)
+    right_number = int(action_dict.get('TURN RIGHT') or 0)
+
+    # getting time information
+    time_total = np.cumsum(time)[-1]/1000000  # milliseconds
+
+    # getting action information
+    visited_total = len(set(tuple(x) for x in positions))
+    number_non_walls = sum(len(row) - row.count('#') for row in lab)
+
+    return {"totalActions": overall_actions,
+            "totalActionValue": np.cumsum(action_values)[-1],
+            "totalMoves": north_number + east_number + south_number + west_number,
+            "totalTurns": left_number + right_number,
+            "totalNorth": north_number,
+            "totalEast": east_number,
+            "totalSouth": south_number,
+            "totalWest": west_number,
+            "totalLeft": left_number,
+            "totalRight": right_number,
+            "totalTime": time_total,
+            "timePerAction": time_total/overall_actions,  # milliseconds
+            "pathlength": length[-1],
+            "totalVisitedGround": visited_total,
+            "percVisitedGround": visited_total/number_non_walls,
+            "minCogLoad": load.min(),
+            "maxCogLoad": load.max(),
+            "avCogLoad": np.mean(load),
+            "startCogLoad": load[0],
+            "endCogLoad": load[-1]}
+
+
+def tile_statistics(positions, time, lab):
+    """
+        Computes how often and how long each tile of the labyrinth was
+        visited, e.g. for plotting heatmaps.
+
+        Parameters
+        ----------
+        positions: list((int,int))
+            List of positions agent visited after each other
+        time: list(int)
+            List of times agent took in step i. (in nano seconds)
+        lab: list(String)
+            List containing strings of labyrinth rows.
+
+        Returns
+        -------
+            lab_value: dict
+                The number of visits for each position, -1 for walls.
+            lab_time: dict
+                The time in milliseconds spent on each position, -1 for walls.
+    """
+    lab_time = dict()
+    lab_value = dict()
+    for i in range(0, len(lab)):
+        for j in range(0, len(lab[i])):
+            if lab[i][j] == '#':
+                lab_time[(i, j)] = -1
+                lab_value[(i, j)] = -1
+            else:
+                lab_time[(i, j)] = 0
+                lab_value[(i, j)] = 0
+    for i in range(0, len(positions)):
+        lab_value[tuple(positions[i])] += 1
+        lab_time[tuple(positions[i])] += time[i] / \
+            1000000  # milliseconds
+    return lab_value, lab_time
+
+
+def format_run(number, labID, agentID, metrics, termination):
+    """
+        Formats the row of a single run in the evaluation.csv file.
+
+        Parameters
+        ----------
+        number: int
+            The index of the run.
+        labID: str
+            The name of the labyrinth.
+        agentID: str
+            The name of the strategy.
+        metrics: dict
+            The value of each metric in METRICS.
+        termination: str
+            The reason the run ended.
+
+        Returns
+        -------
+            str
+            The row, see EVALUATION_HEADER.
+    """
+    return str(number) + ',' + labID + ',' + agentID + ',' + \
+        ",".join(str(metrics[metric]) for metric in METRICS) + ',' + termination
+
+
+def format_aggregates(labID, agentID, statistics, terminations):
+    """
+        Formats the average, standard deviation and half width of the 95%
+        confidence interval of all metrics over the runs of a labyrinth +
+        agent combination.
+
+        Parameters
+        ----------
+        labID: str
+            The name of the labyrinth.
+        agentID: str
+            The name of the strategy.
+        statistics: dict
+            A RunningStatistic (see ``aggregation``) for each metric in
+            METRICS.
+        terminations: dict
+            The number of runs that ended for each termination reason.
+
+        Returns
+        -------
+        rows: list(str)
+            The AVERAGE, STD and CI95 rows of the evaluation.csv file.
+        master_row: str
+            The row of the "Master" .csv file, see MASTER_HEADER.
+    """
+    count = statistics[METRICS[0]].count
+    # summary of the termination reasons, e.g. "target:8|max_actions:2"
+    terminations = "|".join("{}:{}".format(reason, number)
+                            for reason, number in terminations.items())
+
+    means = ",".join(str(statistics[metric].mean) for metric in METRICS)
+    stds = ",".join(str(statistics[metric].std) for metric in METRICS)
+    cis = ",".join(str(statistics[metric].confidence_interval(0.95)) for metric in METRICS)
+
+    rows = [str(count) + ',' + labID + ',' + 'AVERAGE' + ',' + means + ',' + terminations,
+            str(count) + ',' + labID + ',' + 'STD' + ',' + stds + ',',
+            str(count) + ',' + labID + ',' + 'CI95' + ',' + cis + ',']
+    master_row = labID + ',' + agentID + ',' + means + ',' + terminations + ',' + \
+        str(count) + ',' + stds + ',' + cis
+    return rows, master_row
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module rendering the frames of a replayed run directly into numpy arrays,
+without a display, and encoding them into a GIF or video.
+
+The frames look like the ones of the ``PygameRenderer``: the tiles are
+colored using a palette of their colors (targets show their target color
+while they are within the view cone), the past trajectory is drawn as a red
+line and the agent as a yellow circle with a black dot in the direction it
+is facing. The states of the run are reconstructed using
+``playback.replay_batch``.
+
+Frames are rendered in chunks of consecutive frames, updating the frame
+incrementally, and are passed to the encoder in order. When using several
+worker processes, the static data of the run is sent to each of them once
+and they render their chunks into shared memory, so that only the indices
+of the frames are passed between the processes. GIFs and videos are encoded using imageio if it is
+installed (videos additionally need the imageio-ffmpeg plugin), otherwise
+the frames are saved as a sequence of PNG files.
+
+Example::
+
+    env, targets, agent, goal = playback.load_experiment(path)
+    export_run(env, agent, "run.gif", frame_step=10, workers=4)
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import matplotlib.colors as colors
+import matplotlib.image
+
+from .gridEnvironment import NORTH, SOUTH, EAST
+from .playback import replay_batch
+
+try:
+    import imageio.v2 as imageio
+
+    imageio_available = True
+except ImportError:
+    imageio_available = False
+
+# Size of a tile in pixels
+CELL_SIZE = 8
+# Number of consecutive frames rendered at once
+CHUNK_SIZE = 64
+# Maximal size in bytes of the frames a worker renders into shared memory at
+# once, which limits the number of frames of its chunks
+SHARED_CHUNK_BYTES = 32 * 2 ** 20
+
+TRAJECTORY_COLOR = "red"
+AGENT_COLOR = "yellow"
+EYE_COLOR = "black"
+
+# Value of the pixels not covered by the trajectory, see ``_trajectory_steps``
+_NEVER = np.iinfo(np.int32).max
+
+
+def _rgb(name):
+    return np.array(colors.to_rgb(name)) * 255
+
+
+def _tile_colors(env):
+    """
+        Determines the color of each tile of the environment.
+
+        Returns
+        -------
+        indices: numpy.ndarray
+            The index of the color of each tile within the palette.
+        palette: numpy.ndarray
+            The RGB values (uint8) of the colors.
+        targets: list
+            A tuple (position, color index) for each target tile, where
+            the color index is the one of its target color.
+    """
+    names = {}
+    indices = np.zeros(env.size, dtype=np.int64)
+    targets = []
+    for pos, tile in env.tiles.items():
+        visible = tile.target_visible
+        tile.target_visible = False
+        indices[pos] = names.setdefault(tile.color, len(names))
+        if tile.is_target:
+            tile.target_visible = True
+            targets.append((pos, names.setdefault(tile.color, len(names))))
+        tile.target_visible = visible
+    palette = np.array([_rgb(name) for name in names], dtype=np.uint8).reshape(-1, 3)
+    return indices, palette, targets
+
+
+def _agent_stamps(cell_size):
+    """
+        Computes the pixels of the agent within a tile for each facing
+        direction, see ``PygameRenderer._draw_agent``.
+
+        Returns
+        -------
+            dict
+            A tuple (body, eye) of boolean masks of shape
+            (cell_size, cell_size) for each facing direction.
+    """
+    center = cell_size // 2
+    size = cell_size // 2
+    y, x = np.mgrid[:cell_size, :cell_size]
+    body = (x - center) ** 2 + (y - center) ** 2 <= size ** 2
+    stamps = {}
+    for facing in (NORTH, SOUTH, EAST, None):
+        if facing == NORTH:
+            eye_x, eye_y = center, center - size // 3
+        elif facing == SOUTH:
+            eye_x, eye_y = center, center + size // 3
+        elif facing == EAST:
+            eye_x, eye_y = center + size // 3, center
+        else:
+            eye_x, eye_y = center - size // 3, center
+        eye = (x - eye_x) ** 2 + (y - eye_y) ** 2 <= (size // 6) ** 2
+        stamps[facing] = (body, eye)
+    return stamps
+
+
+def _segments(positions, cell_size):
+    """
+        Computes the pixel area of the trajectory segment leading to each
+        state, connecting the centers of the tiles with a line of width 2.
+
+        Returns
+        -------
+            numpy.ndarray
+            The (top, bottom, left, right) pixels of the segment leading to
+            each state, of shape (len(positions), 4). The first state has
+            no segment (an empty area).
+    """
+    centers = positions.astype(np.int64) * cell_size + cell_size // 2
+    start = np.concatenate([centers[:1], centers[:-1]])
+    lower = np.minimum(start, centers) - 1
+    upper = np.maximum(start, centers) + 1
+    areas = np.stack([lower[:, 0], upper[:, 0], lower[:, 1], upper[:, 1]], axis=1)
+    areas[0] = 0
+    return np.maximum(areas, 0)
+
+
+def _trajectory_steps(segments, shape):
+    """
+        Determines the first state at which each pixel is covered by the
+        trajectory (_NEVER if it is not covered).
+    """
+    steps = np.full(shape, _NEVER, dtype=np.int32)
+    # drawing the segments in reverse order keeps the first state
+    for k in range(len(segments) - 1, 0, -1):
+        top, bottom, left, right = segments[k]
+        steps[top:bottom, left:right] = k
+    return steps
+
+
+def _render_chunk(scene, frames, out):
+    """
+        Renders the given frames of a run.
+
+        Parameters
+        ----------
+        scene: dict
+            The static data of the run, see ``render_frames``.
+        frames: list
+            The (increasing) indices of the states that are rendered.
+        out: numpy.ndarray
+            The uint8 array of shape (len(frames), height, width, 3) the
+            frames are rendered into.
+    """
+    c = scene["cell_size"]
+    palette = scene["palette"]
+    indices = scene["indices"]
+    positions = scene["positions"]
+    red = _rgb(TRAJECTORY_COLOR).astype(np.uint8)
+    yellow = _rgb(AGENT_COLOR).astype(np.uint8)
+    black = _rgb(EYE_COLOR).astype(np.uint8)
+    stamps = _agent_stamps(c)
+    segments = scene["segments"]
+    steps = scene["trajectory_steps"]
+
+    first = frames[0]
+    canvas = np.repeat(np.repeat(palette[indices], c, axis=0), c, axis=1)
+    visible = np.zeros(len(scene["targets"]), dtype=bool)
+    canvas[steps <= first] = red
+    last = first
+    for frame, k in zip(out, frames):
+        for top, bottom, left, right in segments[last + 1:k + 1]:
+            canvas[top:bottom, left:right] = red
+        last = k
+        # targets whose visibility changed
+        for t in np.flatnonzero(scene["visible_targets"][k] != visible):
+            (i, j), target_color = scene["targets"][t]
+            visible[t] = not visible[t]
+            block = (slice(i * c, (i + 1) * c), slice(j * c, (j + 1) * c))
+            canvas[block] = palette[target_color if visible[t] else indices[i, j]]
+            canvas[block][steps[block] <= k] = red
+
+        frame[...] = canvas
+        i, j = positions[k]
+        body, eye = stamps.get(tuple(scene["facings"][k].tolist()), stamps[None])
+        block = frame[i * c:(i + 1) * c, j * c:(j + 1) * c]
+        block[body] = yellow
+        block[eye] = black
+
+
+def _available_cpus():
+    """
+        Returns the number of CPUs this process may use.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# State of a worker process of render_frames, see _init_worker
+_worker = {}
+
+
+def _init_worker(scene, name, shape):
+    """
+        Receives the static data of the run and attaches to the shared
+        buffers of the frames once per worker process.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    _worker["scene"] = scene
+    _worker["shm"] = shm
+    _worker["buffers"] = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+
+def _render_shared_chunk(slot, frames):
+    """
+        Renders the given frames within a worker process into the given
+        slot of the shared buffers.
+    """
+    _render_chunk(_worker["scene"], frames, _worker["buffers"][slot, :len(frames)])
+    return slot
+
+
+def render_frames(env, agent, frame_step=1, workers=1, cell_size=CELL_SIZE):
+    """
+        Renders the frames of a replayed run headlessly.
+
+        Parameters
+        ----------
+        env: cogmodel.GridEnvironment
+            The environment the run took place in.
+        agent: cogmodel.playback.PlaybackAgent
+            The agent replaying the run. The agent and environment are not
+            changed.
+        frame_step: int, optional (Default: 1)
+            Only every frame_step-th state is rendered. The last state is
+            always rendered.
+        workers: int, optional (Default: 1)
+            The number of worker processes rendering frames in parallel
+            (None to use one per CPU). At most one worker per available
+            CPU is used, as more workers would only slow rendering down.
+        cell_size: int, optional (Default: CELL_SIZE)
+            The size of a tile in pixels.
+
+        Yields
+        ------
+            numpy.ndarray
+            The frames in order, as uint8 arrays of shape
+            (height, width, 3).
+    """
+    batch = replay_batch([(env, None, agent, None)], view_cones=True)
+    length = int(batch["lengths"][0])
+    positions = batch["positions"][0, :length + 1]
+    indices, palette, targets = _tile_colors(env)
+    cones = batch["view_cones"][0, :length + 1]
+    visible_targets = np.zeros((length + 1, len(targets)), dtype=bool)
+    for t, (pos, _) in enumerate(targets):
+        visible_targets[:, t] = np.all(cones == pos, axis=-1).any(axis=-1)
+    segments = _segments(positions, cell_size)
+    scene = {"cell_size": cell_size, "palette": palette, "indices": indices,
+             "targets": targets, "positions": positions, "segments": segments,
+             "trajectory_steps": _trajectory_steps(
+                 segments, (indices.shape[0] * cell_size, indices.shape[1] * cell_size)),
+             "facings": batch["facings"][0, :length + 1],
+             "visible_targets": visible_targets}
+
+    frames = list(range(0, length + 1, max(frame_step, 1)))
+    if frames[-1] != length:
+        frames.append(length)
+    frame_shape = scene["trajectory_steps"].shape + (3,)
+    workers = min(workers or _available_cpus(), _available_cpus())
+    if workers != 1:
+        chunk_size = max(1, min(CHUNK_SIZE, SHARED_CHUNK_BYTES // int(np.prod(frame_shape))))
+    else:
+        chunk_size = CHUNK_SIZE
+    chunks = [frames[i:i + chunk_size] for i in range(0, len(frames), chunk_size)]
+    if workers == 1 or len(chunks) < 2:
+        for chunk in chunks:
+            out = np.empty((len(chunk),) + frame_shape, dtype=np.uint8)
+            _render_chunk(scene, chunk, out)
+            yield from out
+        return
+
+    # only a few chunks are rendered ahead, each into its own slot of the
+    # shared buffers, so that the frames do not pile up if encoding them is
+    # slower
+    slots = min(2 * workers, len(chunks))
+    shape = (slots, chunk_size) + frame_shape
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+    buffers = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(scene, shm.name, shape)) as executor:
+            pending = deque()
+            for n, chunk in enumerate(chunks):
+                if len(pending) == slots:
+                    yield from _take_chunk(buffers, *pending.popleft())
+                pending.append((executor.submit(_render_shared_chunk, n % slots, chunk), len(chunk)))
+            while pending:
+                yield from _take_chunk(buffers, *pending.popleft())
+    finally:
+        del buffers
+        shm.close()
+        shm.unlink()
+
+
+def _take_chunk(buffers, future, count):
+    """
+        Waits until the worker rendered its chunk and copies its frames out
+        of the shared buffers, so that the slot can be reused.
+    """
+    slot = future.result()
+    for frame in buffers[slot, :count]:
+        yield frame.copy()
+
+
+def save_frames(frames, path, fps=10):
+    """
+        Encodes the frames into the given file (e.g. a .gif or .mp4 file)
+        using imageio. If imageio is not available or cannot write the
+        format, the frames are saved as PNG files into a folder named
+        like the file without its extension instead.
+
+        Parameters
+        ----------
+        frames: iterable
+            The frames as uint8 arrays of shape (height, width, 3).
+        path: str
+            The file the frames are saved to.
+        fps: float, optional (Default: 10)
+            The number of frames per second of the GIF or video.
+
+        Returns
+        -------
+            str
+            The path of the file or of the folder containing the frames.
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    frames = iter(frames)
+    if imageio_available:
+        try:
+            if path.lower().endswith(".gif"):
+                # imageio's GIF writer expects the duration of a frame
+                writer = imageio.get_writer(path, duration=1 / fps)
+            else:
+                writer = imageio.get_writer(path, fps=fps)
+        except (ValueError, RuntimeError, ImportError) as e:
+            print("Cannot encode {} ({}), saving the frames as images instead.".format(path, e))
+        else:
+            with writer:
+                for frame in frames:
+                    writer.append_data(frame)
+            return path
+    folder = os.path.splitext(path)[0]
+    os.makedirs(folder, exist_ok=True)
+    for i, frame in enumerate(frames):
+        matplotlib.image.imsave(os.path.join(folder, "frame_{:06d}.png".format(i)), frame)
+    return folder
+
+
+def export_run(env, agent, path, frame_step=1, workers=1, fps=10, cell_size=CELL_SIZE):
+    """
+        Renders a replayed run headlessly and saves it, see
+        ``render_frames`` and ``save_frames``.
+
+        Returns
+        -------
+            str
+            The path of the file or of the folder containing the frames.
+    """
+    return save_frames(render_frames(env, agent, frame_step, workers, cell_size), path, fps)
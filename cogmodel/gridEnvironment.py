@@ -4,7 +4,9 @@ import datetime
 from heapq import heappush, heappop
 # Use deque instead of queue for performance reasons
 from collections import deque
+from functools import lru_cache
 from . import log
+from . import directions
 from pympler import asizeof
 import time
 import numpy as np
@@ -34,9 +36,41 @@ ACTION_MAPPING = {"Left": WEST, "Right": EAST, "Up": NORTH,
 
 COLOR_MAP = {"#": "gray", "g": "white", "": "black"}
 
+# Octants (see ``GridEnvironment._handle_octant``) making up the view cone
+# for each facing direction
+VIEW_CONE_OCTANTS = {NORTH: (5, 6), SOUTH: (1, 2), EAST: (0, 7), WEST: (3, 4)}
+
+# Values of the cells of ``GridEnvironment.local_patch``
+PATCH_UNSEEN = -1
+PATCH_WALL = 0
+PATCH_FREE = 1
+
 TARGET_COLOR = "green"
 TARGET_CHAR = "T"
 
+# Reasons for which an episode can end, see ``GridEnvironment.set_budget``
+TERMINATION_TARGET = "target"
+TERMINATION_MAX_ACTIONS = "max_actions"
+TERMINATION_MAX_TIME = "max_time"
+TERMINATION_STALL = "stall"
+TERMINATION_ABORTED = "aborted"
+
+
+class BudgetExhausted(Exception):
+    """
+        Raised by ``GridEnvironment.perform_action`` once one of the budgets
+        specified via ``GridEnvironment.set_budget`` has been exhausted. The
+        reason is available as the first argument as well as the
+        ``termination_reason`` attribute of the environment.
+    """
+    pass
+
+
+# Trajectory lists of the environment, stored as arrays of the given type when
+# pickling, see ``GridEnvironment.__getstate__``
+TRAJECTORIES = {"positions": np.int32, "timestamps": np.int64, "memoryUsage": np.int64,
+                "path_length": np.int64, "step_score": np.float64}
+
 
 class Tile(object):
     """
@@ -229,6 +263,62 @@ class Tile(object):
         return res
 
 
+class TileGrid(object):
+    """
+        Read-only view of the tiles of an environment as a list of rows, as
+        used by the renderers. Rows and tiles are only looked up when they
+        are accessed, so that showing a part of a large environment only
+        touches the tiles within that part.
+
+        ``grid[i][j]`` is the tile at row i and column j, ``grid[rows]``
+        for a slice of rows is a list of rows and ``row[cols]`` for a slice
+        of columns is a list of tiles.
+
+        Parameters
+        ----------
+        env: GridEnvironment
+            The environment whose tiles are viewed.
+    """
+
+    def __init__(self, env):
+        self.env = env
+
+    def __len__(self):
+        return self.env.size[0]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [_TileRow(self.env, r) for r in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return _TileRow(self.env, i)
+
+
+class _TileRow(object):
+    """
+        A single row of a TileGrid.
+    """
+
+    def __init__(self, env, row):
+        self.env = env
+        self.row = row
+
+    def __len__(self):
+        return self.env.size[1]
+
+    def __getitem__(self, j):
+        tiles, row = self.env.tiles, self.row
+        if isinstance(j, slice):
+            return [tiles[(row, col)] for col in range(*j.indices(len(self)))]
+        if j < 0:
+            j += len(self)
+        if not 0 <= j < len(self):
+            raise IndexError(j)
+        return tiles[(row, j)]
+
+
 class GridEnvironment(object):
     """
         Class representing 2 dimensional gridworlds while providing capabilities
@@ -251,6 +341,12 @@ class GridEnvironment(object):
         agent_pos: tuple
             A tuple containing the current position of the agent or None
             if no agent has been specified.
+        heading: int
+            The direction the agent is facing as an integer, see
+            ``cogmodel.directions``.
+        facing_direction: tuple
+            The direction the agent is facing as a vector (``NORTH``,
+            ``SOUTH``, ``WEST`` or ``EAST``). Can also be set to a heading.
         initial_agent_pos: tuple
             The initial position of the agent when it was specified.
             Mainly used to create the log file correctly.
@@ -261,8 +357,12 @@ class GridEnvironment(object):
             The number of tiles in which the agent can distinguish a target.
             Ininitially None, which means that the agent can always distinguish
             the target.
-        targets: list
-            A list of tile positions which have been specified as targets.
+        targets: dict
+            The positions of the tiles which have been specified as targets
+            (see ``initialize_targets``) and their target descriptions.
+        tile_version: int
+            Increases whenever tiles are changed through the environment,
+            see ``changed_tiles``.
         env_string: str
             The raw environment string specifying the layout of the grid as given
             to the init function.
@@ -277,10 +377,34 @@ class GridEnvironment(object):
         log_path: str
             Path to the logfile. Initially None, which also means that the
             environment should not do logging.
+        max_actions: int, None
+            The maximum number of actions per episode, see ``set_budget``.
+        max_time: float, None
+            The maximum wall clock time in seconds per episode, see
+            ``set_budget``.
+        max_repeats: int, None
+            How often the same state may be reached before the episode is
+            considered stalled, see ``set_budget``.
+        termination_reason: str, None
+            The reason the current episode ended. None while the episode is
+            still running.
+        target_distance: numpy.ndarray, memoryview, None
+            An optional 2D array containing the distance of each tile to the
+            target (-1 if it cannot be reached), e.g. as provided by a
+            ``SharedMaze``. Used by ``compute_distance`` when available.
     """
 
     def __init__(self, target, initial_agent_pos, view_radius, name, env_string=None, facing=None):
         self.tiles = {}
+        # whether the tiles are shared with other environments (see clone)
+        # and the positions of the tiles which were copied since, see _own_tile
+        self._shared_tiles = False
+        self._owned_tiles = set()
+        # counts the changes of the tiles, see changed_tiles
+        self.tile_version = 0
+        self._tiles_parsed = 0  # version at which all tiles were replaced
+        self._tile_changes = {}  # position: version of its last change
+        self.targets = {}
         self.size = (None, None)
         self.agent_pos = initial_agent_pos
         self.initial_agent_pos = initial_agent_pos
@@ -288,7 +412,7 @@ class GridEnvironment(object):
         self.target = target
         self.name = name
         self.initial_facing = facing
-        if facing is not None and isinstance(facing, tuple) and len(facing) == 2:
+        if _is_direction(facing):
             self.facing_direction = facing
         else:
             self.facing_direction = NORTH  # agent always starts facing north by default
@@ -307,6 +431,26 @@ class GridEnvironment(object):
         self.last_time_stamp = None  # last time stamp before calling action method
         self.env_time = 0  # time environment took to process for action and viewcone methods
 
+        # budgets, see set_budget
+        self.max_actions = None
+        self.max_time = None
+        self.max_repeats = None
+        self.termination_reason = None
+        self._start_time = None  # wall clock time at the start of the experiment
+        self._seen_states = {}  # (pos, facing, agent state hash): count
+
+        self.target_distance = None
+        self._view_offsets = {}  # (facing, view_radius, size): view cone offsets
+        self._visible_offsets = {}  # same as _view_offsets, as sets
+
+    @property
+    def facing_direction(self):
+        return directions.VECTORS[self.heading]
+
+    @facing_direction.setter
+    def facing_direction(self, direction):
+        self.heading = directions.to_heading(direction)
+
     def parse_world_string(self, env_string, get_passable_states=False):
         r"""
             Parses an environment string, containing ``#`` for walls and ``g``
@@ -330,6 +474,10 @@ class GridEnvironment(object):
                 otherwise returns nothing.
         """
         self.env_string = env_string
+        if self._shared_tiles:
+            self.tiles = {}
+            self._shared_tiles = False
+        self._replaced_tiles()
         states = []
         for i, row in enumerate(env_string.split("\n")):  # [::-1]):
             # print("row {}: {}".format(i, row))
@@ -354,7 +502,74 @@ class GridEnvironment(object):
         if get_passable_states:
             return states
 
-    def set_logging(self, path, agent_type):
+    def initialize_targets(self, targets):
+        """
+            Specifies the targets within the environment, replacing the
+            previously specified ones.
+
+            Parameters
+            ----------
+            targets: dict
+                Maps the positions of the target tiles to dictionaries
+                containing information about the target, such as its
+                "color" and "symbol", see ``Tile.set_as_target``.
+        """
+        for pos in self.targets:
+            self._own_tile(pos).unset_as_target()
+        self.targets = {}
+        for pos, target_desc in targets.items():
+            self._own_tile(pos).set_as_target(target_desc)
+            self.targets[pos] = target_desc
+
+    def _own_tile(self, pos):
+        """
+            Returns the tile at the given position for modifying it. Tiles
+            shared with other environments (see ``clone``) are copied
+            first, so that changes only affect this environment. The tile
+            is recorded as changed, see ``changed_tiles``.
+        """
+        if self._shared_tiles:
+            self.tiles = self.tiles.copy()
+            self._shared_tiles = False
+            self._owned_tiles = set()
+        if pos not in self._owned_tiles:
+            self.tiles[pos] = self.tiles[pos].clone()
+            self._owned_tiles.add(pos)
+        self.tile_version += 1
+        self._tile_changes[pos] = self.tile_version
+        return self.tiles[pos]
+
+    def _replaced_tiles(self):
+        """
+            Records that all tiles were replaced, see ``changed_tiles``.
+        """
+        self.tile_version += 1
+        self._tiles_parsed = self.tile_version
+        self._tile_changes = {}
+
+    def changed_tiles(self, version):
+        """
+            Determines the tiles changed through the environment (e.g. by
+            ``initialize_targets`` or the visibility of the targets) since
+            the given version, e.g. so that renderers only need to look up
+            the colors of these tiles again.
+
+            Parameters
+            ----------
+            version: int
+                A previous value of ``tile_version``.
+
+            Returns
+            -------
+                list, None
+                The positions of the changed tiles or None if all tiles
+                were replaced since.
+        """
+        if version < self._tiles_parsed:
+            return None
+        return [pos for pos, v in self._tile_changes.items() if v > version]
+
+    def set_logging(self, path, agent_type, seed=None):
         """
             Defines that this environment should log all performed actions
             and other information, that might be required to replay actions.
@@ -370,6 +585,9 @@ class GridEnvironment(object):
             agentType: str
                 The name of the strategy of the agent that is currently used, given
                 for logging purposes.
+            seed: int, optional (Default: None)
+                The seed of the random number generator of the agent, given for
+                logging purposes so that the run can be reproduced.
         """
         self.log_path = path
         log(path, datetime.datetime.utcnow(), "\nGridEnvironment Log:\n"
@@ -378,10 +596,78 @@ class GridEnvironment(object):
                                               "StartPosition:\n{}\n"
                                               "Facing:\n{}\n"
                                               "Name:\n{}\n"
-                                              "AgentType:\n{}".format(self.env_string,
-                                                                      self.target, self.initial_agent_pos,
-                                                                      self.facing_direction,
-                                                                      self.name, agent_type))
+                                              "AgentType:\n{}\n"
+                                              "Seed:\n{}".format(self.env_string,
+                                                                 self.target, self.initial_agent_pos,
+                                                                 self.facing_direction,
+                                                                 self.name, agent_type, seed))
+
+    def set_budget(self, max_actions=None, max_time=None, max_repeats=None):
+        """
+            Specifies budgets for all following episodes within this
+            environment. Once a budget is exhausted, ``perform_action`` will
+            raise a ``BudgetExhausted`` exception and the reason will be
+            recorded in ``termination_reason`` as well as in the log file.
+            Budgets are kept when the environment is reset.
+
+            Parameters
+            ----------
+            max_actions: int, optional (Default: None)
+                The maximum number of actions an agent may perform per
+                episode. None means unlimited.
+            max_time: float, optional (Default: None)
+                The maximum wall clock time in seconds an episode may take,
+                measured from ``start_experiment``. None means unlimited.
+            max_repeats: int, optional (Default: None)
+                How often the same state may be reached before the agent is
+                considered to be stuck in a cycle. A state consists of the
+                agent's position, its facing direction and the result of
+                the agent's ``state_hash`` method (0 if the agent does not
+                provide one). Agents whose ``state_hash`` returns None are
+                not checked, e.g. because they act stochastically. None
+                disables the stall detection.
+        """
+        self.max_actions = max_actions
+        self.max_time = max_time
+        self.max_repeats = max_repeats
+
+    def terminate(self, reason):
+        """
+            Ends the current episode for the given reason, unless a reason
+            has already been recorded.
+
+            Parameters
+            ----------
+            reason: str
+                The termination reason, e.g. one of the TERMINATION_*
+                constants.
+        """
+        if self.termination_reason is None:
+            self.termination_reason = reason
+
+    def _check_budget(self, agent):
+        """
+            Checks all budgets after an action has been performed and
+            raises a BudgetExhausted exception if one of them is exhausted.
+        """
+        if self.agent_pos == self.target:
+            return
+        if self.max_actions is not None and len(self.step_score) - 1 >= self.max_actions:
+            self.terminate(TERMINATION_MAX_ACTIONS)
+        elif self.max_time is not None and self._start_time is not None and \
+                (time.time_ns() - self._start_time) / 1e9 > self.max_time:
+            self.terminate(TERMINATION_MAX_TIME)
+        elif self.max_repeats is not None:
+            state_hash = getattr(agent, "state_hash", None)
+            state_hash = state_hash() if state_hash is not None else 0
+            if state_hash is not None:
+                key = (self.agent_pos, self.facing_direction, state_hash)
+                count = self._seen_states.get(key, 0) + 1
+                self._seen_states[key] = count
+                if count > self.max_repeats:
+                    self.terminate(TERMINATION_STALL)
+        if self.termination_reason is not None:
+            raise BudgetExhausted(self.termination_reason)
 
     def get_action_space(self):
         """
@@ -422,6 +708,8 @@ class GridEnvironment(object):
         if self.agent_pos is None:
             raise AttributeError("No agent was initialized! Cannot perform "
                                  "action {}.".format(action))
+        if self.termination_reason is not None:
+            raise BudgetExhausted(self.termination_reason)
 
         if self.log_path:
             log(self.log_path, datetime.datetime.utcnow(),
@@ -429,11 +717,11 @@ class GridEnvironment(object):
 
         if isinstance(action[0], tuple):
             if action == TURN_RIGHT:
-                self._transform_facing_right()
+                self.heading = directions.RIGHT[self.heading]
                 # at the moment turning is valued as two thirds as costly as stepping in a direction
                 stepscore += 0.6
             elif action == TURN_LEFT:
-                self._transform_facing_left()
+                self.heading = directions.LEFT[self.heading]
                 stepscore += 0.6
             else:
                 raise AttributeError(
@@ -457,129 +745,195 @@ class GridEnvironment(object):
             self.last_time_stamp = time.time_ns()
             self.env_time = 0
 
+        if self.max_actions is not None or self.max_time is not None or \
+                self.max_repeats is not None:
+            self._check_budget(agent)
+
         return self.agent_pos
 
     def start_experiment(self):
-        log(self.log_path)
-        log(self.log_path, datetime.datetime.utcnow(), "Condition starting")
+        if self.log_path:
+            log(self.log_path)
+            log(self.log_path, datetime.datetime.utcnow(), "Condition starting")
         # set first log time
         self.last_time_stamp = time.time_ns()
+        self._start_time = self.last_time_stamp
 
     def finish_experiment(self):
-        log(self.log_path, datetime.datetime.utcnow(), "Condition finished")
-        log(self.log_path)
-        log(self.log_path,                                         # TODO: Add positions array
-            msg="Position:\n{}\nTime:\n{}\nLoad:\n{}\nLength:\n{}\nAction:\n{}".format(self.positions, self.timestamps,
-                                                                                       self.memoryUsage,
-                                                                                       self.path_length,
-                                                                                       self.step_score))
-
-    def _rotate_vector_right(self, vec):
-        x1 = vec[0]
-        y1 = vec[1]
+        if self.agent_pos == self.target:
+            self.terminate(TERMINATION_TARGET)
+        else:
+            self.terminate(TERMINATION_ABORTED)
+        if self.log_path:
+            log(self.log_path, datetime.datetime.utcnow(), "Condition finished")
+            log(self.log_path)
+            log(self.log_path,                                         # TODO: Add positions array
+                msg="Position:\n{}\nTime:\n{}\nLoad:\n{}\nLength:\n{}\nAction:\n{}\nTermination:\n{}".format(self.positions, self.timestamps,
+                                                                                                             self.memoryUsage,
+                                                                                                             self.path_length,
+                                                                                                             self.step_score,
+                                                                                                             self.termination_reason))
+
+    def view_cone_offsets(self, facing):
+        """
+            Computes the positions within the view cone relative to the
+            agent's position for the given facing direction.
 
-        # vector transformation: turn vector 270 degrees
-        x2 = y1
-        y2 = -x1
+            As the maze is treated as being made of glass (walls do not
+            block the view), the view cone only depends on the facing
+            direction and the view radius, so the shadowcasting only needs
+            to be done once for each facing direction. The result is cached.
 
-        return (x2, y2)
+            Parameters
+            ----------
+            facing: tuple, int
+                The facing direction, one of ``NORTH``, ``SOUTH``, ``WEST``
+                and ``EAST``, or its heading.
 
-    def _rotate_vector_left(self, vec):
-        x1 = vec[0]
-        y1 = vec[1]
+            Returns
+            -------
+                tuple
+                A sorted tuple of (row, column) offsets. Adding them to
+                the agent's position gives the visible positions, which
+                still need to be checked to be within the environment.
+        """
+        if isinstance(facing, (int, np.integer)):
+            facing = directions.VECTORS[facing]
+        key = (facing, self.view_radius, self.size)
+        if key not in self._view_offsets:
+            try:
+                octants = VIEW_CONE_OCTANTS[facing]
+            except KeyError:
+                raise EnvironmentError()
+            offsets = set()
+            for octant in octants:
+                offsets.update(self._handle_octant((0, 0), octant, self.view_radius, True))
+            self._view_offsets[key] = tuple(sorted(offsets))
+        return self._view_offsets[key]
+
+    def _visible_offset_set(self, facing):
+        """
+            Returns the offsets of ``view_cone_offsets`` as a (cached)
+            frozenset, for testing single positions.
+        """
+        key = (facing, self.view_radius, self.size)
+        if key not in self._visible_offsets:
+            self._visible_offsets[key] = frozenset(self.view_cone_offsets(facing))
+        return self._visible_offsets[key]
 
-        # vector transformation: turn vector 270 degrees
-        x2 = -y1
-        y2 = x1
+    def is_passable_relative(self, forward, right):
+        """
+            Checks whether a single tile relative to the agent is visible and
+            passable, without computing the whole view cone. Like
+            ``get_view_cone`` the time this takes counts towards env_time.
 
-        return (x2, y2)
+            Parameters
+            ----------
+            forward: int
+                The number of tiles in the direction the agent is facing
+                (negative values are behind the agent).
+            right: int
+                The number of tiles to the right of the agent (negative
+                values are to its left).
 
-    def _transform_facing_left(self):
-        x1 = self.facing_direction[0]
-        y1 = self.facing_direction[1]
+            Returns
+            -------
+                bool
+                True if the tile is within the view cone and passable,
+                False otherwise.
+        """
+        time_start = time.time_ns()
 
-        self.facing_direction = self._rotate_vector_left((x1, y1))
+        offset = directions.to_absolute(self.heading, forward, right)
+        tile = None
+        if offset in self._visible_offset_set(self.facing_direction):
+            tile = self.tiles.get((self.agent_pos[0] + offset[0], self.agent_pos[1] + offset[1]))
+        passable = tile is not None and tile.passable
 
-    def _transform_facing_right(self):
-        x1 = self.facing_direction[0]
-        y1 = self.facing_direction[1]
+        self.env_time += (time.time_ns() -
+                          time_start)
+        return passable
 
-        self.facing_direction = self._rotate_vector_right((x1, y1))
+    def local_patch(self, k):
+        """
+            Computes the visible surroundings of the agent up to k tiles away
+            in each direction, without computing the whole view cone. Like
+            ``get_view_cone`` the time this takes counts towards env_time.
 
-    def get_view_cone(self, playback=False,relative=False):
+            Parameters
+            ----------
+            k: int
+                The number of tiles around the agent included in the patch.
 
+            Returns
+            -------
+                numpy.ndarray
+                An int8 array of shape (2k + 1, 2k + 1) oriented like
+                ``get_view_cone(relative=True)``, i.e. the agent is at
+                [k, k] and faces towards [0, k]. Each cell is PATCH_FREE,
+                PATCH_WALL or PATCH_UNSEEN (outside of the view cone or of
+                the environment).
+        """
         time_start = time.time_ns()
 
+        patch = np.full((2 * k + 1, 2 * k + 1), PATCH_UNSEEN, dtype=np.int8)
+        x, y = self.agent_pos
+        visible = self._visible_offset_set(self.facing_direction)
+        # only the offsets within the patch are checked, see to_absolute
+        fi, fj, ri, rj = directions.FRAMES[self.heading]
+        for forward in range(-k, k + 1):
+            for right in range(-k, k + 1):
+                di, dj = forward * fi + right * ri, forward * fj + right * rj
+                if (di, dj) in visible:
+                    tile = self.tiles.get((x + di, y + dj))
+                    if tile is not None:
+                        patch[k - forward, k + right] = PATCH_FREE if tile.passable else PATCH_WALL
+
+        self.env_time += (time.time_ns() -
+                          time_start)
+        return patch
 
-        if self.facing_direction == NORTH:
-            viewcone = self._handle_octant(self.agent_pos, 5, self.view_radius, True) + self._handle_octant(self.agent_pos, 6,
-                                                                                                            self.view_radius, True)
-        elif self.facing_direction == SOUTH:
-            viewcone = self._handle_octant(self.agent_pos, 1, self.view_radius, True) + self._handle_octant(self.agent_pos, 2,
-                                                                                                            self.view_radius, True)
-        elif self.facing_direction == EAST:
-            viewcone = self._handle_octant(self.agent_pos, 0, self.view_radius, True) + self._handle_octant(self.agent_pos, 7,
-                                                                                                            self.view_radius, True)
-        elif self.facing_direction == WEST:
-            viewcone = self._handle_octant(self.agent_pos, 3, self.view_radius, True) + self._handle_octant(self.agent_pos, 4,
-                                                                                                            self.view_radius, True)
-        else:
-            raise EnvironmentError()
-
-        viewcone = list(set(viewcone))
-        viewcone = [key for key in viewcone if key in self.tiles.keys()]
-
-        res = []
-        for i in range(self.size[0]):
-            tmp = []
-            for j in range(self.size[1]):
-                if (i, j) in viewcone:
-                    self.tiles[(i, j)].target_visible = True
-                    tmp.append(self.tiles[(i, j)])
-                else:
-                    # see what agent sees
-                    # tmp.append(Tile.invisible())
-                    # see everything
-                    self.tiles[(i, j)].target_visible = False
-                    tmp.append(self.tiles[(i, j)])
-            res.append(tmp)
+    def get_view_cone(self, playback=False,relative=False):
+        """
+            Determines the tiles the agent currently sees.
 
+            Parameters
+            ----------
+            playback: bool, optional (Default: False)
+                If true, the visibility of the targets is updated and a
+                TileGrid of the whole environment is returned for
+                rendering, not only what the agent sees.
+            relative: bool, optional (Default: False)
+                If true, the tiles are keyed by their offset relative to
+                the agent as if it was facing north.
 
+            Returns
+            -------
+                dict, TileGrid
+                The visible tiles keyed by their positions (or offsets),
+                or the TileGrid in playback mode.
+        """
+
+        time_start = time.time_ns()
 
+        x, y = self.agent_pos
+        offsets = self.view_cone_offsets(self.facing_direction)
 
         if relative:
+            # rotate the offsets so that the agent faces "North" in the
+            # projection, i.e. the tiles are keyed by (-forward, right)
+            fi, fj, ri, rj = directions.FRAMES[self.heading]
+            ret_dict = {(-(i * fi + j * fj), i * ri + j * rj): self.tiles[(x + i, y + j)]
+                        for i, j in offsets if (x + i, y + j) in self.tiles}
 
-            agent_position = np.array(self.agent_pos)
-            ## Setup Matrix to rotate given tiles depending on facing
-            rot_mat = np.array([[1,0],[0,1]])
-
-            if self.facing_direction == EAST:
-                #If facing east, we need to rotate the vectors by 90 degrees counterclockwise to make the tiles face "North" in the projection
-                rot_mat = np.array([[0,-1],[1,0]])
-            
-            if self.facing_direction == SOUTH:
-                #If facing east, we need to rotate the vectors by 180 degrees counterclockwise to make the tiles face "North" in the projection (or 
-                # mirror the vector)
-                rot_mat = np.array([[-1,0],[0,-1]])
-            
-            if self.facing_direction == WEST:
-                #If facing West, we need to rotate the vectors by 270 degrees counterclockwise to make the tiles face "North" in the projection
-                rot_mat = np.array([[0,1],[-1,0]])
-            
-            #function to rotate the vector correctly
-            align_vector = lambda v: tuple(np.matmul(rot_mat,(np.array(v)-agent_position)))
-            
-            ret_dict= {align_vector(tile): self.tiles[tile] for tile in viewcone}
-
-
-
-            
             self.env_time += (time.time_ns() -
                           time_start)
 
             return ret_dict
 
-        
+        viewcone = [(x + i, y + j) for i, j in offsets]
+        viewcone = [key for key in viewcone if key in self.tiles]
+
         if not playback:
             ret_dict={tile: self.tiles[tile] for tile in viewcone}
 
@@ -588,7 +942,15 @@ class GridEnvironment(object):
 
             return ret_dict
         else:
-            return res
+            # only the appearance of targets depends on their visibility
+            if self.targets:
+                viewcone = set(viewcone)
+                for pos in self.targets:
+                    visible = pos in viewcone
+                    if self.tiles[pos].target_visible != visible:
+                        self._own_tile(pos).target_visible = visible
+            # see everything, not only what the agent sees
+            return TileGrid(self)
 
     def _handle_octant(self, agent_pos, octant, radius, glassmaze):
         r"""
@@ -813,6 +1175,11 @@ class GridEnvironment(object):
                 be found, otherwise None
         """
 
+        if tiles is None and goal == self.target and self.target_distance is not None:
+            # Use the precomputed distance field
+            dist = int(self.target_distance[start])
+            return dist if dist >= 0 else None
+
         if tiles is None:
             tiles = dict(self.tiles)
 
@@ -917,7 +1284,7 @@ class GridEnvironment(object):
         """
 
         self.agent_pos = self.initial_agent_pos
-        if self.initial_facing is not None and isinstance(self.initial_facing, tuple) and len(self.initial_facing) == 2:
+        if _is_direction(self.initial_facing):
             self.facing_direction = self.initial_facing
         else:
             self.facing_direction = NORTH
@@ -930,6 +1297,154 @@ class GridEnvironment(object):
         self.positions = [self.initial_agent_pos]
         self.last_time_stamp = None
         self.env_time = 0
+        self.termination_reason = None
+        self._start_time = None
+        self._seen_states = {}
+
+    def __getstate__(self):
+        """
+            Creates a compact representation of the environment for pickling.
+            Instead of all Tile objects only the environment string is
+            stored, the trajectories are stored as numpy arrays and caches
+            are dropped.
+        """
+        state = dict(self.__dict__)
+        del state["tiles"]
+        del state["_shared_tiles"]
+        del state["_owned_tiles"]
+        del state["_tile_changes"]
+        state["_path"] = {}
+        state["_view_offsets"] = {}
+        state["_visible_offsets"] = {}
+        if self.target_distance is not None:
+            # might be a view on shared memory
+            state["target_distance"] = np.array(self.target_distance)
+        for key, dtype in TRAJECTORIES.items():
+            state[key] = np.array(state[key], dtype=dtype)
+        return state
+
+    def __setstate__(self, state):
+        """
+            Restores the environment from the representation created by
+            ``__getstate__``. The tiles of the same environment string are
+            only created once per process and shared between all
+            environments, see ``clone``. The targets are specified again
+            afterwards.
+        """
+        if "facing_direction" in state:
+            # pickled before the heading was introduced
+            state["heading"] = directions.to_heading(state.pop("facing_direction"))
+        for key in TRAJECTORIES:
+            values = state[key].tolist()
+            state[key] = [tuple(v) for v in values] if key == "positions" else values
+        targets = state.pop("targets", {})
+        self.__dict__.update(state)
+        self.tiles, self.size = _parse_tiles(self.env_string)
+        self._shared_tiles = True
+        self._owned_tiles = set()
+        self.tile_version = state.get("tile_version", 0)
+        self._replaced_tiles()
+        self.targets = {}
+        self.initialize_targets(targets)
+
+    def clone(self):
+        """
+            Creates a copy of this environment, e.g. for looking ahead
+            during an episode. The tiles are shared with the original
+            environment until either of them changes a tile (see
+            ``_own_tile``), so cloning does not depend on the size of the
+            environment. Only the state of the current episode is copied.
+            The clone does not log its actions.
+
+            Returns
+            -------
+                GridEnvironment
+                The new environment.
+        """
+        # copy.copy would use __getstate__
+        res = object.__new__(type(self))
+        res.__dict__.update(self.__dict__)
+        for key in TRAJECTORIES:
+            setattr(res, key, list(getattr(self, key)))
+        res._seen_states = dict(self._seen_states)
+        res._path = {}
+        res.log_path = None
+        res.targets = dict(self.targets)
+        res._tile_changes = dict(self._tile_changes)
+        self._shared_tiles = res._shared_tiles = True
+        res._owned_tiles = set()
+        return res
+
+    def snapshot(self):
+        """
+            Saves the state of the current episode, so that it can be
+            restored later on using ``restore``. As the trajectories only grow
+            during an episode, only their lengths are stored.
+
+            Returns
+            -------
+                dict
+                The state of the episode.
+        """
+        return {"agent_pos": self.agent_pos,
+                "heading": self.heading,
+                "lengths": {key: len(getattr(self, key)) for key in TRAJECTORIES},
+                "last_time_stamp": self.last_time_stamp,
+                "env_time": self.env_time,
+                "termination_reason": self.termination_reason,
+                "seen_states": dict(self._seen_states)}
+
+    def restore(self, snapshot):
+        """
+            Restores the state of the episode saved by ``snapshot``. The
+            snapshot has to be taken during the current episode, i.e. after
+            the last call of ``reset``. Actions that were logged in between
+            can not be undone, so logging should be disabled when using
+            this for looking ahead.
+
+            Parameters
+            ----------
+            snapshot: dict
+                The state as returned by ``snapshot``.
+        """
+        self.agent_pos = snapshot["agent_pos"]
+        self.heading = snapshot["heading"]
+        for key, length in snapshot["lengths"].items():
+            del getattr(self, key)[length:]
+        self.last_time_stamp = snapshot["last_time_stamp"]
+        self.env_time = snapshot["env_time"]
+        self.termination_reason = snapshot["termination_reason"]
+        self._seen_states = dict(snapshot["seen_states"])
+
+
+def _is_direction(facing):
+    """
+        Checks whether the given facing direction is a heading or a
+        direction vector, see ``cogmodel.directions``.
+    """
+    if isinstance(facing, (int, np.integer)):
+        return not isinstance(facing, bool) and 0 <= facing < 4
+    return isinstance(facing, tuple) and facing in directions.INDEX
+
+
+@lru_cache(maxsize=8)
+def _parse_tiles(env_string):
+    """
+        Parses the given environment string once per process for unpickling
+        environments, see ``GridEnvironment.__setstate__``.
+
+        Returns
+        -------
+        tiles: dict
+            The tiles of the environment.
+        size: tuple
+            The size of the environment.
+    """
+    if env_string is None:
+        return {}, (None, None)
+    env = GridEnvironment(target=None, initial_agent_pos=None, view_radius=None,
+                          name=None, env_string=env_string)
+    return env.tiles, env.size
 
 
 if __name__ == "__main__":
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module providing a streaming loader for labyrinth collection files as they
+are used by the pipeline (see the files in ``cogmodel/Labyrinths``).
+
+Instead of constructing a GridEnvironment for every labyrinth in a file at
+once, the labyrinths are yielded lazily as light-weight specifications
+(plain dictionaries), so that environments can be created just in time and
+released once they are no longer needed. An optional index file allows
+random access to single labyrinths by their name without parsing the whole
+collection.
+"""
+
+import os
+import json
+
+from .gridEnvironment import GridEnvironment
+from .parsing import LABYRINTH_SECTIONS, ParseError, parse_tuple
+
+SECTION_HEADERS = tuple(section + ":" for section in LABYRINTH_SECTIONS)
+
+INDEX_SUFFIX = ".idx"
+
+
+def iter_labyrinths(path, offset=0):
+    """
+        Generator reading the labyrinth file at the given path and yielding
+        one labyrinth specification at a time.
+
+        Parameters
+        ----------
+        path: str
+            The path to the labyrinth file.
+        offset: int, optional (Default: 0)
+            The byte offset at which to start reading. Should point to an
+            ``EnvString:`` line, e.g. as stored in the index file.
+
+        Returns
+        -------
+            generator
+            A generator yielding dictionaries containing the keys
+            "env_string", "goal", "start", "facing", "name" and "offset",
+            the latter being the byte offset of the labyrinth within the file.
+    """
+    with open(path, "rb") as file:
+        file.seek(offset)
+        read_point = 0
+        spec_offset = offset
+        pos = offset
+        env_rows = []
+        spec = {}
+        for number, raw_line in enumerate(file, 1):
+            line_offset = pos
+            pos += len(raw_line)
+            line = raw_line.decode("utf-8").rstrip("\r\n")
+            if line in SECTION_HEADERS:
+                if read_point == 0:
+                    spec_offset = line_offset
+                read_point += 1
+                continue
+            match read_point:
+                case 0:
+                    continue
+                case 1:
+                    env_rows.append(line)
+                case 2 | 3 | 4:
+                    key = ("goal", "start", "facing")[read_point - 2]
+                    try:
+                        spec[key] = parse_tuple(line)
+                    except ValueError as e:
+                        raise ParseError("Invalid {}: {}".format(key, e), path,
+                                         None if offset else number)
+                case 5:
+                    spec["env_string"] = "\n".join(env_rows).strip()
+                    spec["name"] = line.strip()
+                    spec["offset"] = spec_offset
+                    yield spec
+                    read_point = 0
+                    env_rows = []
+                    spec = {}
+                case _:
+                    raise ParseError("Something went wrong while trying to "
+                                     "read the labyrinth file.", path,
+                                     None if offset else number)
+
+
+def build_index(path, index_path=None):
+    """
+        Creates an index file for the given labyrinth file, mapping the
+        names of all contained labyrinths to their byte offsets.
+
+        Parameters
+        ----------
+        path: str
+            The path to the labyrinth file.
+        index_path: str, optional (Default: None)
+            Where to store the index. Defaults to the labyrinth path with
+            an additional ``.idx`` suffix.
+
+        Returns
+        -------
+            dict
+            The dictionary mapping labyrinth names to offsets.
+    """
+    if index_path is None:
+        index_path = path + INDEX_SUFFIX
+    offsets = {spec["name"]: spec["offset"] for spec in iter_labyrinths(path)}
+    stat = os.stat(path)
+    with open(index_path, "w") as f:
+        json.dump({"size": stat.st_size, "mtime": stat.st_mtime,
+                   "offsets": offsets}, f)
+    return offsets
+
+
+def load_index(path, index_path=None):
+    """
+        Loads the index of the given labyrinth file. The index will be
+        (re)built if it does not exist yet or if the labyrinth file was
+        changed after the index was created.
+
+        Parameters
+        ----------
+        path: str
+            The path to the labyrinth file.
+        index_path: str, optional (Default: None)
+            The path of the index file. Defaults to the labyrinth path with
+            an additional ``.idx`` suffix.
+
+        Returns
+        -------
+            dict
+            The dictionary mapping labyrinth names to offsets.
+    """
+    if index_path is None:
+        index_path = path + INDEX_SUFFIX
+    stat = os.stat(path)
+    try:
+        with open(index_path, "r") as f:
+            index = json.load(f)
+        if index["size"] == stat.st_size and index["mtime"] == stat.st_mtime:
+            return index["offsets"]
+    except (IOError, ValueError, KeyError):
+        pass
+    return build_index(path, index_path)
+
+
+def load_labyrinth(path, name, index_path=None):
+    """
+        Reads a single labyrinth specification by its name using the index
+        of the labyrinth file.
+
+        Parameters
+        ----------
+        path: str
+            The path to the labyrinth file.
+        name: str
+            The name of the labyrinth to load.
+        index_path: str, optional (Default: None)
+            The path of the index file, see ``load_index``.
+
+        Returns
+        -------
+            dict
+            The labyrinth specification as yielded by ``iter_labyrinths``.
+    """
+    offsets = load_index(path, index_path)
+    if name not in offsets:
+        raise KeyError("Labyrinth {} could not be found in {}.".format(name,
+                                                                       path))
+    return next(iter_labyrinths(path, offset=offsets[name]))
+
+
+def create_environment(spec, view_radius):
+    """
+        Constructs the GridEnvironment for the given labyrinth specification.
+
+        Parameters
+        ----------
+        spec: dict
+            A labyrinth specification as yielded by ``iter_labyrinths``.
+        view_radius: int
+            The view radius of the agent within the environment.
+
+        Returns
+        -------
+            GridEnvironment
+            The newly created environment.
+    """
+    return GridEnvironment(target=spec["goal"], initial_agent_pos=spec["start"],
+                           view_radius=view_radius, name=spec["name"],
+                           env_string=spec["env_string"], facing=spec["facing"])
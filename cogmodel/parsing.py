@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module providing the parsing shared by all text files of the package:
+labyrinth files (see ``cogmodel/Labyrinths``), the log files written by the
+pipeline and the recordings of the participants (``condMap*`` files).
+
+All of them consist of sections, which start with a header line like
+``Goal:`` and whose value is given either on the same line or on the
+following lines. ``tokenize`` splits such files into their sections line by
+line, while the ``parse_*`` functions convert the values. Coordinates and
+the long numeric lists of the log files are parsed directly with numpy
+instead of ``ast.literal_eval``, which is orders of magnitude faster for
+large logs.
+
+Errors are reported as ``ParseError`` containing the path and line number
+of the offending line.
+"""
+
+import warnings
+from ast import literal_eval
+from collections import namedtuple
+
+import numpy as np
+
+# Sections of the labyrinth files. Older files use "Start" instead of
+# "StartPosition".
+LABYRINTH_SECTIONS = ("EnvString", "Goal", "Start", "StartPosition", "Facing", "Name")
+
+# Sections of the log files written by the pipeline, see
+# ``GridEnvironment.set_logging``
+LOG_SECTIONS = ("EnvString", "Goal", "StartPosition", "Facing", "Name", "AgentType",
+                "Seed", "Position", "Time", "Load", "Length", "Action", "Termination")
+
+# Sections of the participant recordings
+PARTICIPANT_SECTIONS = ("ConditionID", "EnvString", "AlwaysVisibles", "ViewRadius",
+                        "TargetRadius", "Targets", "Goal", "StartPosition")
+
+# Pseudo section containing the timestamped actions of a log or recording
+ACTIONS = "Actions"
+
+# A single (non empty) line of a file together with the section it belongs to
+Token = namedtuple("Token", ["section", "text", "line"])
+
+
+class ParseError(ValueError):
+    """
+        Raised when a file could not be parsed.
+
+        Parameters
+        ----------
+        message: str
+            Description of the problem.
+        path: str, optional (Default: None)
+            The path of the file.
+        line: int, optional (Default: None)
+            The (1 based) number of the offending line.
+    """
+
+    def __init__(self, message, path=None, line=None):
+        self.path = path
+        self.line = line
+        location = "" if path is None else path
+        if line is not None:
+            location += ":{}".format(line) if location else "line {}".format(line)
+        super().__init__(location + ": " + message if location else message)
+
+
+def tokenize(lines, headers, actions=False, start=1):
+    """
+        Generator splitting the lines of a file into their sections.
+
+        A line consisting of one of the headers followed by a colon starts
+        a new section. If the header is followed by a value on the same
+        line (e.g. ``Goal: (9, 7)``), the value is yielded as the first
+        token of that section. Empty lines are skipped.
+
+        Parameters
+        ----------
+        lines: iterable
+            The lines of the file, e.g. an opened file.
+        headers: iterable
+            The names of the sections, without the colon.
+        actions: bool, optional (Default: False)
+            If true, the first empty line ends the header of the file and
+            all following lines until a ``Condition finished`` line are
+            yielded within the ACTIONS section (as in log files and
+            participant recordings).
+        start: int, optional (Default: 1)
+            The number of the first line.
+
+        Returns
+        -------
+            generator
+            A generator yielding a Token for each non empty line, whose
+            text does not contain the line break. Lines before the first
+            header have the section None.
+    """
+    headers = set(headers)
+    section = None
+    header_done = not actions
+    for number, line in enumerate(lines, start):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            if not header_done:
+                header_done = True
+                section = ACTIONS
+            continue
+        if section == ACTIONS:
+            yield Token(section, line, number)
+            if "condition finished" in line.lower():
+                section = None
+            continue
+        key, colon, value = line.partition(":")
+        if colon and key in headers:
+            section = key
+            value = value.strip()
+            if value:
+                yield Token(section, value, number)
+        else:
+            yield Token(section, line, number)
+
+
+def split_action(text):
+    """
+        Splits a timestamped line of a log or recording, e.g.
+        ``2022-06-20 10:04:02.451869: TURN RIGHT``.
+
+        Parameters
+        ----------
+        text: str
+            The line.
+
+        Returns
+        -------
+        timestamp: str
+            The timestamp of the line.
+        action: str
+            The text following the timestamp.
+    """
+    split = text.find(": ")
+    if split < 0:
+        raise ValueError("Missing timestamp in {!r}".format(text))
+    return text[:split], text[split + 2:].strip()
+
+
+def parse_tuple(text):
+    """
+        Parses a tuple of integers, e.g. ``(9, 7)``.
+
+        Parameters
+        ----------
+        text: str
+            The text to parse.
+
+        Returns
+        -------
+            tuple
+            The parsed tuple of integers.
+    """
+    text = text.strip()
+    if not (text.startswith("(") and text.endswith(")")):
+        raise ValueError("Expected a tuple, got {!r}".format(text))
+    inner = text[1:-1].strip().rstrip(",")
+    if not inner:
+        return ()
+    return tuple(int(value) for value in inner.split(","))
+
+
+def _parse_array(inner, dtype, count):
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    # numpy warns (and will raise in the future) if the text does not
+    # consist of numbers only
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            values = np.fromstring(inner, dtype=dtype, sep=",")
+        except DeprecationWarning as e:
+            raise ValueError(str(e))
+    if len(values) != count:
+        raise ValueError("Could not parse all {} values".format(count))
+    return values
+
+
+def _list_content(text):
+    text = text.strip()
+    if not (text.startswith("[") and text.endswith("]")):
+        raise ValueError("Expected a list, got {!r}".format(text[:50]))
+    return text[1:-1]
+
+
+def parse_array(text, dtype=np.int64):
+    """
+        Parses a list of numbers, e.g. ``[0, 12368, 26070]``.
+
+        Parameters
+        ----------
+        text: str
+            The text to parse.
+        dtype: numpy.dtype, optional (Default: numpy.int64)
+            The type of the numbers.
+
+        Returns
+        -------
+            numpy.ndarray
+            The parsed numbers.
+    """
+    inner = _list_content(text)
+    return _parse_array(inner, dtype, inner.count(",") + 1 if inner.strip() else 0)
+
+
+def parse_positions(text, dtype=np.int64):
+    """
+        Parses a list of coordinate tuples, e.g. ``[(1, 2), (1, 1)]``.
+
+        Parameters
+        ----------
+        text: str
+            The text to parse.
+        dtype: numpy.dtype, optional (Default: numpy.int64)
+            The type of the coordinates.
+
+        Returns
+        -------
+            numpy.ndarray
+            Array of shape (n, 2) containing the parsed positions.
+    """
+    inner = _list_content(text)
+    tuples = inner.count("(")
+    if tuples != inner.count(")"):
+        raise ValueError("Unbalanced parentheses")
+    values = _parse_array(inner.replace("(", " ").replace(")", " "), dtype,
+                          inner.count(",") + 1 if tuples else 0)
+    if len(values) != 2 * tuples:
+        raise ValueError("Expected {} coordinate pairs".format(tuples))
+    return values.reshape(-1, 2)
+
+
+def parse_literal(text):
+    """
+        Parses any python literal, e.g. the dictionaries contained in the
+        participant recordings. Slow, use the dedicated parsers if possible.
+
+        Parameters
+        ----------
+        text: str
+            The text to parse.
+
+        Returns
+        -------
+            object
+            The parsed value.
+    """
+    try:
+        return literal_eval(text.strip())
+    except SyntaxError as e:
+        raise ValueError(str(e))
+
+
+def parse_token(parser, token, path=None, *args):
+    """
+        Parses the text of a token, reporting errors as ParseError.
+
+        Parameters
+        ----------
+        parser: callable
+            One of the parse functions of this module.
+        token: Token
+            The token to parse.
+        path: str, optional (Default: None)
+            The path of the file, used for error messages.
+        *args
+            Further arguments to the parser.
+
+        Returns
+        -------
+            object
+            The value returned by the parser.
+    """
+    try:
+        return parser(token.text, *args)
+    except ValueError as e:
+        raise ParseError("Could not parse {} section: {}".format(token.section, e),
+                         path, token.line) from e
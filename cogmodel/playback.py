@@ -7,15 +7,22 @@ Created on Tue Aug 1 15:36:04 2017
 @author: jpoeppel
 """
 
-import datetime
 import time
 import os
+import hashlib
+import pickle
 import threading
-from ast import literal_eval
+import queue
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
+
+from .parsing import PARTICIPANT_SECTIONS, ACTIONS, tokenize, parse_token, parse_tuple, \
+    parse_literal, split_action
+from . import directions
 from .gridEnvironment import GridEnvironment
 from .gridEnvironment import NORTH, SOUTH, EAST, WEST, TURN_RIGHT, TURN_LEFT
-from .gridEnvironment import ACTION_MAPPING
+from .gridEnvironment import ACTION_MAPPING, ACTION_NAMES, TERMINATION_TARGET
 
 CONDITION_PATH = os.path.abspath(
     os.path.dirname(__file__)) + os.path.sep + "Conditions"
@@ -23,20 +30,89 @@ CONDITION_PATH = os.path.abspath(
 # Global memory to speed up parsing for subsequent occurrences of the same
 # condition.
 env_store = {}
-
-def crawl_results(path, use_caching=False):
+# Unused environment of each condition, which is cloned for new experiments,
+# as creating the environment from scratch is much slower
+_templates = {}
+
+# Actions which can be recorded, identified by their index (the action code)
+ACTION_CODES = (NORTH, SOUTH, WEST, EAST, TURN_LEFT, TURN_RIGHT)
+# Codes of the recorded lines not corresponding to an action of ACTION_CODES
+CODE_NONE = -1  # e.g. "Interaction", which does not change the state
+CODE_START = -2
+CODE_FINISH = -3
+
+# Directory of the files caching the parsed recordings of each crawled
+# folder, which is kept outside of the (tracked) data
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+                         "cogmodel")
+# Has to be increased whenever the content of the records changes
+CACHE_VERSION = 3
+
+# Number of actions between two keyframes of a PlaybackAgent, see
+# ``PlaybackAgent.build_keyframes``
+KEYFRAME_INTERVAL = 128
+# Default frame rate and number of buffered states of
+# ``PlaybackAgent.replay_async``
+FRAME_RATE = 30
+QUEUE_SIZE = 4096
+
+
+def _default_cache_path(path):
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, "crawl_{}.pickle".format(digest))
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            cache = pickle.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache["records"]
+    except (IOError, EOFError, pickle.UnpicklingError, AttributeError, KeyError,
+            ImportError, ValueError):
+        # e.g. written by an incompatible version of the code
+        pass
+    return {}
+
+
+def _save_cache(cache_path, records):
+    # write to a temporary file first, so that concurrent sessions never
+    # read a partially written cache
+    tmp_path = "{}.{}".format(cache_path, os.getpid())
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": CACHE_VERSION, "records": records}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+
+def crawl_results(path, use_caching=False, workers=None, cache=True,
+                  cache_path=None):
     """
         Collects and reads in all the recorded participant behaviour at the 
         given root path.
 
+        The recordings are parsed in parallel (see ``read_recording``) and
+        the parsed records are stored in a cache file, so that subsequent
+        calls only need to parse recordings which were added or changed
+        (detected by their modification time and size) since.
+
         Parameters
         ----------
         path: str
             The root path where to find the participant recordings.
-        use_caching: bool (default= True)
+        use_caching: bool (default= False)
             If true, will reuse already loaded environments, which may already
             include precomputed distances, greatly speeding up later calls,
             but might invalidate timing analysis.
+        workers: int, optional (Default: None)
+            The number of processes used to parse the recordings. Defaults
+            to the number of CPUs, 1 parses them in this process.
+        cache: bool, optional (Default: True)
+            Whether to use the cache of parsed recordings.
+        cache_path: str, optional (Default: None)
+            The path of the cache file. Defaults to a file within CACHE_DIR
+            specific to the root path.
 
         Returns
         -------
@@ -45,37 +121,170 @@ def crawl_results(path, use_caching=False):
             found under the given path of the condition specified by the key,
             each containing the information provided by load_experiment. 
     """
-    users = [e for e in os.listdir(path)
-             if os.path.isdir(path + os.path.sep + e)]
+    if cache_path is None:
+        cache_path = _default_cache_path(path)
+    files = []
+    for u in sorted(os.listdir(path)):
+        if os.path.isdir(os.path.join(path, u)):
+            files += [os.path.join(u, f) for f in sorted(os.listdir(os.path.join(path, u)))
+                      if "condMap" in f]
+
+    cached = _load_cache(cache_path) if cache else {}
+    records = {}
+    missing = []
+    for f in files:
+        stat = os.stat(os.path.join(path, f))
+        key = (stat.st_mtime_ns, stat.st_size)
+        if f in cached and cached[f][0] == key:
+            records[f] = cached[f]
+        else:
+            missing.append((f, key))
+
+    paths = [os.path.join(path, f) for f, _ in missing]
+    if workers == 1 or len(missing) < 2:
+        parsed = [_try_read_recording(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(_try_read_recording, paths, chunksize=16))
+    for (f, key), record in zip(missing, parsed):
+        records[f] = (key, record)
+    if cache and (missing or len(records) != len(cached)):
+        _save_cache(cache_path, records)
+
     conditions = {}
     skipped = []
     num_completed = 0
-    for u in users:
-        files = os.listdir(path + os.path.sep + u)
-        for f in files:
-            if "condMap" in f:
-                try:
-                    exp = load_experiment(path + os.path.sep + u + os.path.sep + f,
-                                          use_caching)
-                    if exp[0] is not None:
-                        conditions[f].append(exp)
-                        num_completed += 1
-                    else:
-                        skipped.append(u + os.path.sep + f)
-                except KeyError:
-                    conditions[f] = [load_experiment(path + os.path.sep
-                                                     + u + os.path.sep + f,
-                                                     use_caching)]
-                    num_completed += 1
-                except IndexError:
-                    # Ignore bad files
-                    pass
+    for f in files:
+        record = records[f][1]
+        if record is None:
+            # Ignore bad files
+            continue
+        if not record["complete"]:
+            skipped.append(f)
+            continue
+        exp = build_experiment(os.path.join(path, f), record, use_caching)
+        conditions.setdefault(os.path.basename(f), []).append(exp)
+        num_completed += 1
 
     print("Skipped: {} runs because they were incomplete.".format(len(skipped)))
     print("Total number of runs: {}".format(num_completed))
     return conditions
 
 
+def _try_read_recording(path):
+    try:
+        return read_recording(path)
+    except (ValueError, KeyError, IndexError):
+        return None
+
+
+def read_recording(path):
+    """
+        Parses a recording of a participant, without constructing the
+        environment and playback agent (see ``build_experiment``).
+
+        Parameters
+        ----------
+        path: str
+            The path for the recorded run.
+
+        Returns
+        -------
+            dict
+            A dictionary containing the "env_string", "start_pos",
+            "goal" (the position of the true goal), "targets", "view_radius",
+            "actions" (see ``parse_actions``), the "start" time of the
+            condition (or None) and whether the recording is "complete",
+            i.e. contains the end of the condition.
+    """
+    header = {}
+    env_rows = []
+    start = None
+    action_rows = []
+    with open(path, "r") as condition:
+        for token in tokenize(condition, PARTICIPANT_SECTIONS, actions=True):
+            if token.section == "EnvString":
+                env_rows.append(token.text)
+            elif token.section == ACTIONS:
+                action_rows.append(token.text)
+            elif token.section is not None:
+                header[token.section] = token
+            elif token.line == 1 and token.text.strip().endswith(":"):
+                # the first line contains the time the condition started
+                start = token.text.strip()[:-1]
+
+    goal = parse_token(parse_literal, header["Goal"], path)
+    # Determine possible goals. Required since C1 and C3 do not store all
+    # targets in their files:
+    condID = os.path.basename(os.path.normpath(path))
+    cond2ID = condID.split("_")[0] + "_C2_" + condID.split("_")[-1]
+
+    try:
+        # Loading all targets from condition file
+        with open(CONDITION_PATH + os.path.sep + cond2ID, "r") as condition2:
+            for token in tokenize(condition2, PARTICIPANT_SECTIONS):
+                if token.section == "Targets":
+                    targets = parse_token(parse_literal, token, cond2ID)
+                    break
+    except IOError:
+        # Use the targets specified in this file when the condition 2 file
+        # cannot be found, e.g. when this is a custom file
+        targets = parse_token(parse_literal, header["Targets"], path)
+
+    return {"env_string": "\n".join(env_rows).strip(),
+            "start_pos": parse_token(parse_tuple, header["StartPosition"], path),
+            "goal": goal["target"],
+            "targets": targets,
+            "view_radius": int(header["ViewRadius"].text) if "ViewRadius" in header else 0,
+            "actions": parse_actions(action_rows),
+            "start": None if start is None else np.datetime64(start, "us"),
+            "complete": "finished" in action_rows[-1].lower() if action_rows else False}
+
+
+def build_experiment(path, record, use_caching=True):
+    """
+        Constructs the environment and playback agent of a parsed recording.
+
+        Parameters
+        ----------
+        path: str
+            The path for the recorded run, used to identify the participant.
+        record: dict
+            The parsed recording as returned by ``read_recording``.
+        use_caching: bool (default= True)
+            If true, will reuse already loaded environments, see
+            ``load_experiment``.
+
+        Returns
+        -------
+            tuple
+            The information provided by load_experiment.
+    """
+    key = (record["env_string"], record["goal"], record["start_pos"])
+    if key not in _templates:
+        template = GridEnvironment(target=record["goal"],
+                                   initial_agent_pos=record["start_pos"],
+                                   view_radius=record["view_radius"],
+                                   name=os.path.basename(path),
+                                   env_string=record["env_string"])
+        if not record["view_radius"]:
+            # a view radius of 0 means the whole labyrinth was visible
+            template.view_radius = max(template.size)
+        _templates[key] = template
+    if not use_caching or key not in env_store:
+        env_store[key] = _templates[key].clone()
+    environment = env_store[key]
+
+    agent_id = os.path.basename(os.path.dirname(path))
+    playback_agent = PlaybackAgent(agent_id,
+                                   None,
+                                   start_pos=record["start_pos"],
+                                   environment=environment,
+                                   actions=record["actions"],
+                                   start_time=record["start"])
+    return environment, record["targets"], playback_agent, record["goal"]
+
+
 def load_experiment(path, use_caching=True):
     """
         Small function which reads in an experimental result and constructs
@@ -86,13 +295,14 @@ def load_experiment(path, use_caching=True):
         path: str
             The path for the recorded run.
         use_caching: bool (default= True)
-            If true, will reuse already loaded environments, which may already
-            include precomputed distances, greatly speeding up later calls,
-            but might invalidate timing analysis.
+            If true, will reuse already loaded environments of the same
+            labyrinth, goal and start position, which may already include
+            precomputed distances, greatly speeding up later calls, but might
+            invalidate timing analysis.
 
         Returns
         -------
-            environment: blockworld.Environment
+            environment: cogmodel.GridEnvironment
                 An environment object corresponding to the world of the 
                 experiment.
             targets: dict
@@ -105,54 +315,237 @@ def load_experiment(path, use_caching=True):
                 The position of the true goal for the recorded condition.
 
     """
-    with open(path, "r") as condition:
-        lines = condition.readlines()
-        condition_end = lines.index("\n")
+    return build_experiment(path, read_recording(path), use_caching)
 
-    for i, line in enumerate(lines[:condition_end]):
-        if "EnvString" in line:
-            start = i+1
-        if "Goal" in line:
-            end = i
-            break
 
-    env_string = "".join(lines[start:end]).strip()
-    if not use_caching or env_string not in env_store:
-        env_store[env_string] = GridEnvironment(env_string)
-    environment = env_store[env_string]
-    start_pos = literal_eval(lines[condition_end-1].split(":")[1].strip())
+def action_code(action):
+    """
+        Determines the code of a recorded action, see ACTION_CODES.
+
+        Parameters
+        ----------
+        action: str
+            The recorded action, e.g. "Key-Up", "TURN LEFT" or
+            "Condition starting".
 
-    # Fix orientation, old model counted top to bottom!
-    start_pos = (start_pos[0], start_pos[1])
+        Returns
+        -------
+            int
+            The index of the action in ACTION_CODES or one of CODE_START,
+            CODE_FINISH and CODE_NONE.
+    """
+    if "starting" in action:
+        return CODE_START
+    if "finished" in action.lower():
+        return CODE_FINISH
+    # participants used either the keyboard (e.g. "Key-Up") or the buttons
+    # on the screen (e.g. "Button-Up")
+    action = ACTION_MAPPING.get(action.split("-", 1)[-1])
+    return ACTION_CODES.index(action) if action is not None else CODE_NONE
 
-    agent_id = os.path.basename(os.path.dirname(path))
-    playback_agent = PlaybackAgent(agent_id,
-                                   lines[condition_end+1:],
-                                   start_pos=start_pos,
-                                   environment=environment)
 
-    goal = literal_eval(lines[condition_end-2].strip("Goal:").strip())
-    # Determine possible goals. Required since C1 and C3 do not store all
-    # targets in their files:
-    condID = os.path.basename(os.path.normpath(path))
-    cond2ID = condID.split("_")[0] + "_C2_" + condID.split("_")[-1]
+def parse_actions(action_rows):
+    """
+        Parses the recorded actions.
 
-    try:
-        # Loading all targets from condition file
-        with open(CONDITION_PATH + os.path.sep + cond2ID, "r") as condition2:
-            for line in condition2:
-                if "Targets:" in line:
-                    targets = literal_eval(line[line.find("{"):])
-                    break
-    except IOError:
-        # Use the targets specified in this file when the condition 2 file
-        # cannot be found, e.g. when this is a custom file
-        for line in lines:
-            if "Targets:" in line:
-                targets = literal_eval(line[line.find("{"):])
-                break
+        Parameters
+        ----------
+        action_rows: list(str)
+            The timestamped lines containing all the performed actions that
+            were recorded.
 
-    return environment, targets, playback_agent, goal["target"]
+        Returns
+        -------
+        timestamps: numpy.ndarray
+            The timestamps of the actions as datetime64[us].
+        codes: numpy.ndarray
+            The codes of the actions as int8, see ``action_code``.
+    """
+    timestamps = []
+    actions = []
+    for row in action_rows:
+        if row.strip():
+            timestamp, action = split_action(row)
+            timestamps.append(timestamp)
+            actions.append(action)
+    # numpy parses the timestamps much faster than datetime.strptime
+    timestamps = np.array(timestamps, dtype="datetime64[us]")
+    # only the few distinct actions need to be looked up
+    names, inverse = np.unique(np.array(actions, dtype=str), return_inverse=True)
+    codes = np.array([action_code(name) for name in names], dtype=np.int8)
+    return timestamps, codes[inverse].astype(np.int8)
+
+
+def replay_batch(experiments, view_cones=False):
+    """
+        Reconstructs the states of recorded runs without rendering or
+        waiting between the actions and without changing the environments
+        and agents of the runs. All runs are replayed at the same time,
+        performing one action of every run using numpy operations, so
+        replaying all runs of a condition takes about as long as replaying
+        its longest run.
+
+        The actions are replayed like ``PlaybackAgent.perform_action``
+        (using the same rules as ``GridEnvironment.perform_action``), until
+        the end of the condition is reached.
+
+        Parameters
+        ----------
+        experiments: list
+            The tuples of the runs as provided by ``load_experiment``, e.g.
+            the runs of one condition as returned by ``crawl_results``. All
+            runs have to take place in the same labyrinth.
+        view_cones: bool, optional (Default: False)
+            If true, the view cones of all states are computed as well.
+
+        Returns
+        -------
+            dict
+            A dictionary containing numpy arrays with one row per run:
+
+            * "positions": the position of the agent before the first and
+              after each action, of shape (runs, steps + 1, 2)
+            * "facings": the facing direction of the agent for the same
+              states, of shape (runs, steps + 1, 2)
+            * "codes": the replayed action codes, of shape (runs, steps),
+              see ``action_code``
+            * "timestamps": the timestamps of the actions (datetime64[us])
+            * "lengths": the number of replayed actions of each run
+
+            Runs shorter than the longest one are padded with CODE_NONE
+            actions (keeping the last state) and NaT timestamps. If
+            view_cones is true, "view_cones" contains the visible positions
+            in each state, of shape (runs, steps + 1, n, 2), in which the
+            positions which are not visible are -1.
+    """
+    env = experiments[0][0]
+    if any(exp[0].env_string != env.env_string for exp in experiments):
+        raise ValueError("All runs have to take place in the same labyrinth.")
+    passable = np.array([[env.tiles[i, j].passable for j in range(env.size[1])]
+                         for i in range(env.size[0])])
+    max_pos = np.array(passable.shape) - 1
+
+    agents = [exp[2] for exp in experiments]
+    runs = len(agents)
+    lengths = np.zeros(runs, dtype=np.int64)
+    for i, agent in enumerate(agents):
+        finished = np.flatnonzero(agent.action_codes == CODE_FINISH)
+        lengths[i] = finished[0] if len(finished) else len(agent.action_codes)
+    steps = int(lengths.max())
+    codes = np.full((runs, steps), CODE_NONE, dtype=np.int8)
+    timestamps = np.full((runs, steps), np.datetime64("NaT"), dtype="datetime64[us]")
+    for i, agent in enumerate(agents):
+        codes[i, :lengths[i]] = agent.action_codes[:lengths[i]]
+        timestamps[i, :lengths[i]] = agent.timestamps[:lengths[i]]
+
+    # movement of each code (shifted by 3 for the negative codes)
+    moves = np.zeros((len(ACTION_CODES) + 3, 2), dtype=np.int64)
+    for code, action in enumerate(ACTION_CODES):
+        if not isinstance(action[0], tuple):
+            moves[code + 3] = action
+    right = ACTION_CODES.index(TURN_RIGHT)
+    left = ACTION_CODES.index(TURN_LEFT)
+
+    pos = np.array([exp[0].initial_agent_pos for exp in experiments], dtype=np.int64)
+    # headings of the runs, see GridEnvironment.__init__ and cogmodel.directions
+    heading = np.array([directions.to_heading(exp[0].initial_facing or NORTH)
+                        for exp in experiments], dtype=np.int64)
+    turn_right = np.array(directions.RIGHT)
+    turn_left = np.array(directions.LEFT)
+    positions = np.empty((runs, steps + 1, 2), dtype=np.int32)
+    headings = np.empty((runs, steps + 1), dtype=np.int8)
+    positions[:, 0] = pos
+    headings[:, 0] = heading
+    for k in range(steps):
+        code = codes[:, k]
+        target = np.clip(pos + moves[code + 3], 0, max_pos)
+        pos = np.where(passable[target[:, 0], target[:, 1]][:, None], target, pos)
+        heading = np.where(code == right, turn_right[heading],
+                           np.where(code == left, turn_left[heading], heading))
+        positions[:, k + 1] = pos
+        headings[:, k + 1] = heading
+
+    result = {"positions": positions,
+              "facings": directions.VECTOR_ARRAY[headings].astype(np.int8),
+              "codes": codes, "timestamps": timestamps, "lengths": lengths}
+    if view_cones:
+        result["view_cones"] = _view_cones(env, positions, headings)
+    return result
+
+
+def recorded_trajectories(experiments):
+    """
+        Reconstructs the information of recorded runs in the same form as
+        it is read from the log files of the agents, so that the same
+        metrics can be computed for them (see ``evaluation.compute_metrics``).
+
+        Only actions changing the state of the agent (moves and turns) are
+        counted. The time of each action is the time since the previous
+        action (or the start of the condition). As there is no cognitive
+        load for participants, it is nan.
+
+        Parameters
+        ----------
+        experiments: list
+            The tuples of the runs as provided by ``load_experiment``, see
+            ``replay_batch``.
+
+        Returns
+        -------
+            list
+            A tuple for each run, containing the action_types, positions,
+            time, load, length, action_values, lab and termination as
+            returned by ``evaluation.read_logging``. The termination is
+            "target" if the run ended on the goal and "finished" otherwise.
+    """
+    batch = replay_batch(experiments)
+    names = np.array([ACTION_NAMES[action] for action in ACTION_CODES])
+    turns = np.array([isinstance(action[0], tuple) for action in ACTION_CODES])
+    lab = experiments[0][0].env_string.split("\n")
+    result = []
+    for i, exp in enumerate(experiments):
+        length = batch["lengths"][i]
+        codes = batch["codes"][i, :length]
+        timestamps = batch["timestamps"][i, :length]
+        steps = np.flatnonzero(codes >= 0)
+        positions = np.concatenate([batch["positions"][i, :1],
+                                    batch["positions"][i, 1:][steps]]).astype(np.int64)
+        start = exp[2].start_time
+        if start is None:
+            start = timestamps[steps[:1]]
+        time = np.diff(np.concatenate([np.atleast_1d(start), timestamps[steps]])
+                       ).astype("timedelta64[ns]").astype(np.int64)
+        moved = np.any(positions[1:] != positions[:-1], axis=1)
+        values = np.where(turns[codes[steps]], 0.6, 1.0)
+        result.append((names[codes[steps]].tolist(),
+                       positions,
+                       np.concatenate([[0], time]),
+                       np.full(len(steps), np.nan),
+                       np.concatenate([[0], np.cumsum(moved)]),
+                       np.concatenate([[0.0], np.cumsum(values)]),
+                       lab,
+                       TERMINATION_TARGET if tuple(positions[-1]) == exp[3] else "finished"))
+    return result
+
+
+def _view_cones(env, positions, headings):
+    """
+        Computes the view cones of the states reconstructed by
+        ``replay_batch``, see ``GridEnvironment.get_view_cone``.
+    """
+    offsets = [env.view_cone_offsets(heading) for heading in range(len(directions.VECTORS))]
+    # view cone offsets of each heading
+    table = np.zeros((len(offsets), max(len(o) for o in offsets), 2), dtype=np.int32)
+    valid = np.zeros(table.shape[:2], dtype=bool)
+    for i, heading_offsets in enumerate(offsets):
+        table[i, :len(heading_offsets)] = heading_offsets
+        valid[i, :len(heading_offsets)] = True
+
+    cones = positions[:, :, None, :] + table[headings]
+    visible = valid[headings] & np.all(cones >= 0, axis=-1) & \
+        np.all(cones < np.array(env.size), axis=-1)
+    cones[~visible] = -1
+    return cones.astype(np.int16)
 
 
 class PlaybackAgent(object):
@@ -172,31 +565,63 @@ class PlaybackAgent(object):
         environment: cogmodel.GridEnvironment
             A reference to the environment object corresponding to the world
             the actions were recorded in.
+        actions: tuple, optional (Default: None)
+            The already parsed timestamps and action codes (see
+            ``parse_actions``), in which case action_rows is ignored.
+        start_time: numpy.datetime64, optional (Default: None)
+            The time the condition was started, if it was recorded.
 
         Attributes
         ----------
         id: str/int
             The agent_id passed in as the first argument.
-        actions: list
-            A list of tuples for all the actions that have been recorded in the 
-            file. See ``_parse_actions`` for more information.
+        timestamps: numpy.ndarray
+            The timestamps (datetime64[us]) of all the actions that have
+            been recorded in the file.
+        action_codes: numpy.ndarray
+            The codes of all the actions that have been recorded in the
+            file. See ``action_code`` for more information.
+        start_time: numpy.datetime64
+            The passed start_time.
         environment: cogmodel.GridEnvironment
             The passed environment object.
         cur_idx: int
             A counter for the next action which should be replayed.
+        keyframes: dict
+            The states of the recording every few actions, see
+            ``build_keyframes``. None until they are built.
     """
 
-    def __init__(self, agent_id, action_rows, start_pos, environment):
+    def __init__(self, agent_id, action_rows, start_pos, environment, actions=None,
+                 start_time=None):
         self.id = agent_id
-        try:
-            self.actions = self._parse_actions(action_rows)
-        except IndexError:
-            raise IndexError(
-                "Error parsing actions of user: {}".format(agent_id))
+        if actions is None:
+            try:
+                actions = self._parse_actions(action_rows)
+            except ValueError:
+                raise IndexError(
+                    "Error parsing actions of user: {}".format(agent_id))
+        self.timestamps, self.action_codes = actions
+        self.start_time = start_time
         self.environment = environment
         self.cur_idx = 0
+        self.keyframes = None
         # self.environment.initialize_agent(start_pos)
 
+    @property
+    def actions(self):
+        """
+            A list of tuples containing the timestamp (as datetime) and the
+            name of each recorded action, e.g. "NORTH". Lines not
+            corresponding to an action are named "Condition starting",
+            "Condition finished" and "None".
+        """
+        names = {CODE_START: "Condition starting", CODE_FINISH: "Condition finished",
+                 CODE_NONE: "None"}
+        names.update((i, ACTION_NAMES[action]) for i, action in enumerate(ACTION_CODES))
+        return [(timestamp, names[code]) for timestamp, code in
+                zip(self.timestamps.tolist(), self.action_codes.tolist())]
+
     def _parse_actions(self, action_rows):
         """
             Private function to parse the action recordings.
@@ -209,18 +634,11 @@ class PlaybackAgent(object):
 
             Returns
             -------
-                list
-                A list of tuples containing, the timestamp of the action and
-                the action string.
+                tuple
+                The timestamps and codes of the actions, see
+                ``parse_actions``.
         """
-        res = []
-        date_split = action_rows[0].find(": ")-1
-        for row in action_rows:
-            if row != "":
-                res.append((datetime.datetime.strptime(row[:date_split],
-                                                       "%Y-%m-%d %H:%M:%S.%f"),
-                            row[date_split+3:].strip()))
-        return res
+        return parse_actions(action_rows)
 
     def perform_action(self, ignore_duds=False):
         """
@@ -238,25 +656,164 @@ class PlaybackAgent(object):
                 The new position after performing the action or none, if there
                 are no more actions in the recording.
         """
-        try:
-            action = self.actions[self.cur_idx]
-        except IndexError:
+        if self.cur_idx >= len(self.action_codes):
             print("Agent {} finished it's episode.".format(self.id))
             return None
 
-        if "starting" in action[1]:
+        code = self.action_codes[self.cur_idx]
+        if code == CODE_FINISH:
+            return None  # condition is finished
+        elif code < 0:
+            # start of the condition or e.g. "Interaction", which does not
+            # move the agent
             self.cur_idx += 1
             return self.environment.agent_pos
-        elif "finished" in action[1]:
-            return None  # condition is finished
         else:
-            action_string = action[1]
-            action = ACTION_MAPPING[action_string]
             new_pos = self.environment.perform_action(
-                action=action, agent=self)
+                action=ACTION_CODES[code], agent=self)
             self.cur_idx += 1
             return new_pos
 
+    def build_keyframes(self, interval=KEYFRAME_INTERVAL):
+        """
+            Builds an index of the states of the recording, storing the
+            position, facing direction, path length and step score of the
+            agent (see ``GridEnvironment.perform_action``) after every
+            interval actions. The states are computed using ``replay_batch``,
+            so neither the environment nor the agent are changed.
+
+            Parameters
+            ----------
+            interval: int, optional (Default: KEYFRAME_INTERVAL)
+                The number of actions between two keyframes.
+
+            Returns
+            -------
+                dict
+                The keyframes, also stored in the keyframes attribute:
+                "positions", "facings", "path_length" and "step_score"
+                contain the states after 0, interval, 2 * interval, ...
+                actions, "interval" the interval and "length" the number of
+                actions until the end of the condition.
+        """
+        batch = replay_batch([(self.environment, None, self, None)])
+        length = int(batch["lengths"][0])
+        codes = batch["codes"][0, :length]
+        positions = batch["positions"][0, :length + 1]
+        moved = np.any(positions[1:] != positions[:-1], axis=1)
+        turns = np.array([isinstance(action[0], tuple) for action in ACTION_CODES])
+        values = np.where(codes < 0, 0.0, np.where(turns[codes], 0.6, 1.0))
+        self.keyframes = {
+            "positions": positions[::interval],
+            "facings": batch["facings"][0, :length + 1:interval],
+            "path_length": np.concatenate([[0], np.cumsum(moved)])[::interval],
+            "step_score": np.concatenate([[0.0], np.cumsum(values)])[::interval],
+            "interval": interval,
+            "length": length}
+        return self.keyframes
+
+    def seek(self, step):
+        """
+            Jumps to the state after the given number of actions, e.g. to
+            start the replay in the middle of a long recording. The state
+            is restored from the closest preceding keyframe (building the
+            keyframes first if necessary), from which at most interval
+            actions are replayed without calling
+            ``GridEnvironment.perform_action``. The trajectories of the
+            environment (e.g. path_length) start anew at the restored state.
+
+            Parameters
+            ----------
+            step: int
+                The number of actions that should have been performed. Is
+                clipped to the length of the recording.
+
+            Returns
+            -------
+                tuple
+                The position of the agent after seeking.
+        """
+        if self.keyframes is None:
+            self.build_keyframes()
+        keyframes = self.keyframes
+        interval = keyframes["interval"]
+        step = min(max(int(step), 0), keyframes["length"])
+        k = step // interval
+        pos = tuple(keyframes["positions"][k].tolist())
+        heading = directions.to_heading(keyframes["facings"][k].tolist())
+        path_length = int(keyframes["path_length"][k])
+        step_score = float(keyframes["step_score"][k])
+
+        env = self.environment
+        # same rules as GridEnvironment.perform_action
+        for code in self.action_codes[k * interval:step].tolist():
+            if code < 0:
+                continue
+            action = ACTION_CODES[code]
+            if action == TURN_RIGHT:
+                heading = directions.RIGHT[heading]
+                step_score += 0.6
+            elif action == TURN_LEFT:
+                heading = directions.LEFT[heading]
+                step_score += 0.6
+            else:
+                step_score += 1
+                target = (pos[0] + action[0], pos[1] + action[1])
+                if target in env.tiles and env.tiles[target].passable:
+                    pos = target
+                    path_length += 1
+
+        env.agent_pos = pos
+        env.heading = heading
+        env.positions = [pos]
+        env.path_length = [path_length]
+        env.step_score = [step_score]
+        env.timestamps = [0]
+        env.memoryUsage = []
+        self.cur_idx = step
+        return pos
+
+    def step_back(self):
+        """
+            Undoes the last replayed action, see ``seek``.
+
+            Returns
+            -------
+                tuple
+                The position of the agent before the last action or None,
+                if no action has been replayed yet.
+        """
+        if self.cur_idx == 0:
+            return None
+        return self.seek(self.cur_idx - 1)
+
+    def step_at(self, offset):
+        """
+            Determines the number of actions performed within the given
+            time of the recording, independent of the speedup used when
+            replaying, e.g. for scrubbing through a recording using
+            ``seek(agent.step_at(offset))``.
+
+            Parameters
+            ----------
+            offset: float
+                The time since the start of the condition (or the first
+                recorded action) in seconds.
+
+            Returns
+            -------
+                int
+                The number of actions recorded up to this time.
+        """
+        if self.keyframes is None:
+            self.build_keyframes()
+        timestamps = self.timestamps[:self.keyframes["length"]]
+        if not len(timestamps):
+            return 0
+        start = self.start_time if self.start_time is not None else timestamps[0]
+        return int(np.searchsorted(timestamps, start + np.timedelta64(int(offset * 1e6), "us"),
+                                   side="right"))
+
     def replay(self, callback, speedup=1):
         """
             Function allowing to replay the interaction in (modified) real-time.
@@ -272,16 +829,116 @@ class PlaybackAgent(object):
                 A speedup factor. The time delta between two 
                 actions will be divided by this factor.
         """
-
+        # delay before each action in seconds
+        delays = np.diff(self.timestamps, prepend=self.timestamps[:1]).astype(np.int64) \
+            / (1e6 * speedup)
+        delays = delays.tolist()
         while True:
-            if self.cur_idx == len(self.actions):
+            if self.cur_idx == len(self.action_codes):
                 break
-            cur_timestamp = self.actions[self.cur_idx][0]
-            last_timestamp = self.actions[self.cur_idx -
-                                          1][0] if self.cur_idx > 0 else cur_timestamp
-            delta = (cur_timestamp - last_timestamp)/speedup
-            time.sleep(delta.total_seconds())
+            time.sleep(delays[self.cur_idx])
             new_pos = self.perform_action()
             if new_pos is None:
                 break
             callback(new_pos)
+
+    def replay_async(self, callback, speedup=1, fps=FRAME_RATE, queue_size=QUEUE_SIZE):
+        """
+            Replays the interaction in (modified) real-time like ``replay``,
+            but without the callback delaying the replay. A worker thread
+            advances the replay at the recorded times and pushes the states
+            of the agent (step, position and facing direction) into a
+            bounded queue. The calling thread takes the states from the
+            queue at a fixed frame rate and only calls the callback with
+            the newest one, dropping the intermediate frames if it falls
+            behind.
+
+            The states are reconstructed using ``replay_batch``, so the
+            environment is not changed while replaying and can be used by
+            the callback. Once the replay ends (also if the callback raises
+            an exception), the environment and the agent are set to the last
+            state passed to the callback using ``seek``.
+
+            Parameters
+            ---------
+            callback: callable
+                A function which will be called with the newest position,
+                the facing direction and the list of positions passed since
+                the last call (excluding the newest position), e.g. to be
+                added to the trajectory of a renderer.
+            speedup: float, optional (Default: 1)
+                A speedup factor. The time delta between two 
+                actions will be divided by this factor.
+            fps: float, optional (Default: FRAME_RATE)
+                The maximal number of calls of the callback per second.
+            queue_size: int, optional (Default: QUEUE_SIZE)
+                The maximal number of states waiting in the queue. The
+                worker thread waits if the queue is full.
+        """
+        batch = replay_batch([(self.environment, None, self, None)])
+        length = int(batch["lengths"][0])
+        first = self.cur_idx
+        if first >= length:
+            return
+        positions = [tuple(pos) for pos in batch["positions"][0].tolist()]
+        facings = [tuple(facing) for facing in batch["facings"][0].tolist()]
+        # time of each action relative to the first replayed one in seconds
+        offsets = ((self.timestamps[first:length] - self.timestamps[first]).astype(np.int64)
+                   / (1e6 * speedup)).tolist()
+
+        states = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+
+        def put(item):
+            # waits while the queue is full, unless the replay was stopped
+            while not stop.is_set():
+                try:
+                    states.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def simulate():
+            start = time.perf_counter()
+            for k, offset in zip(range(first + 1, length + 1), offsets):
+                if stop.wait(max(start + offset - time.perf_counter(), 0)):
+                    return
+                if not put((k, positions[k], facings[k])):
+                    return
+            # marks the end of the replay
+            put(None)
+
+        worker = threading.Thread(target=simulate, daemon=True)
+        worker.start()
+        try:
+            frame = 1 / fps
+            next_frame = time.perf_counter()
+            finished = False
+            while not finished:
+                next_frame += frame
+                now = time.perf_counter()
+                if next_frame > now:
+                    time.sleep(next_frame - now)
+                else:
+                    # the callback is too slow for the frame rate
+                    next_frame = now
+                passed = []
+                latest = None
+                while True:
+                    try:
+                        state = states.get_nowait()
+                    except queue.Empty:
+                        break
+                    if state is None:
+                        finished = True
+                        break
+                    latest = state
+                    passed.append(state[1])
+                if latest is not None:
+                    self.cur_idx = latest[0]
+                    callback(latest[1], latest[2], passed[:-1])
+        finally:
+            stop.set()
+            worker.join()
+            self.seek(self.cur_idx)
@@ -15,12 +15,19 @@ from __future__ import print_function
 import sys
 import math
 import time
+import numpy as np
 import matplotlib.colors as colors
 import matplotlib.pyplot as plt
 
 import matplotlib
 
-matplotlib.use("TKAgg")
+try:
+    matplotlib.use("TKAgg")
+except ImportError:
+    # e.g. without a display, in which case only the default (non
+    # interactive) backend can be used, see ``frameExport`` for rendering
+    # runs headlessly
+    pass
 
 try:
     import pygame
@@ -30,12 +37,162 @@ try:
 except ImportError:
     pygame_available = False
 
+from . import directions
+
+
+# Minimal size of a tile in pixels. If the tiles would be smaller, blocks of
+# tiles are shown with their average color instead.
+MIN_TILE_SIZE = 4
+
+
+class _Palette(object):
+    """
+        Lookup table of the colors of the tiles, assigning an index to each
+        color name so that the colors of a grid can be handled as arrays.
+
+        The color indices of the last looked up tiles are kept. For a
+        TileGrid only the colors of the tiles the environment changed since
+        (see ``GridEnvironment.changed_tiles``) are looked up again.
+
+        Attributes
+        ----------
+        rgb: numpy.ndarray
+            The RGB values (between 0 and 1) of the colors, one row per
+            color index.
+        names: list
+            The name of each color.
+    """
+
+    def __init__(self):
+        self.rgb = np.zeros((0, 3))
+        self.names = []
+        self._index = {}
+        self._env = None  # the environment of the last lookup
+        self._version = None  # its tile_version at the last lookup
+        self._region = None  # the rows and columns of the last lookup
+        self._indices = None  # their color indices
+
+    def _lookup(self, name):
+        """
+            Returns the index of the given color, adding it if necessary.
+        """
+        try:
+            return self._index[name]
+        except KeyError:
+            self._index[name] = len(self.names)
+            self.names.append(name)
+            self.rgb = np.vstack([self.rgb, colors.to_rgb(name)])
+            return self._index[name]
+
+    def indices(self, grid, rows, cols):
+        """
+            Determines the color index of the given tiles, adding new colors
+            to the palette.
+
+            Parameters
+            ----------
+            grid: list of lists, TileGrid
+                The Tile objects of the gridworld.
+            rows: slice
+                The rows of the grid that are looked up.
+            cols: slice
+                The columns of the grid that are looked up.
+
+            Returns
+            -------
+                numpy.ndarray
+                The color index of each of the tiles.
+        """
+        env = getattr(grid, "env", None)
+        region = (rows.start, rows.stop, cols.start, cols.stop)
+        changed = None
+        if env is not None and env is self._env and region == self._region:
+            changed = env.changed_tiles(self._version)
+        if changed is None:
+            names = [[t.color for t in row[cols]] for row in grid[rows]]
+            indices = np.array([[self._lookup(name) for name in row] for row in names],
+                               dtype=np.int64).reshape(len(names), -1)
+        elif changed:
+            indices = self._indices.copy()
+            for i, j in changed:
+                if rows.start <= i < rows.stop and cols.start <= j < cols.stop:
+                    indices[i - rows.start, j - cols.start] = self._lookup(env.tiles[(i, j)].color)
+        else:
+            indices = self._indices
+        self._env = env
+        self._version = env.tile_version if env is not None else None
+        self._region = region
+        self._indices = indices
+        return indices
+
+
+def _follow(origin, agent, view, size):
+    """
+        Moves the viewport along one axis, so that the agent stays within its
+        central half. Once the agent leaves it, the viewport is centered on
+        the agent again.
+
+        Parameters
+        ----------
+        origin: int
+            The first cell of the viewport or None to center it on the agent.
+        agent: int
+            The position of the agent.
+        view: int
+            The number of cells within the viewport.
+        size: int
+            The number of cells of the grid.
+
+        Returns
+        -------
+            int
+            The new first cell of the viewport.
+    """
+    margin = view // 4
+    if origin is None or not origin + margin <= agent < origin + view - margin:
+        origin = agent - view // 2
+    return min(max(origin, 0), size - view)
+
+
+def _block_average(rgb, factor):
+    """
+        Downsamples an image by averaging blocks of factor x factor pixels.
+        Blocks at the border of images whose size is not a multiple of the
+        factor only average the pixels they contain.
+    """
+    if factor == 1:
+        return rgb
+    rows = -(-rgb.shape[0] // factor) * factor
+    cols = -(-rgb.shape[1] // factor) * factor
+    padded = np.full((rows, cols, rgb.shape[2]), np.nan)
+    padded[:rgb.shape[0], :rgb.shape[1]] = rgb
+    return np.nanmean(padded.reshape(rows // factor, factor, cols // factor, factor, -1),
+                      axis=(1, 3))
+
 
 class MatplotlibRenderer(object):
     """
         A simple matplotlib renderer for gridworlds. Needs to have matplotlib
         installed!
 
+        The grid is converted to an RGB image using a lookup table of the
+        colors of the tiles. The image, the agent and the trajectory are
+        created once and updated in place for each frame. If the backend
+        supports blitting, the figure is only redrawn when the colors of
+        tiles changed, otherwise only the agent and the trajectory are
+        redrawn on top of the stored figure.
+
+        Parameters
+        ----------
+        viewport: tuple, optional (Default: None)
+            The number of rows and columns of tiles that are shown around the
+            agent. The viewport follows the agent and only its tiles are
+            converted. If None, the whole grid is shown.
+        min_tile_size: int, optional (Default: MIN_TILE_SIZE)
+            If the tiles would be shown smaller than this number of pixels,
+            a downsampled overview is shown instead, in which each pixel is
+            the average color of a block of tiles.
+
         Attributes
         ----------
         fig: matplotlib.Figure
@@ -47,11 +204,18 @@ class MatplotlibRenderer(object):
             the past trajectory.
     """
 
-    def __init__(self):
+    def __init__(self, viewport=None, min_tile_size=MIN_TILE_SIZE):
         plt.ion()
         plt.rcParams['toolbar'] = 'None'
         self.fig = self.ax = None
         self.past_positions = []
+        self.viewport = viewport
+        self.min_tile_size = min_tile_size
+
+        self._palette = _Palette()
+        self._indices = None  # color index of each tile of the image
+        self._view = None  # first row and column, rows, columns and block size of the image
+        self._background = None  # the figure without agent and trajectory used for blitting
 
     def clear_past_trajectory(self):
         """
@@ -65,18 +229,65 @@ class MatplotlibRenderer(object):
         self.fig, self.ax = plt.subplots()
         self.ax.get_xaxis().set_visible(False)
         self.ax.get_yaxis().set_visible(False)
-        self.agent = plt.Circle((0, 0), radius=0.4, color='y')
+        # the artists are only redrawn on their own if blitting is supported
+        self._blit = self.fig.canvas.supports_blit
+        self.agent = plt.Circle((0, 0), radius=0.4, color='y', animated=self._blit)
+        self.ax.add_artist(self.agent)
+        self.trajectory, = self.ax.plot([], [], "r-", animated=self._blit)
+        self.image = None
+        self._view = None
+        self._background = None
+        if self._blit:
+            self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        """
+            Stores the figure without the agent and the trajectory whenever
+            the whole figure is redrawn, e.g. after resizing the window, and
+            draws them on top of it.
+        """
+        self._background = self.fig.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
 
-    def plot(self, grid, agent, show_trajectory=False, past_positions=None):
+    def _draw_artists(self):
+        self.ax.draw_artist(self.agent)
+        self.ax.draw_artist(self.trajectory)
+
+    def _update_view(self, num_rows, num_cols, agent):
+        """
+            Determines the tiles shown in the image and the size of the
+            blocks of tiles averaged into one pixel.
+
+            Returns
+            -------
+                tuple
+                The first row and column, the number of rows and columns and
+                the block size.
+        """
+        rows, cols = num_rows, num_cols
+        row, col = 0, 0
+        if self.viewport is not None:
+            rows, cols = min(self.viewport[0], num_rows), min(self.viewport[1], num_cols)
+            old_row, old_col = self._view[:2] if self._view else (None, None)
+            row = _follow(old_row, agent[0], rows, num_rows)
+            col = _follow(old_col, agent[1], cols, num_cols)
+        width, height = self.ax.bbox.width, self.ax.bbox.height
+        factor = max(1, math.ceil(max(cols * self.min_tile_size / width,
+                                      rows * self.min_tile_size / height)))
+        return row, col, rows, cols, factor
+
+    def plot(self, grid, agent, show_trajectory=False, past_positions=None, facing=None):
         """
             Plots the grid and the agent position using matplotlibs 
-            pcolormesh.
+            imshow.
 
             Parameters
             ---------
-            grid: list of lists
+            grid: list of lists, TileGrid
                 A list of lists containing the Tile object that represent
-                the gridworld. 
+                the gridworld, e.g. as returned by
+                ``GridEnvironment.get_view_cone(playback=True)``. Only the
+                tiles within the viewport are accessed.
             agent: Tuple
                 A tuple representing the current agent position.
             show_trajectory: bool, optional (Default: False)
@@ -87,20 +298,35 @@ class MatplotlibRenderer(object):
                 A list of past positions which, if given, will override any 
                 remembered past positions and are rendered as the past 
                 trajectory only if "show_trajectory" is True.
+            facing: Tuple, optional (Default: None)
+                The direction the agent is facing. Not shown by this
+                renderer, only accepted for compatibility with the
+                PygameRenderer.
         """
 
         if self.fig is None:
             self._setup_figure()
 
-        # Convert Tile objects to int array
-        mesh = []
-        for row in grid:
-            mesh.append([colors.to_rgb(t.color) for t in row])
-
-        self.ax.clear()
-        self.ax.imshow(mesh)
+        view = self._update_view(len(grid), len(grid[0]), agent)
+        row, col, rows, cols, factor = view
+        indices = self._palette.indices(grid, slice(row, row + rows), slice(col, col + cols))
+        if self.image is None or view != self._view or (indices != self._indices).any():
+            rgb = _block_average(self._palette.rgb[indices], factor)
+            # the image is placed at the coordinates of the tiles
+            extent = (col - 0.5, col + rgb.shape[1] * factor - 0.5,
+                      row + rgb.shape[0] * factor - 0.5, row - 0.5)
+            if self.image is None:
+                self.image = self.ax.imshow(rgb, extent=extent)
+            else:
+                self.image.set_data(rgb)
+                self.image.set_extent(extent)
+            self.ax.set_xlim(col - 0.5, col + cols - 0.5)
+            self.ax.set_ylim(row + rows - 0.5, row - 0.5)
+            self._indices = indices
+            self._view = view
+            self._background = None
         self.agent.center = (agent[1], agent[0])
-        self.ax.add_artist(self.agent)
+        self.agent.set_radius(0.4 * factor)
 
         if show_trajectory:
             # Append current agent positions
@@ -110,10 +336,19 @@ class MatplotlibRenderer(object):
                 pos_list = past_positions
             xs = [p[1] for p in pos_list]
             ys = [p[0] for p in pos_list]
-            self.ax.plot(xs, ys, "r-")
+            self.trajectory.set_data(xs, ys)
+        else:
+            self.trajectory.set_data([], [])
 
-        self.ax.add_artist(self.agent)
-        plt.draw()
+        if not self._blit:
+            plt.draw()
+        elif self._background is None:
+            # the whole figure has to be drawn, see _on_draw
+            self.fig.canvas.draw()
+        else:
+            self.fig.canvas.restore_region(self._background)
+            self._draw_artists()
+            self.fig.canvas.blit(self.ax.bbox)
 
     def pause(self, duration):
         """
@@ -146,6 +381,24 @@ class PygameRenderer(object):
         A more complete renderer using pygame. Will only be available if
         pygame is installed.
 
+        The window is only created once for each grid size. The tiles are
+        drawn onto an off-screen background surface and the trajectory onto
+        a transparent overlay, which are blitted onto the screen. After the
+        first frame, only the tiles whose color changed, the agent and the
+        newest segment of the trajectory are redrawn and updated on the
+        screen.
+
+        Parameters
+        ----------
+        viewport: tuple, optional (Default: None)
+            The number of rows and columns of tiles that are shown around the
+            agent. The viewport follows the agent and only its tiles are
+            drawn. If None, the whole grid is shown.
+        min_tile_size: int, optional (Default: MIN_TILE_SIZE)
+            If the tiles would be drawn smaller than this number of pixels,
+            a downsampled overview is drawn instead, in which each block of
+            tiles is drawn with their average color.
+
         Attributes
         ----------
         size: tuple
@@ -157,13 +410,24 @@ class PygameRenderer(object):
             the past trajectory.
     """
 
-    def __init__(self):
+    def __init__(self, viewport=None, min_tile_size=MIN_TILE_SIZE):
         pygame.init()
         self.size = 620, 480
         self.screen = None
+        self.viewport = viewport
+        self.min_tile_size = min_tile_size
 
         self.past_positions = []
 
+        self._background = None  # surface containing the tiles
+        self._overlay = None  # transparent surface containing the trajectory
+        self._palette = _Palette()
+        self._indices = None  # color index of each tile drawn onto the background
+        self._view = None  # first row and column, rows, columns and block size shown
+        self._trajectory = []  # positions drawn onto the overlay
+        self._agent_rect = None  # area covered by the agent in the last frame
+        self._color_cache = {}
+
     def clear_past_trajectory(self):
         """
             Removes any remembered past_positions, which effectively clears
@@ -172,6 +436,158 @@ class PygameRenderer(object):
         """
         self.past_positions = []
 
+    def _color(self, name):
+        """
+            Returns the pygame Color of the given color name, parsing each
+            name only once.
+        """
+        color = self._color_cache.get(name)
+        if color is None:
+            color = self._color_cache[name] = Color(name)
+        return color
+
+    def _update_view(self, num_rows, num_cols, agent):
+        """
+            Determines the tiles shown in the window and the size of the
+            blocks of tiles drawn as one.
+
+            Returns
+            -------
+                tuple
+                The first row and column, the number of rows and columns and
+                the block size.
+        """
+        rows, cols = num_rows, num_cols
+        row, col = 0, 0
+        if self.viewport is not None:
+            rows, cols = min(self.viewport[0], num_rows), min(self.viewport[1], num_cols)
+            old_row, old_col = self._view[:2] if self._view else (None, None)
+            row = _follow(old_row, agent[0], rows, num_rows)
+            col = _follow(old_col, agent[1], cols, num_cols)
+        factor = max(1, math.ceil(max(cols * self.min_tile_size / self.size[0],
+                                      rows * self.min_tile_size / self.size[1])))
+        return row, col, rows, cols, factor
+
+    def _setup_window(self, view):
+        """
+            Creates the window and the off-screen surfaces for the given
+            view, see ``_update_view``.
+        """
+        _, _, rows, cols, factor = view
+        blocks = (-(-rows // factor), -(-cols // factor))
+        self.tile_width = self.size[0] // blocks[1]
+        self.tile_height = self.size[1] // blocks[0]
+        size = (self.tile_width * blocks[1], self.tile_height * blocks[0])
+        if self.screen is None or self.screen.get_size() != size:
+            self.screen = pygame.display.set_mode(size)
+        self._background = pygame.Surface(size)
+        self._background.fill(Color("white"))
+        self._overlay = pygame.Surface(size, pygame.SRCALPHA)
+        self._indices = None
+        self._trajectory = []
+        self._agent_rect = None
+
+    def _center(self, pos):
+        """
+            Returns the pixel coordinates of the center of the given tile.
+        """
+        row, col, _, _, factor = self._view
+        return (int((pos[1] - col + 0.5) * self.tile_width / factor),
+                int((pos[0] - row + 0.5) * self.tile_height / factor))
+
+    def _draw_tiles(self, indices):
+        """
+            Draws the blocks of tiles whose colors changed onto the
+            background.
+
+            Returns
+            -------
+                list
+                The areas of the background that were changed.
+        """
+        factor = self._view[4]
+        changed = np.ones(indices.shape, dtype=bool) if self._indices is None \
+            else indices != self._indices
+        self._indices = indices
+        if not changed.any():
+            return []
+        if factor == 1:
+            fills = [self._color(name) for name in self._palette.names]
+        else:
+            # pygame interprets some color names differently than matplotlib
+            palette = np.array([tuple(self._color(name))[:3] for name in self._palette.names])
+            blocks = np.rint(_block_average(palette[indices], factor)).astype(int)
+            changed = _block_average(changed[..., None].astype(float), factor)[..., 0] > 0
+        rects = []
+        for i, j in zip(*np.nonzero(changed)):
+            rect = Rect(j * self.tile_width, i * self.tile_height,
+                        self.tile_width, self.tile_height)
+            self._background.fill(fills[indices[i, j]] if factor == 1 else blocks[i, j].tolist(),
+                                  rect)
+            rects.append(rect)
+        return rects
+
+    def _draw_trajectory(self, pos_list):
+        """
+            Draws the given trajectory onto the overlay. If it continues the
+            trajectory drawn so far, only the new segments are drawn.
+
+            Returns
+            -------
+                list
+                The areas of the overlay that were changed, or None if the
+                whole overlay was redrawn.
+        """
+        drawn = self._trajectory
+        if len(pos_list) >= len(drawn) and (not drawn or pos_list[len(drawn) - 1] == drawn[-1]):
+            start = max(len(drawn) - 1, 0)
+            rects = []
+        else:
+            self._overlay.fill((0, 0, 0, 0))
+            start = 0
+            rects = None
+        for a, b in zip(pos_list[start:], pos_list[start + 1:]):
+            rect = pygame.draw.line(self._overlay, self._color("red"),
+                                    self._center(a), self._center(b), 2)
+            if rects is not None:
+                rects.append(rect)
+        self._trajectory = list(pos_list)
+        return rects
+
+    def _draw_agent(self, agent, facing):
+        """
+            Draws the agent smiley onto the screen.
+
+            Returns
+            -------
+                pygame.Rect
+                The area covered by the agent.
+        """
+        heading = directions.to_heading(facing)
+        x, y = self._center(agent)
+        size = max(min(self.tile_height, self.tile_width) // 2, 1)
+
+        rect = pygame.draw.circle(self.screen, self._color("yellow"), (x, y), size)
+        if heading == directions.HEADING_NORTH:
+            pygame.draw.circle(self.screen, self._color("black"),
+                               (x, y - size // 3), size // 6)
+        elif heading == directions.HEADING_SOUTH:
+            pygame.draw.circle(self.screen, self._color("black"),
+                               (x, y + size // 3), size // 6)
+        elif heading == directions.HEADING_EAST:
+            pygame.draw.circle(self.screen, self._color("black"),
+                               (x + size // 3, y), size // 6)
+        else:
+            pygame.draw.circle(self.screen, self._color("black"),
+                               (x - size // 3, y), size // 6)
+
+        # Draw eyes
+        # pygame.draw.circle(self.screen, Color("black"), (x + size//3,y - size//6), size//6)
+        # pygame.draw.circle(self.screen, Color("black"), (x - size//3, y - size//6), size//6)
+        # Draw mouth
+        # pygame.draw.arc(self.screen, Color("black"), (x - 2*size//3, y - 4*size//5, 4*size//3, 3*size//2), -5*math.pi/6, -math.pi/6, 2)
+        return rect
+
     def plot(self, grid, agent, facing, show_trajectory=False, past_positions=None):
         """
             Plots the grid and the agent position in the window. Will basically
@@ -180,9 +596,11 @@ class PygameRenderer(object):
 
             Parameters
             ---------
-            grid: list of lists
+            grid: list of lists, TileGrid
                 A list of lists containing the Tile object that represent
-                the gridworld. 
+                the gridworld, e.g. as returned by
+                ``GridEnvironment.get_view_cone(playback=True)``. Only the
+                tiles within the viewport are accessed.
             agent: Tuple
                 A tuple representing the current agent position.
             facing: Tuple
@@ -196,38 +614,19 @@ class PygameRenderer(object):
                 remembered past positions and are rendered as the past 
                 trajectory only if "show_trajectory" is True.
         """
-        from .gridEnvironment import NORTH, SOUTH, EAST, WEST
-        if self.screen is None:
-            self.screen = pygame.display.set_mode(self.size)
-
-        num_rows = len(grid)
-        num_cols = len(grid[0])
-
-        tile_width = self.size[0] // num_cols
-        tile_height = self.size[1] // num_rows
-
-        self.screen = pygame.display.set_mode(
-            (tile_width * num_cols, tile_height * num_rows))
-
-        # Clear old image
-        self.screen.fill(Color("white"))
-
-        for i, row in enumerate(grid):
-            for j, tile in enumerate(row):
-                x = j * tile_width
-                y = i * tile_height
-
-                color = Color(tile.color)
-                pygame.draw.rect(self.screen, color, Rect(
-                    x, y, tile_width, tile_height))
-
-        # Draw agent smiley
-        x = int((agent[1] + 0.5) * tile_width)
-        y = int((agent[0] + 0.5) * tile_height)
-        size = min(tile_height, tile_width) // 2
-
-        # Draw past trajectory if required before drawing the body of the smiley
-        # so that the smiley appears on top
+        view = self._update_view(len(grid), len(grid[0]), agent)
+        full = self.screen is None or view != self._view
+        if full:
+            # e.g. a new grid or the viewport moved
+            self._view = view
+            self._setup_window(view)
+        row, col, rows, cols, _ = view
+
+        # Only redraw the tiles whose color changed
+        dirty = self._draw_tiles(self._palette.indices(
+            grid, slice(row, row + rows), slice(col, col + cols)))
+
+        pos_list = []
         if show_trajectory:
             # Append current agent positions
             self.past_positions.append(agent)
@@ -235,38 +634,30 @@ class PygameRenderer(object):
             pos_list = self.past_positions
             if past_positions:
                 pos_list = past_positions
+        rects = self._draw_trajectory([tuple(p) for p in pos_list])
+        if rects is None:
+            full = True
+        else:
+            dirty.extend(rects)
 
-            traj_pos = []
-            for (p_y, p_x) in pos_list:
-                traj_pos.append((int((p_x + 0.5) * tile_width),
-                                int((p_y + 0.5) * tile_height)))
+        if self._agent_rect is not None:
+            # Remove the agent of the last frame
+            dirty.append(self._agent_rect)
+        if full:
+            dirty = [self.screen.get_rect()]
 
-            # Draw red line
-            if len(traj_pos) > 1:
-                pygame.draw.lines(self.screen, Color(
-                    "red"), False, traj_pos, 2)
+        for rect in dirty:
+            self.screen.blit(self._background, rect, rect)
+            self.screen.blit(self._overlay, rect, rect)
 
-        pygame.draw.circle(self.screen, Color("yellow"), (x, y), size)
-        if facing == NORTH:
-            pygame.draw.circle(self.screen, Color("black"),
-                               (x, y - size // 3), size // 6)
-        elif facing == SOUTH:
-            pygame.draw.circle(self.screen, Color("black"),
-                               (x, y + size // 3), size // 6)
-        elif facing == EAST:
-            pygame.draw.circle(self.screen, Color("black"),
-                               (x + size // 3, y), size // 6)
-        else:
-            pygame.draw.circle(self.screen, Color("black"),
-                               (x - size // 3, y), size // 6)
+        # Draw the agent on top of the trajectory
+        self._agent_rect = self._draw_agent(agent, facing)
+        dirty.append(self._agent_rect)
 
-        # Draw eyes
-        # pygame.draw.circle(self.screen, Color("black"), (x + size//3,y - size//6), size//6)
-        # pygame.draw.circle(self.screen, Color("black"), (x - size//3, y - size//6), size//6)
-        # Draw mouth
-        # pygame.draw.arc(self.screen, Color("black"), (x - 2*size//3, y - 4*size//5, 4*size//3, 3*size//2), -5*math.pi/6, -math.pi/6, 2)
-
-        pygame.display.update()
+        if full:
+            pygame.display.update()
+        else:
+            pygame.display.update(dirty)
 
     def pause(self, duration):
         if self.screen:
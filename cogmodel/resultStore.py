@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module providing a local SQLite database as an alternative backend for the
+results of the pipeline. Instead of appending to .csv files through the
+log thread, the metrics and trajectories of all runs are inserted in
+batches into a single database file, which can be written by several
+worker processes at once (using SQLite's write-ahead logging) and queried
+across sweeps. The usual .csv files can be regenerated using
+``ResultStore.export_csv``.
+
+The database contains the tables:
+
+* runs: one row per run, identified by (sweep_seed, lab, agent, run)
+* metrics: the value of each metric (see ``evaluation.METRICS``) of a run
+* trajectories: the trajectory of a run as compressed binary blobs
+"""
+
+import os
+import sqlite3
+import zlib
+
+import numpy as np
+
+from .evaluation import METRICS, EVALUATION_HEADER, MASTER_HEADER, format_run, format_aggregates
+from .aggregation import RunningStatistic
+
+# Number of runs collected before they are written to the database
+BATCH_SIZE = 100
+
+# Trajectories stored for each run (as returned by ``evaluation.read_logging``)
+# and the types of their arrays. The actions are stored as text.
+TRAJECTORY_TYPES = {"positions": np.int32, "time": np.int64, "load": np.int64,
+                    "length": np.int64, "action_values": np.float64}
+
+# Seeds are unsigned 64 bit integers (see ``seeding.derive_seed``), while
+# SQLite integers are signed, so they are stored in two's complement
+_SIGN = 1 << 63
+
+
+def _to_sql(seed):
+    return None if seed is None else seed - 2 * _SIGN if seed >= _SIGN else seed
+
+
+def _from_sql(seed):
+    return None if seed is None else seed + 2 * _SIGN if seed < 0 else seed
+
+
+def _to_python(value):
+    # metrics may be numpy scalars; integers are kept as integers (the
+    # metrics table has no type affinity), so the exported .csv files
+    # match the ones written by the pipeline
+    return value.item() if isinstance(value, np.generic) else value
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    sweep_seed INTEGER,
+    lab TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    run INTEGER NOT NULL,
+    seed INTEGER,
+    termination TEXT,
+    UNIQUE (sweep_seed, lab, agent, run)
+);
+CREATE INDEX IF NOT EXISTS runs_lab_agent_seed ON runs (lab, agent, seed);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS trajectories (
+    run_id INTEGER PRIMARY KEY REFERENCES runs (id),
+    actions BLOB,
+    positions BLOB,
+    time BLOB,
+    load BLOB,
+    length BLOB,
+    action_values BLOB
+);
+"""
+
+
+class ResultStore(object):
+    """
+        Store for the results of runs in a SQLite database.
+
+        Runs added by ``add_run`` are collected and written in a single
+        transaction once batch_size runs were collected, when ``flush`` is
+        called or when the store is closed.
+
+        Parameters
+        ----------
+        path: str
+            The path of the database file. It is created if it does not
+            exist yet.
+        batch_size: int, optional (Default: BATCH_SIZE)
+            The number of runs collected before they are written.
+
+        Attributes
+        ----------
+        connection: sqlite3.Connection
+            The connection to the database.
+    """
+
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        dir_path = os.path.dirname(path)
+        if dir_path and not os.path.isdir(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+        # wait for other processes writing to the database
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+        self._pending = []
+
+    def add_run(self, lab, agent, number, metrics, termination, seed=None,
+                sweep_seed=None, trajectory=None):
+        """
+            Adds the results of a run. A run with the same sweep_seed, lab,
+            agent and number that is already stored will be replaced.
+
+            Parameters
+            ----------
+            lab: str
+                The name of the labyrinth.
+            agent: str
+                The name of the strategy.
+            number: int
+                The index of the run.
+            metrics: dict
+                The value of each metric in METRICS.
+            termination: str
+                The reason the run ended.
+            seed: int, optional (Default: None)
+                The seed of the run.
+            sweep_seed: int, optional (Default: None)
+                The seed of the sweep the run belongs to.
+            trajectory: dict, optional (Default: None)
+                The trajectory of the run, containing the keys "actions" (a
+                list of action names) and the keys of TRAJECTORY_TYPES.
+        """
+        self._pending.append((lab, agent, number, metrics, termination, seed,
+                              sweep_seed, trajectory))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+            Writes all collected runs to the database in a single
+            transaction.
+        """
+        if not self._pending:
+            return
+        with self.connection:
+            cursor = self.connection.cursor()
+            for lab, agent, number, metrics, termination, seed, sweep_seed, trajectory in self._pending:
+                row = cursor.execute("SELECT id FROM runs WHERE sweep_seed IS ? AND lab = ? "
+                                     "AND agent = ? AND run = ?",
+                                     (sweep_seed, lab, agent, number)).fetchone()
+                if row is not None:
+                    for table in ["metrics", "trajectories"]:
+                        cursor.execute("DELETE FROM {} WHERE run_id = ?".format(table), row)
+                    cursor.execute("DELETE FROM runs WHERE id = ?", row)
+                cursor.execute("INSERT INTO runs (sweep_seed, lab, agent, run, seed, termination) "
+                               "VALUES (?, ?, ?, ?, ?, ?)",
+                               (sweep_seed, lab, agent, number, _to_sql(seed), termination))
+                run_id = cursor.lastrowid
+                cursor.executemany("INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)",
+                                   [(run_id, metric, _to_python(metrics[metric])) for metric in METRICS])
+                if trajectory is not None:
+                    blobs = [zlib.compress("\n".join(trajectory["actions"]).encode("utf-8"))]
+                    blobs += [zlib.compress(np.asarray(trajectory[key], dtype=dtype).tobytes())
+                              for key, dtype in TRAJECTORY_TYPES.items()]
+                    cursor.execute("INSERT INTO trajectories (run_id, actions, {}) VALUES (?, ?, {})".format(
+                        ", ".join(TRAJECTORY_TYPES), ", ".join("?" * len(TRAJECTORY_TYPES))),
+                        [run_id] + blobs)
+        self._pending = []
+
+    def close(self):
+        """
+            Writes all collected runs and closes the database.
+        """
+        self.flush()
+        self.connection.close()
+
+    def runs(self, lab=None, agent=None, seed=None, sweep_seed=None):
+        """
+            Queries the stored runs.
+
+            Parameters
+            ----------
+            lab: str, optional (Default: None)
+                Only return runs on this labyrinth.
+            agent: str, optional (Default: None)
+                Only return runs of this strategy.
+            seed: int, optional (Default: None)
+                Only return runs with this seed.
+            sweep_seed: int, optional (Default: None)
+                Only return runs of the sweep with this seed.
+
+            Returns
+            -------
+                list(dict)
+                A dictionary for each run, containing the keys "id",
+                "sweep_seed", "lab", "agent", "run", "seed", "termination"
+                and "metrics", ordered by insertion.
+        """
+        self.flush()
+        conditions = []
+        parameters = []
+        for column, value in [("lab", lab), ("agent", agent), ("seed", _to_sql(seed)),
+                              ("sweep_seed", sweep_seed)]:
+            if value is not None:
+                conditions.append("{} = ?".format(column))
+                parameters.append(value)
+        query = "SELECT id, sweep_seed, lab, agent, run, seed, termination FROM runs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        keys = ["id", "sweep_seed", "lab", "agent", "run", "seed", "termination"]
+        runs = [dict(zip(keys, row)) for row in
+                self.connection.execute(query + " ORDER BY id", parameters)]
+        for run in runs:
+            run["seed"] = _from_sql(run["seed"])
+            run["metrics"] = dict(self.connection.execute(
+                "SELECT name, value FROM metrics WHERE run_id = ?", (run["id"],)))
+        return runs
+
+    def trajectory(self, run_id):
+        """
+            Loads the trajectory of a run.
+
+            Parameters
+            ----------
+            run_id: int
+                The id of the run, see ``runs``.
+
+            Returns
+            -------
+                dict
+                The trajectory as given to ``add_run``, with numpy arrays
+                instead of lists, or None if no trajectory was stored.
+        """
+        self.flush()
+        row = self.connection.execute("SELECT actions, {} FROM trajectories WHERE run_id = ?".format(
+            ", ".join(TRAJECTORY_TYPES)), (run_id,)).fetchone()
+        if row is None:
+            return None
+        actions = zlib.decompress(row[0]).decode("utf-8")
+        trajectory = {"actions": actions.split("\n") if actions else []}
+        for (key, dtype), blob in zip(TRAJECTORY_TYPES.items(), row[1:]):
+            trajectory[key] = np.frombuffer(zlib.decompress(blob), dtype=dtype)
+        trajectory["positions"] = trajectory["positions"].reshape(-1, 2)
+        return trajectory
+
+    def export_csv(self, directory="data/Agent_data/", sweep_seed=None):
+        """
+            Regenerates the evaluation.csv file of each labyrinth + agent
+            combination and the overall_averages.csv file (see the Readme)
+            from the stored runs. Existing files are overwritten.
+
+            Parameters
+            ----------
+            directory: str, optional (Default: "data/Agent_data/")
+                The directory the files are written to.
+            sweep_seed: int, optional (Default: None)
+                Only export the runs of the sweep with this seed.
+        """
+        pairs = {}
+        for run in self.runs(sweep_seed=sweep_seed):
+            pairs.setdefault((run["lab"], run["agent"]), []).append(run)
+
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "overall_averages.csv"), "w") as master:
+            master.write(MASTER_HEADER + "\n")
+            for (labID, agentID), runs in pairs.items():
+                statistics = {metric: RunningStatistic() for metric in METRICS}
+                terminations = {}
+                pair_dir = os.path.join(directory, labID + "_" + agentID)
+                os.makedirs(pair_dir, exist_ok=True)
+                with open(os.path.join(pair_dir, "evaluation.csv"), "w") as f:
+                    f.write(EVALUATION_HEADER + "\n")
+                    for run in sorted(runs, key=lambda run: run["run"]):
+                        f.write(format_run(run["run"], labID, agentID, run["metrics"],
+                                           run["termination"]) + "\n")
+                        for metric in METRICS:
+                            statistics[metric].add(run["metrics"][metric])
+                        terminations[run["termination"]] = terminations.get(run["termination"], 0) + 1
+                    rows, master_row = format_aggregates(labID, agentID, statistics, terminations)
+                    f.write("\n".join(rows) + "\n")
+                master.write(master_row + "\n")
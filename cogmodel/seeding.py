@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module deriving reproducible random number generators for single runs of
+an agent. Each run gets its own numpy Generator whose seed is derived from
+the seed of the whole sweep and the (labyrinth, agent, run index) key of the
+run, so that runs can be repeated individually and in any order or process
+without sharing random streams.
+"""
+
+import hashlib
+import secrets
+
+import numpy as np
+
+
+def new_sweep_seed():
+    """
+        Returns
+        -------
+            int
+            A fresh random 32 bit seed for a sweep, used when the user did
+            not specify one.
+    """
+    return secrets.randbits(32)
+
+
+def derive_seed(sweep_seed, lab, agent, run):
+    """
+        Derives the seed of a single run from the sweep seed and the key of
+        the run. Uses a cryptographic hash instead of python's ``hash`` as
+        the latter is randomized per process for strings.
+
+        Parameters
+        ----------
+        sweep_seed: int
+            The seed of the whole sweep.
+        lab: str
+            The name of the labyrinth.
+        agent: str
+            The name of the agent.
+        run: int
+            The index of the run of the agent on the labyrinth.
+
+        Returns
+        -------
+            int
+            A 64 bit seed for the run.
+    """
+    key = "{}|{}|{}|{}".format(sweep_seed, lab, agent, run)
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def make_rng(seed=None):
+    """
+        Parameters
+        ----------
+        seed: int, optional (Default: None)
+            The seed of the generator. If None, fresh entropy is used.
+
+        Returns
+        -------
+            numpy.random.Generator
+            A new random number generator for the given seed.
+    """
+    return np.random.default_rng(seed)
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module allowing to publish the static data of a labyrinth once into shared
+memory (see ``multiprocessing.shared_memory``), so that several worker
+processes can run agents on it without each of them holding (and
+unpickling) its own copy of the maze.
+
+The published data consists of the grid itself, the distance of every tile
+to the target and the view cone offsets of all facing directions. Workers
+attach to it using the small, picklable ``SharedMaze.handle`` and create
+environments whose tiles are created on demand from the shared grid, so
+that only the state of the current episode is kept locally.
+
+Example::
+
+    maze = SharedMaze.publish(spec, view_radius=5)
+    # in the worker process
+    worker_maze = SharedMaze.attach(maze.handle)
+    env = worker_maze.create_environment()
+    ...
+    del env
+    worker_maze.close()
+    # in the publishing process, once all workers are done
+    maze.unlink()
+"""
+
+import gc
+from collections import deque
+from collections.abc import Mapping
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .gridEnvironment import GridEnvironment, Tile, PASSABLES, NORTH, SOUTH, WEST, EAST
+
+# Order of the facing directions within the view cone table
+FACINGS = (NORTH, SOUTH, WEST, EAST)
+
+
+class SharedTiles(Mapping):
+    """
+        Mapping from positions to tiles, which creates the Tile objects on
+        first access from a read-only grid of characters instead of creating
+        all of them up front. Each Tile is created only once, so that changes
+        to it (e.g. ``target_visible``) are kept. Can be used in place of the
+        ``tiles`` dictionary of a GridEnvironment.
+
+        Parameters
+        ----------
+        grid: memoryview
+            2D memoryview of unsigned bytes containing the characters of
+            the labyrinth. A memoryview is used instead of a numpy array,
+            as pympler cannot determine the size of numpy arrays using
+            foreign memory (see ``GridEnvironment.perform_action``).
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self._max_pos = (grid.shape[0] - 1, grid.shape[1] - 1)
+        self._tiles = {}  # the tiles created so far
+
+    def __getitem__(self, pos):
+        try:
+            return self._tiles[pos]
+        except (KeyError, TypeError):
+            pass
+        if pos not in self:
+            raise KeyError(pos)
+        x, y = pos
+        tile = Tile(chr(self.grid[x, y]), x, y)
+        # Same neighbours as created by GridEnvironment.parse_world_string
+        for i, j in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            tile.neighbours.add((min(max(x + i, 0), self._max_pos[0]),
+                                 min(max(y + j, 0), self._max_pos[1])))
+        self._tiles[(x, y)] = tile
+        return tile
+
+    def __setitem__(self, pos, tile):
+        """
+            Replaces the tile at the given position, see
+            ``GridEnvironment._own_tile``.
+        """
+        if pos not in self:
+            raise KeyError(pos)
+        self._tiles[tuple(pos)] = tile
+
+    def copy(self):
+        """
+            Creates a mapping on the same grid, which shares the tiles
+            created so far with this one.
+        """
+        res = SharedTiles(self.grid)
+        res._tiles = dict(self._tiles)
+        return res
+
+    def __contains__(self, pos):
+        try:
+            x, y = pos
+        except (TypeError, ValueError):
+            return False
+        return 0 <= x <= self._max_pos[0] and 0 <= y <= self._max_pos[1]
+
+    def __iter__(self):
+        for i in range(self.grid.shape[0]):
+            for j in range(self.grid.shape[1]):
+                yield (i, j)
+
+    def __len__(self):
+        return self.grid.shape[0] * self.grid.shape[1]
+
+
+def distance_field(grid, target):
+    """
+        Computes the distance of all tiles to the target using a breadth
+        first search.
+
+        Parameters
+        ----------
+        grid: numpy.ndarray
+            2D array of uint8 containing the characters of the labyrinth.
+        target: tuple
+            The position of the target.
+
+        Returns
+        -------
+            numpy.ndarray
+            Array of int32 of the same shape as the grid, containing the
+            number of steps from each tile to the target or -1 if the
+            target cannot be reached from it.
+    """
+    passable = np.vectorize(lambda c: PASSABLES.get(chr(c), True), otypes=[bool])(grid)
+    distance = np.full(grid.shape, -1, dtype=np.int32)
+    if not passable[target]:
+        return distance
+    distance[target] = 0
+    frontier = deque([target])
+    while frontier:
+        x, y = frontier.popleft()
+        for i, j in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            n_x, n_y = x + i, y + j
+            if 0 <= n_x < grid.shape[0] and 0 <= n_y < grid.shape[1] and \
+                    passable[n_x, n_y] and distance[n_x, n_y] < 0:
+                distance[n_x, n_y] = distance[x, y] + 1
+                frontier.append((n_x, n_y))
+    return distance
+
+
+class SharedMaze(object):
+    """
+        The static data of a labyrinth, stored in a single shared memory
+        block. Use ``publish`` to create it and ``attach`` to access it from
+        another process.
+
+        Parameters
+        ----------
+        shm: multiprocessing.shared_memory.SharedMemory
+            The shared memory block containing the arrays.
+        layout: dict
+            Maps the names of the arrays to their (offset, shape, dtype)
+            within the block.
+        meta: dict
+            The remaining (small) information about the labyrinth, i.e.
+            its "goal", "start", "facing", "name" and "view_radius".
+        owner: bool, optional (Default: False)
+            Whether this instance created the block and is responsible for
+            unlinking it.
+
+        Attributes
+        ----------
+        grid: numpy.ndarray
+            2D array of uint8 containing the characters of the labyrinth.
+        distance: numpy.ndarray
+            2D array of int32 containing the distance of each tile to the
+            target, see ``distance_field``.
+        view_offsets: numpy.ndarray
+            Array of int16 of shape (4, n, 2) containing the view cone
+            offsets for each facing direction in FACINGS.
+        view_counts: numpy.ndarray
+            The number of valid offsets for each facing direction in
+            view_offsets.
+    """
+
+    def __init__(self, shm, layout, meta, owner=False):
+        self.shm = shm
+        self.layout = layout
+        self.meta = meta
+        self.owner = owner
+        for key, (offset, shape, dtype) in layout.items():
+            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            array.flags.writeable = owner
+            setattr(self, key, array)
+        self._env_string = None
+        self._views = []  # memoryviews handed out, released in close
+
+    @classmethod
+    def publish(cls, spec, view_radius):
+        """
+            Computes the static data of the given labyrinth and copies it
+            into a newly created shared memory block.
+
+            Parameters
+            ----------
+            spec: dict
+                A labyrinth specification as yielded by
+                ``labyrinths.iter_labyrinths``.
+            view_radius: int
+                The view radius of the agent within the environment.
+
+            Returns
+            -------
+                SharedMaze
+                The published maze, owning the shared memory block.
+        """
+        rows = spec["env_string"].split("\n")
+        if len(set(len(row) for row in rows)) != 1:
+            raise ValueError("Only rectangular labyrinths can be shared, "
+                             "which {} is not.".format(spec["name"]))
+        grid = np.array([list(row.encode("utf-8")) for row in rows], dtype=np.uint8)
+        # the view cone offsets only depend on the size and view radius
+        env = GridEnvironment(target=spec["goal"], initial_agent_pos=spec["start"],
+                              view_radius=view_radius, name=spec["name"], facing=spec["facing"])
+        env.size = grid.shape
+        offsets = [env.view_cone_offsets(facing) for facing in FACINGS]
+        view_offsets = np.zeros((len(FACINGS), max(len(o) for o in offsets), 2), dtype=np.int16)
+        for i, facing_offsets in enumerate(offsets):
+            view_offsets[i, :len(facing_offsets)] = facing_offsets
+        arrays = {"grid": grid,
+                  "distance": distance_field(grid, spec["goal"]),
+                  "view_offsets": view_offsets,
+                  "view_counts": np.array([len(o) for o in offsets], dtype=np.int32)}
+
+        layout = {}
+        size = 0
+        for key, array in arrays.items():
+            layout[key] = (size, array.shape, array.dtype.str)
+            # keep all arrays 8 byte aligned
+            size += -(-array.nbytes // 8) * 8
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        meta = {"goal": spec["goal"], "start": spec["start"], "facing": spec["facing"],
+                "name": spec["name"], "view_radius": view_radius}
+        maze = cls(shm, layout, meta, owner=True)
+        for key, array in arrays.items():
+            getattr(maze, key)[...] = array
+        return maze
+
+    @property
+    def handle(self):
+        """
+            A small picklable description of this maze, which can be sent
+            to other processes in order to ``attach`` to it.
+        """
+        return {"name": self.shm.name, "layout": self.layout, "meta": self.meta}
+
+    @classmethod
+    def attach(cls, handle):
+        """
+            Attaches to a maze published by another process without copying
+            its data.
+
+            Parameters
+            ----------
+            handle: dict
+                The handle of the published maze.
+
+            Returns
+            -------
+                SharedMaze
+                The maze, whose arrays are read-only views on the shared
+                memory block.
+        """
+        shm = shared_memory.SharedMemory(name=handle["name"])
+        return cls(shm, handle["layout"], handle["meta"])
+
+    def _memoryview(self, key):
+        """
+            Returns the array with the given name as a memoryview of the
+            shared memory block.
+        """
+        offset, shape, dtype = self.layout[key]
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        view = self.shm.buf[offset:offset + nbytes]
+        self._views.append(view)
+        self._views.append(view.cast(dtype.char, shape))
+        return self._views[-1]
+
+    @property
+    def env_string(self):
+        """
+            The environment string of the labyrinth, as it is required for
+            the log files.
+        """
+        if self._env_string is None:
+            self._env_string = "\n".join(bytes(row).decode("utf-8") for row in self.grid)
+        return self._env_string
+
+    def create_environment(self):
+        """
+            Constructs a GridEnvironment using the shared data. Its tiles
+            are created on demand (see ``SharedTiles``), while all the
+            episode specific state is stored in the environment as usual.
+
+            Returns
+            -------
+                GridEnvironment
+                The newly created environment.
+        """
+        meta = self.meta
+        env = GridEnvironment(target=meta["goal"], initial_agent_pos=meta["start"],
+                              view_radius=meta["view_radius"], name=meta["name"],
+                              facing=meta["facing"])
+        env.tiles = SharedTiles(self._memoryview("grid"))
+        env._replaced_tiles()
+        env.size = self.grid.shape
+        env.env_string = self.env_string
+        env.target_distance = self._memoryview("distance")
+        # Fill the cache of the view cone offsets from the shared table
+        for i, facing in enumerate(FACINGS):
+            offsets = tuple(tuple(int(v) for v in offset)
+                            for offset in self.view_offsets[i, :self.view_counts[i]])
+            env._view_offsets[(facing, env.view_radius, env.size)] = offsets
+        return env
+
+    def close(self):
+        """
+            Detaches from the shared memory block. The environments created
+            from this maze cannot be used afterwards.
+        """
+        for key in self.layout:
+            setattr(self, key, None)
+        # release the views even if an environment still references them
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        try:
+            self.shm.close()
+        except BufferError:
+            # Some views are still referenced, e.g. by an environment and
+            # agent referencing each other, which were not collected yet
+            gc.collect()
+            self.shm.close()
+
+    def unlink(self):
+        """
+            Detaches from and frees the shared memory block. Should only be
+            called by the publishing process, once all workers are done.
+        """
+        self.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,25 +1,55 @@
 import argparse
+import os
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from json import load
 from operator import length_hint
 from turtle import position
-import numpy as np
 import pandas as pd
 import dataframe_image as dfi
 import matplotlib.pyplot as plt
 from matplotlib.colors import LogNorm
 import seaborn as sns
-from ast import literal_eval
 from cogmodel.gridEnvironment import GridEnvironment, NORTH, SOUTH, WEST, EAST
 from cogmodel import renderer
 from cogmodel import playback
+from cogmodel import labyrinths
+from cogmodel import seeding
+from cogmodel import frameExport
+from cogmodel.sharedMaze import SharedMaze
+from cogmodel.resultStore import ResultStore
+from cogmodel.evaluation import METRICS, EVALUATION_HEADER, MASTER_HEADER, \
+    compute_metrics, tile_statistics, format_run, format_aggregates, read_logging
+from cogmodel.aggregation import RunningStatistic
+from cogmodel.parsing import LOG_SECTIONS, tokenize, parse_token, parse_tuple
 from cogmodel.Agents.tremaux import tremaux
 from cogmodel.Agents.wallFollower import wallFollower
 from cogmodel.Agents.greedy_simple import greedy
+from cogmodel.Agents.greedyDistance import greedyDistance
 from cogmodel.Agents.directedTremaux import directedTremaux
 from cogmodel.Agents.simple import simple
-from cogmodel import log
+from cogmodel import log, flush
 
 VIEW_RADIUS = 5
+# default budgets per run, see GridEnvironment.set_budget
+MAX_ACTIONS = 50000
+MAX_REPEATS = 10
+# defaults of the adaptive number of runs ("-t auto")
+MIN_TIMES = 3
+MAX_TIMES = 100
+CI_WIDTH = 0.05
+CONVERGE_ON = ["totalActions", "pathlength"]
+# directory containing the outputs of the shards of a sweep, see "--shard"
+SHARD_DIR = "data/Agent_data/shards/"
+# folder containing the recordings of the participants and the folder their
+# evaluation is saved in, see "participants"
+PARTICIPANT_DATA = "data/Participant_data"
+PARTICIPANT_DIR = "data/Participant_evaluation/"
+
+AGENTS = {"wall_follower": wallFollower, "tremaux": tremaux,
+          "directedTremaux": directedTremaux, "simple": simple,
+          "greedy": greedy, "greedy_distance": greedyDistance}
 
 
 class pipeline(object):
@@ -28,100 +58,99 @@ class pipeline(object):
         self.agent_types = args.agent  # list of names of to be used agents
         self.playback = args.playback  # file path to .txt file containing playback
         self.labyrinth = args.labyrinth  # file path to .txt file containing labyrinths
-        self.times = max(el for el in [args.times, 1] if el is not None)
-        self.envs = []  # list of all grid environments
+        self.names = args.names  # names of labyrinths to be used from the labyrinth file
+        # number of runs per agent and labyrinth, None if it is chosen adaptively
+        self.times = None if args.times == "auto" else max(
+            el for el in [args.times, 1] if el is not None)
+        self.min_times = args.min_times  # minimum number of runs in adaptive mode
+        self.max_times = args.max_times  # maximum number of runs in adaptive mode
+        self.ci = args.ci  # relative half width of the confidence interval required in adaptive mode
+        self.converge_on = args.converge_on  # metrics that have to converge in adaptive mode
+        self.max_actions = args.max_actions  # maximum number of actions per run
+        self.max_time = args.max_time  # maximum wall clock time per run in seconds
+        self.max_repeats = args.max_repeats  # maximum number of repetitions of the same state per run
+        self.seed = args.seed  # seed of the whole sweep, the seeds of the single runs are derived from it
+        self.workers = args.workers  # number of worker processes
+        self.shard = args.shard  # (index, number of shards) if only a shard of the sweep should be run
+        self.command = args.command  # "merge" to merge the outputs of shards, "participants" to evaluate the recordings, "export" to export a playback file
+        self.participant_data = args.participant_data  # folder containing the recordings of the participants
+        self.plots = args.plots  # whether the graphs of each participant run are saved
+        self.output = args.output  # file a run is exported to by "export"
+        self.frame_step = args.frame_step  # only every frame_step-th state is exported
+        self.fps = args.fps  # frames per second of the exported run
+        self.start_step = args.seek  # number of actions skipped before the playback starts
+        self.speedup = args.speedup  # speedup of the playback compared to the recorded times
+        self.viewport = args.viewport  # (rows, columns) shown around the agent during playback, None for all
+        self.store_path = args.store  # path of the SQLite database the results are stored in
+        self.store = None  # ResultStore opened by the current process
+
+    def __getstate__(self):
+        # worker processes open their own connection to the result store
+        state = dict(self.__dict__)
+        state["store"] = None
+        return state
 
     def run(self):
         """
             Runs and controls pipeline
         """
 
-        if self.agent_types:
-            # setting up logging for "master file"
-            master_path = "data/Agent_data/overall_averages.csv"
-            header_string = "labID,agentID,totalActions,totalActionValue,totalMoves,totalTurns,totalNorth,totalEast,totalSouth," + \
-                            "totalWest,totalLeft,totalRight,totalTime,timePerAction,pathlength,totalVisitedGround,percVisitedGround," + \
-                            "minCogLoad,maxCogLoad,avCogLoad,startCogLoad,endCogLoad"  # ,labTime,labValue"
-            log(master_path, header_string)
-            # constricting environments, can be used for all runs if reset properly
-            self._construct_envs()
-            for env in self.envs:
-                # going over all agents that should be run
-                for agent_type in self.agent_types:
-                    match agent_type:
-                        case "wall_follower":
-                            for i in range(0, self.times):
-                                # setting log path of env
-                                log_path = "data/Agent_data/" + \
-                                    env.name + "_" + str(agent_type) + \
-                                    "/" + str(i) + "/logging.txt"
-                                env.set_logging(
-                                    path=log_path, agent_type=agent_type)
-                                # constructing agent and running it on env
-                                agent = wallFollower(env)
-                                agent.run()
-                                # resetting env
-                                env.reset()
-                            self._save_logging_info(env.name, str(agent_type))
-                        case "greedy":
-                            for i in range(0, self.times):
-                                # setting log path of env
-                                log_path = "data/Agent_data/" + \
-                                    env.name + "_" + str(agent_type) + \
-                                    "/" + str(i) + "/logging.txt"
-                                env.set_logging(
-                                    path=log_path, agent_type=agent_type)
-                                # constructing agent and running it on env
-                                agent = greedy(env)
-                                agent.run()
-                                # resetting env
-                                env.reset()
-                            self._save_logging_info(env.name, str(agent_type))
-                        case "tremaux":
-                            # running agent on env self.times times
-                            for i in range(0, self.times):
-                                # setting log path of env
-                                log_path = "data/Agent_data/" + \
-                                    env.name + "_" + str(agent_type) + \
-                                    "/" + str(i) + "/logging.txt"
-                                env.set_logging(
-                                    path=log_path, agent_type=agent_type)
-                                # constructing agent and running it on env
-                                agent = tremaux(env)
-                                agent.run()
-                                # resetting env
-                                env.reset()
-                            self._save_logging_info(env.name, str(agent_type))
-                        case "directedTremaux":
-                            # running agent on env self.times times
-                            for i in range(0, self.times):
-                                # setting log path of env
-                                log_path = "data/Agent_data/" + \
-                                    env.name + "_" + str(agent_type) + \
-                                    "/" + str(i) + "/logging.txt"
-                                env.set_logging(
-                                    path=log_path, agent_type=agent_type)
-                                # constructing agent and running it on env
-                                agent = directedTremaux(env)
-                                agent.run()
-                                # resetting env
-                                env.reset()
-                            self._save_logging_info(env.name, str(agent_type))
-                        case "simple":
-                            # running agent on env self.times times
-                            for i in range(0, self.times):
-                                # setting log path of env
-                                log_path = "data/Agent_data/" + \
-                                    env.name + "_" + str(agent_type) + \
-                                    "/" + str(i) + "/logging.txt"
-                                env.set_logging(
-                                    path=log_path, agent_type=agent_type)
-                                # constructing agent and running it on env
-                                agent = simple(env)
-                                agent.run()
-                                # resetting env
-                                env.reset()
-                            self._save_logging_info(env.name, str(agent_type))
+        if self.command == "merge":
+            return self._merge()
+        elif self.command == "participants":
+            return self._evaluate_participants()
+        elif self.command == "export":
+            if not self.playback or not self.output:
+                print("Exporting requires a log-file via '-p' and an output file via '--output'!")
+                return -1
+            return self._export()
+        elif self.agent_types:
+            if self.names:
+                if not self.labyrinth:
+                    print("Labyrinth names can only be used together with a labyrinth file via '-l'!")
+                    return -1
+                index = labyrinths.load_index(self.labyrinth)
+                unknown = [name for name in self.names if name not in index]
+                if unknown:
+                    print("Unknown labyrinth(s): {}".format(", ".join(unknown)))
+                    return -1
+            if self.shard is not None:
+                if self.store_path:
+                    print("Shards can not use a result store, as SQLite databases can not be "
+                          "shared between machines. Use 'pipeline.py merge' instead!")
+                    return -1
+                if self.times is None:
+                    print("Shards require a fixed number of runs via '-t n'!")
+                    return -1
+                if self.seed is None:
+                    print("All shards of a sweep have to use the same seed via '--seed'!")
+                    return -1
+                self._run_shard()
+                return
+            if not self.store_path:
+                self._save_master_header()
+            if self.seed is None:
+                self.seed = seeding.new_sweep_seed()
+                print("Using sweep seed {}".format(self.seed))
+            if self.workers > 1:
+                self._run_parallel()
+            else:
+                if self.store_path:
+                    self.store = ResultStore(self.store_path)
+                # environments are constructed just in time and released after
+                # all agents were run on them
+                for spec in self._iter_labyrinths():
+                    env = labyrinths.create_environment(spec, VIEW_RADIUS)
+                    # going over all agents that should be run
+                    for agent_type in self.agent_types:
+                        self._run_agent(env, agent_type)
+                    del env
+            if self.store_path:
+                # the .csv files are generated from the store at the end
+                if self.store is None:
+                    self.store = ResultStore(self.store_path)
+                self.store.export_csv("data/Agent_data/", sweep_seed=self.seed)
+                self.store.close()
         elif self.playback:
             self._playback()
         elif self.graph:
@@ -131,62 +160,309 @@ class pipeline(object):
                 "You either have to use an agent via '-a' or a playback file via '-p'!")
             return -1
 
-    def _construct_envs(self):
+    def _run_agent(self, env, agent_type):
         """
-            Reads labyrinth(s) from .txt file and creates fitting environments
+            Runs the given agent on the environment and saves the resulting
+            logging information. Each run is evaluated as soon as it is
+            finished, so that the number of runs can be chosen adaptively
+            (see ``_converged``).
+
+            Parameters
+            ----------
+            env: GridEnvironment
+                The environment the agent should be run on.
+            agent_type: str
+                The name of the agent, one of the keys of AGENTS.
+        """
+        env.set_budget(max_actions=self.max_actions, max_time=self.max_time,
+                       max_repeats=self.max_repeats)
+        # save header for .csv file
+        csv_path = "data/Agent_data/" + \
+            env.name + "_" + str(agent_type) + \
+            "/evaluation.csv"
+        if self.store is None:
+            log(csv_path, msg=EVALUATION_HEADER)
+
+        # used to aggregate the values of all runs, so they never have to be
+        # held in memory all at once
+        statistics = {metric: RunningStatistic() for metric in METRICS}
+        terminations = {}
+        i = 0
+        while not self._converged(statistics, i):
+            metrics, termination = self._run_once(env, agent_type, i, csv_path)
+            for metric in METRICS:
+                statistics[metric].add(metrics[metric])
+            terminations[termination] = terminations.get(termination, 0) + 1
+            i += 1
+        if self.times is None:
+            print("{} on {}: stopped after {} runs".format(agent_type, env.name, i))
+        if self.store is None:
+            self._save_aggregates(env.name, str(agent_type), statistics, terminations)
+
+    def _run_once(self, env, agent_type, number, csv_path):
+        """
+            Runs the given agent once on the environment and evaluates the
+            run, see ``_evaluate_run``.
+
+            Parameters
+            ----------
+            env: GridEnvironment
+                The environment the agent should be run on.
+            agent_type: str
+                The name of the agent, one of the keys of AGENTS.
+            number: int
+                The index of the run.
+            csv_path: str
+                The .csv file the metrics of the run are appended to.
+
+            Returns
+            -------
+            metrics: dict
+                The value of each metric in METRICS for this run.
+            termination: str
+                The reason the run ended.
+        """
+        # setting log path of env
+        log_path = "data/Agent_data/" + \
+            env.name + "_" + str(agent_type) + \
+            "/" + str(number) + "/logging.txt"
+        # every run gets its own reproducible random number generator
+        seed = seeding.derive_seed(self.seed, env.name, agent_type, number)
+        env.set_logging(path=log_path, agent_type=agent_type, seed=seed)
+        # constructing agent and running it on env
+        agent = AGENTS[agent_type](env, rng=seeding.make_rng(seed))
+        agent.run()
+        # resetting env
+        env.reset()
+        # make sure the log file is complete before evaluating it
+        flush()
+        return self._evaluate_run(env.name, str(agent_type), number, csv_path)
+
+    def _run_shard(self):
+        """
+            Runs the shard self.shard = (index, number of shards) of the sweep.
+            All (labyrinth, agent, run) jobs of the sweep are enumerated and
+            job k belongs to shard k % number of shards. As the enumeration only
+            depends on the arguments, all shards can be started independently,
+            e.g. on different machines sharing a filesystem.
+
+            Each shard appends the metrics of its runs to its own .csv file in
+            SHARD_DIR and finally writes a manifest listing its jobs, which
+            marks it as complete. The results are combined by "pipeline.py merge".
+        """
+        index, shards = self.shard
+        shard_path = SHARD_DIR + "shard_{}_of_{}".format(index, shards)
+        log(shard_path + ".csv", msg=EVALUATION_HEADER)
+
+        jobs = []
+        k = 0
+        for spec in self._iter_labyrinths():
+            env = None
+            for agent_type in self.agent_types:
+                for number in range(self.times):
+                    if k % shards == index:
+                        # environments are only created if the shard uses them
+                        if env is None:
+                            env = labyrinths.create_environment(spec, VIEW_RADIUS)
+                            env.set_budget(max_actions=self.max_actions, max_time=self.max_time,
+                                           max_repeats=self.max_repeats)
+                        self._run_once(env, agent_type, number, shard_path + ".csv")
+                        jobs.append([k, spec["name"], agent_type, number])
+                    k += 1
+            del env
+        flush()
+
+        manifest = {"shard": index, "shards": shards, "seed": self.seed,
+                    "times": self.times, "agents": self.agent_types,
+                    "labyrinth": self.labyrinth, "names": self.names,
+                    "jobs": jobs}
+        with open(shard_path + ".json", "w") as f:
+            json.dump(manifest, f)
+        print("Shard {} of {} finished {} of {} runs".format(index, shards, len(jobs), k))
+
+    def _merge(self):
+        """
+            Merges the outputs of all shards in SHARD_DIR into the usual
+            evaluation.csv file of each labyrinth + agent combination and the
+            "Master" .csv file. Reports shards that are not (yet) complete,
+            runs that are missing and runs that were done more than once.
+            Nothing is written if shards or runs are missing.
         """
+        manifests = []
+        if os.path.isdir(SHARD_DIR):
+            for file_name in sorted(os.listdir(SHARD_DIR)):
+                if file_name.endswith(".json"):
+                    with open(SHARD_DIR + file_name) as f:
+                        manifests.append(json.load(f))
+        if not manifests:
+            print("No finished shards found in {}!".format(SHARD_DIR))
+            return -1
+        # all shards have to belong to the same sweep
+        keys = ["shards", "seed", "times", "agents", "labyrinth", "names"]
+        sweep = {key: manifests[0][key] for key in keys}
+        for manifest in manifests:
+            if any(manifest[key] != sweep[key] for key in keys):
+                print("Shard {} belongs to a different sweep than shard {}!".format(
+                    manifest["shard"], manifests[0]["shard"]))
+                return -1
+
+        missing_shards = sorted(set(range(sweep["shards"])) - set(m["shard"] for m in manifests))
+        if missing_shards:
+            print("Missing shards: {}".format(", ".join(str(i) for i in missing_shards)))
+            return -1
 
-        def _add_env(self):
-            """
-                Initializes gridEnvs and adds them to envs list
-            """
-            env = GridEnvironment(target=goal_position, initial_agent_pos=start_position,
-                                  view_radius=VIEW_RADIUS, name=name, env_string=env_string, facing=facing)
-            self.envs.append(env)
+        # reading the metrics of all runs, keyed by (labID, agentID, run)
+        runs = {}
+        duplicates = []
+        for manifest in manifests:
+            path = SHARD_DIR + "shard_{}_of_{}.csv".format(manifest["shard"], sweep["shards"])
+            with open(path) as file:
+                while(line := file.readline()):
+                    if line.startswith("ID,"):
+                        # header, repeated if the shard was run again
+                        continue
+                    values = line.strip().split(",")
+                    key = (values[1], values[2], int(values[0]))
+                    if key in runs:
+                        duplicates.append(key)
+                        continue
+                    metrics = {metric: int(value) if value.lstrip("-").isdigit() else float(value)
+                               for metric, value in zip(METRICS, values[3:-1])}
+                    runs[key] = (metrics, values[-1])
+        for labID, agentID, number in duplicates:
+            print("Run {} of {} on {} was found more than once, using the first one".format(
+                number, agentID, labID))
+
+        jobs = sorted(job for manifest in manifests for job in manifest["jobs"])
+        missing = [(labID, agentID, number) for _, labID, agentID, number in jobs
+                   if (labID, agentID, number) not in runs]
+        if missing:
+            for labID, agentID, number in missing:
+                print("Run {} of {} on {} is missing".format(number, agentID, labID))
+            return -1
 
-        # information used to generate environment
-        env_string = ""
-        start_position = ()
-        goal_position = ()
-        facing = ""
-        name = ""
+        self._save_master_header()
+        pairs = []
+        for _, labID, agentID, _ in jobs:
+            if (labID, agentID) not in pairs:
+                pairs.append((labID, agentID))
+        for labID, agentID in pairs:
+            csv_path = "data/Agent_data/" + \
+                labID + "_" + agentID + \
+                "/evaluation.csv"
+            log(csv_path, msg=EVALUATION_HEADER)
+            statistics = {metric: RunningStatistic() for metric in METRICS}
+            terminations = {}
+            for number in range(sweep["times"]):
+                metrics, termination = runs[(labID, agentID, number)]
+                log(csv_path, msg=format_run(number, labID, agentID, metrics, termination))
+                for metric in METRICS:
+                    statistics[metric].add(metrics[metric])
+                terminations[termination] = terminations.get(termination, 0) + 1
+            self._save_aggregates(labID, agentID, statistics, terminations)
+        flush()
+        print("Merged {} runs of {} shards".format(len(jobs), sweep["shards"]))
+
+    def _run_parallel(self):
+        """
+            Runs all agents on all labyrinths using a pool of self.workers
+            processes. The static data of each labyrinth is published once
+            into shared memory (see ``SharedMaze``), which the workers attach
+            to instead of receiving their own copy. A labyrinth is released
+            as soon as all agents were run on it and at most self.workers
+            labyrinths are kept in shared memory at once.
+        """
+        # make sure the header of the master file is written before the workers start
+        flush()
+        pending = deque()  # (maze, futures) for each labyrinth in order of submission
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for spec in self._iter_labyrinths():
+                    maze = SharedMaze.publish(spec, VIEW_RADIUS)
+                    futures = [pool.submit(_run_shared_agent, self, maze.handle, agent_type)
+                               for agent_type in self.agent_types]
+                    pending.append((maze, futures))
+                    while len(pending) > self.workers:
+                        self._release_maze(*pending.popleft())
+                while pending:
+                    self._release_maze(*pending.popleft())
+        finally:
+            # make sure no shared memory is leaked if a worker failed
+            for maze, _ in pending:
+                maze.unlink()
+
+    def _release_maze(self, maze, futures):
+        """
+            Waits until all runs on the given shared maze are finished and
+            frees its shared memory afterwards.
+
+            Parameters
+            ----------
+            maze: SharedMaze
+                The published maze.
+            futures: list
+                The futures of the jobs running on the maze.
+        """
+        try:
+            for future in futures:
+                # re-raises errors of the worker
+                future.result()
+        finally:
+            maze.unlink()
+
+    def _converged(self, statistics, runs):
+        """
+            Decides whether further runs of an agent on a labyrinth are
+            necessary. With a fixed number of runs, exactly self.times runs
+            are made. In adaptive mode, runs are scheduled until the half width
+            of the 95% confidence interval of each metric in self.converge_on is
+            at most self.ci times its mean, or until self.max_times runs were made.
+            Metrics that had the same value in all of the (at least
+            self.min_times) runs are considered converged, so deterministic
+            agents stop after self.min_times runs.
+
+            Parameters
+            ----------
+            statistics: dict
+                A RunningStatistic for each metric in METRICS.
+            runs: int
+                The number of runs made so far.
+
+            Returns
+            -------
+                bool
+                True if no further runs are necessary.
+        """
+        if self.times is not None:
+            return runs >= self.times
+        if runs < self.min_times:
+            return False
+        if runs >= self.max_times:
+            return True
+        for metric in self.converge_on:
+            stat = statistics[metric]
+            if stat.min == stat.max:
+                continue
+            if stat.confidence_interval(0.95) > self.ci * abs(stat.mean):
+                return False
+        return True
+
+    def _iter_labyrinths(self):
+        """
+            Yields the specifications of all labyrinths that should be used,
+            see ``labyrinths.iter_labyrinths``. If no labyrinth file was
+            given, only the default labyrinth is yielded. If names were
+            given, only the labyrinths with these names are loaded using the
+            index of the labyrinth file.
+        """
 
         # use user labyrinth if given
         if self.labyrinth:
-
-            # opening and reading file
-            with open(args.labyrinth) as file:
-                read_point = 0
-                while(line := file.readline()):
-                    if line in ["EnvString:\n", "Goal:\n", "Start:\n", "Facing:\n", "Name:\n"]:
-                        read_point += 1
-                    else:
-                        match read_point:
-                            case 1:
-                                env_string += line
-                            case 2:
-                                goal_position = literal_eval(line.strip())
-                            case 3:
-                                start_position = literal_eval(line.strip())
-                            case 4:
-                                facing = literal_eval(line.strip())
-                            case 5:
-                                env_string = env_string.strip()
-                                name = line.strip()
-                                _add_env(self)
-                                read_point = 0
-                                env_string = ""
-                                start_position = ()
-                                goal_position = ()
-                                facing = ""
-                                name = ""
-                            case _:
-                                print(
-                                    "Something went wrong while trying to read the labyrinth file.")
-                                return -1
-
-            # closing file
-            file.close()
+            if self.names:
+                for name in self.names:
+                    yield labyrinths.load_labyrinth(self.labyrinth, name)
+            else:
+                yield from labyrinths.iter_labyrinths(self.labyrinth)
         else:  # use default labyrinth
             env_string = "##############################\n" + \
                 "#gg###g#ggggg#ggg#gggggggggg##\n" + \
@@ -218,365 +494,188 @@ class pipeline(object):
                 "##g#g#ggggg#gg#g#ggg##g##g#g##\n" + \
                 "#gggggg#g#gg#g#g#g#gg#ggggggg#\n" + \
                 "##############################"
-            start_position = (28, 1)
-            goal_position = (3, 28)
-            facing = (0, 1)
-            name = "Default_Labyrinth"
-            _add_env(self)
+            yield {"env_string": env_string, "goal": (3, 28), "start": (28, 1),
+                   "facing": (0, 1), "name": "Default_Labyrinth"}
 
-    def _save_logging_info(self, labID, agentID):
+    def _evaluate_run(self, labID, agentID, number, csv_path=None):
         """
-            Goes over logging files and add save information as graphs and in .csv file.
-            Also saves average in same .csv file and in "Master" .csv file
+            Reads the logging file of a single run, saves its information as graphs and
+            appends it to the .csv file of the labID + agentID combination.
 
             Parameters
             ----------
             labID: str
-                The name of the labyrinth for which information will get saved. Need to determine path names.
+                The name of the labyrinth of the run.
             agentID: str
-                The name of the strategy for which information will get saved. Need to determine path names.
+                The name of the strategy of the run.
+            number: int
+                The index of the run.
+            csv_path: str, optional (Default: None)
+                The .csv file the metrics are appended to. Defaults to the
+                evaluation.csv file of the labID + agentID combination. Not
+                used if the results are saved in a result store.
+
+            Returns
+            -------
+            metrics: dict
+                The value of each metric in METRICS for this run.
+            termination: str
+                The reason the run ended.
         """
+        if csv_path is None:
+            csv_path = "data/Agent_data/" + \
+                labID + "_" + agentID + \
+                "/evaluation.csv"
+        # path where file can be found
+        log_path = "data/Agent_data/" + \
+            labID + "_" + agentID + \
+            "/" + str(number) + "/logging.txt"
+        # path where graphs should be saved
+        save_path = "data/Agent_data/" + \
+            labID + "_" + agentID + \
+            "/" + str(number)
+        # reading log file and saving important metrics
+        action_types, positions, time, load, length, action_values, lab, termination = self._read_logging(
+            path=log_path)
+
+        metrics = compute_metrics(action_types, positions, time, load, length, action_values, lab)
+        save_plots(save_path, metrics, *tile_statistics(positions, time, lab))
+
+        # --- SAVING INFORMATION IN .CSV FILE ---
+        if self.store is not None:
+            trajectory = {"actions": action_types, "positions": positions, "time": time,
+                          "load": load, "length": length, "action_values": action_values}
+            self.store.add_run(labID, agentID, number, metrics, termination,
+                               seed=seeding.derive_seed(self.seed, labID, agentID, number),
+                               sweep_seed=self.seed, trajectory=trajectory)
+        else:
+            log(csv_path, msg=format_run(number, labID, agentID, metrics, termination))
 
-        # save header for .csv file
+        return metrics, termination
+
+    def _evaluate_participants(self):
+        """
+            Replays the recordings of all participants headlessly and saves
+            the same metrics as for the agents into an evaluation.csv file
+            for each condition (in PARTICIPANT_DIR, with the participants as
+            run IDs) and an overall_averages.csv file. The conditions are
+            evaluated in parallel using the given number of workers. The
+            graphs of each run are only saved when using "--plots".
+        """
+        conditions = playback.crawl_results(self.participant_data, workers=self.workers)
+        if not conditions:
+            print("No recordings found in {}!".format(self.participant_data))
+            return -1
+        master_path = PARTICIPANT_DIR + "overall_averages.csv"
+        log(master_path, msg=MASTER_HEADER)
+        with ProcessPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+            futures = {condition: executor.submit(_evaluate_condition, condition,
+                                                  experiments, self.plots)
+                       for condition, experiments in sorted(conditions.items())}
+            for condition, future in futures.items():
+                csv_path = PARTICIPANT_DIR + condition + "_participant/evaluation.csv"
+                log(csv_path, msg=EVALUATION_HEADER)
+                statistics = {metric: RunningStatistic() for metric in METRICS}
+                terminations = {}
+                for user, metrics, termination in future.result():
+                    log(csv_path, msg=format_run(user, condition, "participant",
+                                                 metrics, termination))
+                    for metric in METRICS:
+                        statistics[metric].add(metrics[metric])
+                    terminations[termination] = terminations.get(termination, 0) + 1
+                rows, master_row = format_aggregates(condition, "participant",
+                                                     statistics, terminations)
+                for row in rows:
+                    log(csv_path, msg=row)
+                log(master_path, msg=master_row)
+        flush()
+        print("Evaluated {} runs in {} conditions".format(
+            sum(len(experiments) for experiments in conditions.values()), len(conditions)))
+
+    def _save_master_header(self):
+        """
+            Saves the header of the "Master" .csv file.
+        """
+        master_path = "data/Agent_data/overall_averages.csv"
+        log(master_path, msg=MASTER_HEADER)
+
+    def _save_aggregates(self, labID, agentID, statistics, terminations):
+        """
+            Saves the average, standard deviation and half width of the 95% confidence
+            interval of all metrics in the .csv file of the labID + agentID combination
+            and the average row in the "Master" .csv file.
+
+            Parameters
+            ----------
+            labID: str
+                The name of the labyrinth.
+            agentID: str
+                The name of the strategy.
+            statistics: dict
+                A RunningStatistic for each metric in METRICS.
+            terminations: dict
+                The number of runs that ended for each termination reason.
+        """
         csv_path = "data/Agent_data/" + \
             labID + "_" + agentID + \
             "/evaluation.csv"
         master_path = "data/Agent_data/overall_averages.csv"
-        header_string = "ID,labID,agentID,totalActions,totalActionValue,totalMoves,totalTurns,totalNorth,totalEast,totalSouth," + \
-            "totalWest,totalLeft,totalRight,totalTime,timePerAction,pathlength,totalVisitedGround,percVisitedGround," + \
-            "minCogLoad,maxCogLoad,avCogLoad,startCogLoad,endCogLoad"  # ,labTime,labValue"
-        log(csv_path, msg=header_string)
-
-        # used to save values for all i iterations so averages can be calculated
-        totalActions = []
-        totalActionValue = []
-        totalMoves = []
-        totalTurns = []
-        totalNorth = []
-        totalEast = []
-        totalSouth = []
-        totalWest = []
-        totalLeft = []
-        totalRight = []
-        totalTime = []
-        totalTimePerAction = []
-        pathlength = []
-        totalVisitedGround = []
-        percVisitedGround = []
-        minCogLoad = []
-        maxCogLoad = []
-        avCogLoad = []
-        startCogLoad = []
-        endCogLoad = []
-
-        # going over all log files that belong to labID + agentID combination
-        for number in range(0, self.times):
-            # path where file can be found
-            log_path = "data/Agent_data/" + \
-                labID + "_" + agentID + \
-                "/" + str(number) + "/logging.txt"
-            # path where graphs should be saved
-            save_path = "data/Agent_data/" + \
-                labID + "_" + agentID + \
-                "/" + str(number)
-            # reading log file and saving important metrics
-            action_types = []
-            positions = []
-            time = []
-            load = []
-            length = []
-            action_values = []
-            lab = []
-
-            action_types, positions, time, load, length, action_values, lab = self._read_logging(
-                path=log_path)
-
-            # --- PREPARING DATA FOR PLOTS ---
-            # getting information about action types
-            overall_actions = len(action_types)
-            totalActions.append(overall_actions)
-            unique, counts = np.unique(action_types, return_counts=True)
-            action_dict = dict(zip(unique, counts))
-            move_number = int(action_dict.get(
-                'NORTH') or 0) + int(action_dict.get('EAST') or 0) + int(action_dict.get('SOUTH') or 0) + int(action_dict.get('WEST') or 0)
-            totalMoves.append(move_number)
-            turn_number = int(action_dict.get(
-                'TURN LEFT') or 0) + int(action_dict.get('TURN RIGHT') or 0)
-            totalTurns.append(turn_number)
-            north_number = int(action_dict.get(
-                'NORTH') or 0)
-            totalNorth.append(north_number)
-            east_number = int(action_dict.get('EAST') or 0)
-            totalEast.append(east_number)
-            south_number = int(action_dict.get('SOUTH') or 0)
-            totalSouth.append(south_number)
-            west_number = int(action_dict.get('WEST') or 0)
-            totalWest.append(west_number)
-            left_number = int(action_dict.get('TURN LEFT') or 0)
-            totalLeft.append(left_number)
-            right_number = int(action_dict.get('TURN RIGHT') or 0)
-            totalRight.append(right_number)
-
-            # getting time information
-            acc_time = np.cumsum(time)
-            time_total = acc_time[-1]/1000000  # milliseconds
-            totalTime.append(time_total)
-            time_per_action = time_total/overall_actions  # milliseconds
-            totalTimePerAction.append(time_per_action)
-
-            # getting action information
-            unique_data = [list(x) for x in set(tuple(x) for x in positions)]
-            visited_total = len(unique_data)
-            totalVisitedGround.append(visited_total)
-            path_length = length[-1]
-            pathlength.append(path_length)
-
-            # getting total action value
-            total_action_value = np.cumsum(action_values)[-1]
-            totalActionValue.append(total_action_value)
-
-            # getting load information
-            min_load = load.min()
-            minCogLoad.append(min_load)
-            max_load = load.max()
-            maxCogLoad.append(max_load)
-            av_load = np.mean(load)
-            avCogLoad.append(av_load)
-            start_load = load[0]
-            startCogLoad.append(start_load)
-            end_load = load[-1]
-            endCogLoad.append(end_load)
-
-            # preparing labyrinth into dict with time and into dict with visited value
-            lab_time = dict()
-            lab_value = dict()
-            number_walls = 0
-            number_non_walls = 0
-            for i in range(0, len(lab)):
-                for j in range(0, len(lab[i])):
-                    if lab[i][j] == '#':
-                        lab_time[(i, j)] = -1
-                        lab_value[(i, j)] = -1
-                        number_walls += 1
-                    else:
-                        lab_time[(i, j)] = 0
-                        lab_value[(i, j)] = 0
-                        number_non_walls += 1
-            for i in range(0, len(positions)):
-                lab_value[tuple(positions[i])] += 1
-                lab_time[tuple(positions[i])] += time[i] / \
-                    1000000  # milliseconds
-
-            visited_perc = visited_total/number_non_walls
-            percVisitedGround.append(visited_perc)
-
-            # --- PLOTS ---
-            # Heatmap action-amount per ground tile and time per ground tile
-            ser = pd.Series(list(lab_value.values()),
-                            index=pd.MultiIndex.from_tuples(lab_value.keys()))
-            df = ser.unstack().fillna(0)
-            ser = pd.Series(list(lab_time.values()),
-                            index=pd.MultiIndex.from_tuples(lab_time.keys()))
-            df2 = ser.unstack().fillna(0)
-            fig, ax = plt.subplots(1, 2, figsize=(25, 10))
-            plt1 = sns.heatmap(df, vmin=-1, vmax=max(lab_value.values()),
-                               cmap="Blues", ax=ax[0], cbar_kws={'label': 'Number of visits'})
-            plt1.collections[0].colorbar.set_label("Visit amount on tile")
-            plt1.collections[0].colorbar.ax.tick_params(labelsize=15)
-            plt1.figure.axes[-1].yaxis.label.set_size(20)
-            plt1.xaxis.tick_top()
-            plt2 = sns.heatmap(df2, vmin=-1, vmax=max(lab_time.values()),
-                               cmap="Blues", norm=LogNorm(), ax=ax[1])
-            plt2.collections[0].colorbar.set_label("Time on tile in ms")
-            plt2.xaxis.tick_top()
-            plt2.collections[0].colorbar.ax.tick_params(labelsize=15)
-            plt2.figure.axes[-1].yaxis.label.set_size(20)
-            ax[0].set_title('Number of actions on tile',
-                            fontsize=25, fontweight="bold", y=1.08)
-            ax[1].set_title('Time on tile', fontsize=25,
-                            fontweight="bold", y=1.08)
-
-            fig.figure.savefig(save_path + '/heatmaps.png')
-
-            # Action types table
-            df = pd.DataFrame([['TOTAL', overall_actions],
-                               ["Total moves", move_number],
-                               ["Total turns", turn_number],
-                               ['North', north_number],
-                               ['East', east_number],
-                               ['South', south_number],
-                               ['West', west_number],
-                               ["Turn left", left_number],
-                               ["Turn right", right_number]],
-                              columns=['Action type', 'Amount'])
-
-            df = df.style.set_table_styles([
-                {
-                    "selector": "thead",
-                    "props": "background-color:whitesmoke; border-top: 2 px solid black;"
-                },
-                {
-                    "selector": ".row0, .row2, .row6",
-                    "props": "border-bottom: 2px solid black"
-                }
-            ]).background_gradient().hide_index()
-            dfi.export(df, save_path + '/action_types.png')
-
-            # Cognitive load table
-            df = pd.DataFrame.from_dict({'Minimal cognitive load': min_load,
-                                        "Maximal cognitive load": max_load,
-                                         "Average cognitive load": av_load,
-                                         'Cognitive load start': start_load,
-                                         'Cognitive load end': end_load}, orient="index")
-
-            df = df.style.set_table_styles([
-                {
-                    "selector": "thead",
-                    "props": "display:none"
-                },
-                {
-                    "selector": ".row2",
-                    "props": "border-bottom: 2px solid black"
-                },
-                {"selector": "tbody td", "props": "border-left: 1px solid black"},
-            ]).highlight_max(color='#63a2cb')
-            dfi.export(df, save_path + '/cognitive_load.png')
-
-            # General information table
-            df = pd.DataFrame.from_dict({'Time in total': '{:,.5} ms'.format(time_total),
-                                        "Actions in total": overall_actions,
-                                         "Action value in total": total_action_value,
-                                         "Time per action": '{:,.3} ms'.format(time_per_action),
-                                         'Path length': path_length,
-                                         'Visited ground tiles in total': visited_total,
-                                         'Percentage of visited ground tiles': '{:,.2%}'.format(visited_perc)}, orient="index")
-
-            df = df.style.set_table_styles([
-                {
-                    "selector": "thead",
-                    "props": "display:none"
-                },
-                {
-                    "selector": ".row3",
-                    "props": "border-bottom: 2px solid black"
-                },
-                {"selector": "tbody td", "props": "border-left: 1px solid black"},
-            ])
-            dfi.export(df, save_path + '/general_information.png')
-
-            # --- SAVING INFORMATION IN .CSV FILE ---
-            information_string = str(number) + ',' + labID + ',' + agentID + ',' + str(overall_actions) + ',' + str(total_action_value) + ',' + str(move_number) + ',' + str(turn_number) + ',' + str(north_number) + ',' + \
-                str(east_number) + ',' + str(south_number) + ',' + str(west_number) + ',' + str(left_number) + ',' + str(right_number) + ',' + str(time_total) + ',' + \
-                str(time_per_action) + ',' + str(path_length) + ',' + str(visited_total) + ',' + str(visited_perc) + ',' + str(min_load) + ',' + str(max_load) + ',' + \
-                str(av_load) + ',' + str(start_load) + ',' + \
-                str(end_load)  # + ',' + str(lab_time) + ',' + str(lab_value)
-            log(csv_path, msg=information_string)
-
-        # --- CALCULATING AVERAGE AND SAVING IT ---
-        # used to save values for all i iterations so averages can be calculated
-        totalActions = np.mean(totalActions)
-        totalActionValue = np.mean(totalActionValue)
-        totalMoves = np.mean(totalMoves)
-        totalTurns = np.mean(totalTurns)
-        totalNorth = np.mean(totalNorth)
-        totalEast = np.mean(totalEast)
-        totalSouth = np.mean(totalSouth)
-        totalWest = np.mean(totalWest)
-        totalLeft = np.mean(totalLeft)
-        totalRight = np.mean(totalRight)
-        totalTime = np.mean(totalTime)
-        totalTimePerAction = np.mean(totalTimePerAction)
-        pathlength = np.mean(pathlength)
-        totalVisitedGround = np.mean(totalVisitedGround)
-        percVisitedGround = np.mean(percVisitedGround)
-        minCogLoad = np.mean(minCogLoad)
-        maxCogLoad = np.mean(maxCogLoad)
-        avCogLoad = np.mean(avCogLoad)
-        startCogLoad = np.mean(startCogLoad)
-        endCogLoad = np.mean(endCogLoad)
-
-        information_string = str(self.times) + ',' + labID + ',' + 'AVERAGE' + ',' + str(totalActions) + ',' + str(totalActionValue) + ',' + str(totalMoves) + ',' + str(totalTurns) + ',' + str(totalNorth) + ',' + str(totalEast) + ',' + str(totalSouth) + ',' + str(totalWest) + ',' + str(totalLeft) + ',' + str(
-            totalRight) + ',' + str(totalTime) + ',' + str(totalTimePerAction) + ',' + str(pathlength) + ',' + str(totalVisitedGround) + ',' + str(percVisitedGround) + ',' + str(minCogLoad) + ',' + str(maxCogLoad) + ',' + str(avCogLoad) + ',' + str(startCogLoad) + ',' + str(endCogLoad)  # + ',' + str(lab_time) + ',' + str(lab_value)
-        log(csv_path, msg=information_string)
-
-        information_string = labID + ',' + agentID + ',' + str(totalActions) + ',' + str(totalActionValue) + ',' + str(totalMoves) + ',' + str(totalTurns) + ',' + str(totalNorth) + ',' + str(totalEast) + ',' + str(totalSouth) + ',' + str(totalWest) + ',' + str(totalLeft) + ',' + str(
-            totalRight) + ',' + str(totalTime) + ',' + str(totalTimePerAction) + ',' + str(pathlength) + ',' + str(totalVisitedGround) + ',' + str(percVisitedGround) + ',' + str(minCogLoad) + ',' + str(maxCogLoad) + ',' + str(avCogLoad) + ',' + str(startCogLoad) + ',' + str(endCogLoad)  # + ',' + str(lab_time) + ',' + str(lab_value)
-        log(master_path, msg=information_string)
+        rows, master_row = format_aggregates(labID, agentID, statistics, terminations)
+        for row in rows:
+            log(csv_path, msg=row)
+        log(master_path, msg=master_row)
 
     def _read_logging(self, path):
         """
-            Reads logging information from logfile given by path.
+            Reads logging information from logfile given by path, see
+            ``evaluation.read_logging``.
+        """
+        return read_logging(path)
 
-        Parameters
-        ---------------------------------------------------------------------------------
-        path: str
-           Place where log file is saved.
+    def _load_playback(self):
+        """
+            Reads the logging file given by user and constructs the
+            environment and the playback agent replaying it.
+        """
+        env_rows = []
+        action_rows = []
+        with open(self.playback) as file:
+            for token in tokenize(file, LOG_SECTIONS, actions=True):
+                match token.section:
+                    case "EnvString":
+                        env_rows.append(token.text)
+                    case "Goal":
+                        goal_position = parse_token(parse_tuple, token, self.playback)
+                    case "StartPosition":
+                        start_position = parse_token(parse_tuple, token, self.playback)
+                    case "Facing":
+                        facing = parse_token(parse_tuple, token, self.playback)
+                    case "AgentType":
+                        agent_type = token.text.strip()
+                    case "Actions":
+                        action_rows.append(token.text)
+                    case "Position":
+                        # the trajectory following the actions is not needed
+                        break
+        env_string = "\n".join(env_rows)
 
-        Returns
-        ---------------------------------------------------------------------------------
-        action_types: list(String)
-            List containing all actions taken after each other. Eg ['NORTH', 'EAST']
-        positions: list((int,int))
-            List of positions agent visited after each other
-        time: list(int)
-            List of times agent took in step i. (in nano seconds)
-        load: list(int)
-            List of cognitive loads agent had at step i.
-        length: list(int)
-            List of pathlengths at time i.            
-        action_values: list(float)
-            List of action values at step i.
-        lab: list(String)
-            List containing strings of labyrinth rows. String at i is labyrinth row i.s    
-        """
-        action_types = []
-        positions = []
-        time = []
-        load = []
-        length = []
-        action_values = []
-        lab = []
-        # opening and reading file
-        with open(path) as file:
-            read_point = 0
-            while(line := file.readline()):
-                if line in ["EnvString:\n", "Goal:\n", "Position:\n", "Time:\n", "Load:\n", "Length:\n", "Action:\n"]:
-                    read_point += 1
-                elif "Condition starting" in line:
-                    read_point += 1
-                elif "Condition finished" in line:
-                    file.readline()
-                else:
-                    match read_point:
-                        case 0:
-                            continue
-                        case 1:
-                            lab.append(line.strip())
-                        case 2:
-                            continue
-                        case 3:
-                            date_split = line.find(": ")+2
-                            action_types.append(line[date_split:].strip())
-                        case 4:
-                            positions = np.array(literal_eval(line.strip()))
-                        case 5:
-                            time = np.array(literal_eval(line.strip()))
-                        case 6:
-                            load = np.array(literal_eval(line.strip()))
-                        case 7:
-                            length = np.array(literal_eval(line.strip()))
-                        case 8:
-                            action_values = np.array(
-                                literal_eval(line.strip()))
-                        case _:
-                            print(
-                                "Something went wrong while trying to read the log file.")
-                            return -1
-
-        # closing file
-        file.close()
-        # returning info
-        return action_types, positions, time, load, length, action_values, lab
+        # TODO check if envString still works with real log files
+        env = GridEnvironment(target=goal_position, initial_agent_pos=start_position,
+                              view_radius=VIEW_RADIUS, name="playback_lab", env_string=env_string, facing=facing)
+        playback_agent = playback.PlaybackAgent(
+            agent_id=agent_type, action_rows=action_rows, start_pos=start_position, environment=env)
+        return env, playback_agent
+
+    def _export(self):
+        """
+            Renders the logging file given by user headlessly and saves it
+            as a GIF or video (or a sequence of images), see
+            ``frameExport.export_run``.
+        """
+        env, playback_agent = self._load_playback()
+        path = frameExport.export_run(env, playback_agent, self.output, frame_step=self.frame_step,
+                                      workers=self.workers, fps=self.fps)
+        print("Exported run to {}".format(path))
 
     def _playback(self):
         """
@@ -585,74 +684,259 @@ class pipeline(object):
 
         # --- SET-UP ---
         # reading in information to construct playback agent
-        env_string = ""
-        action_rows = []
-        # not the most elegant way, but works I guess
-        with open(args.playback) as file:
-            read_point = 0
-            while(line := file.readline()):
-                if line in ["EnvString:\n", "Goal:\n", "StartPosition:\n", "Facing:\n", "Name:\n", "AgentType:\n"]:
-                    read_point += 1
-                elif "Condition starting" in line:
-                    action_rows.append(line)
-                    read_point += 1
-                elif "Condition finished" in line:
-                    action_rows.append(line)
-                    break
-                else:
-                    match read_point:
-                        case 0:
-                            continue
-                        case 1:
-                            env_string += line
-                        case 2:
-                            goal_position = literal_eval(line.strip())
-                        case 3:
-                            start_position = literal_eval(line.strip())
-                        case 4:
-                            facing = literal_eval(line.strip())
-                        case 5:
-                            name = line.strip()
-                        case 6:
-                            agent_type = line.strip()
-                        case 7:
-                            action_rows.append(line)
-                        case 8:
-                            break
-                        case _:
-                            print(
-                                "Something went wrong while trying to read the labyrinth file.")
-                            return -1
-
-        # closing file
-        file.close()
+        env, playback_agent = self._load_playback()
 
         # --- PLAYBACK ---
         if renderer.pygame_available:
-            rend = renderer.PygameRenderer()
+            rend = renderer.PygameRenderer(viewport=self.viewport)
         else:
-            rend = renderer.MatplotlibRenderer()
-
-        # TODO check if envString still works with real log files
-        env = GridEnvironment(target=goal_position, initial_agent_pos=start_position,
-                              view_radius=VIEW_RADIUS, name="playback_lab", env_string=env_string[:-1], facing=facing)
-        playback_agent = playback.PlaybackAgent(
-            agent_id=agent_type, action_rows=action_rows, start_pos=start_position, environment=env)
+            rend = renderer.MatplotlibRenderer(viewport=self.viewport)
+        playback_agent.build_keyframes()
+        if self.start_step:
+            playback_agent.seek(self.start_step)
 
         rend.plot(grid=env.get_view_cone(playback=True), agent=env.agent_pos,
                   facing=env.facing_direction, show_trajectory=True)
 
-        def my_callback(pos):
+        def my_callback(pos, facing, passed):
+            # the replay does not change the environment, so only the state
+            # of the agent has to be set
+            env.agent_pos = pos
+            env.facing_direction = facing
+            rend.past_positions.extend(passed)
             rend.plot(grid=env.get_view_cone(playback=True), agent=pos,
-                      facing=env.facing_direction, show_trajectory=True)
+                      facing=facing, show_trajectory=True)
             # To allow for event handling and matplotlib updates
             rend.pause(0.001)
 
-        playback_agent.replay(my_callback, speedup=1)
+        playback_agent.replay_async(my_callback, speedup=self.speedup)
 
         renderer.show()
 
 
+def save_plots(save_path, metrics, lab_value, lab_time):
+    """
+        Saves the graphs of a single run (heatmaps.png, action_types.png,
+        cognitive_load.png and general_information.png).
+
+        Parameters
+        ----------
+        save_path: str
+            The folder of the run the graphs are saved in.
+        metrics: dict
+            The value of each metric in METRICS for the run.
+        lab_value: dict
+            The number of visits for each position, see ``tile_statistics``.
+        lab_time: dict
+            The time spent on each position, see ``tile_statistics``.
+    """
+    # --- PREPARING DATA FOR PLOTS ---
+    overall_actions = metrics["totalActions"]
+    move_number = metrics["totalMoves"]
+    turn_number = metrics["totalTurns"]
+    north_number = metrics["totalNorth"]
+    east_number = metrics["totalEast"]
+    south_number = metrics["totalSouth"]
+    west_number = metrics["totalWest"]
+    left_number = metrics["totalLeft"]
+    right_number = metrics["totalRight"]
+    time_total = metrics["totalTime"]
+    time_per_action = metrics["timePerAction"]
+    path_length = metrics["pathlength"]
+    visited_total = metrics["totalVisitedGround"]
+    visited_perc = metrics["percVisitedGround"]
+    total_action_value = metrics["totalActionValue"]
+    min_load = metrics["minCogLoad"]
+    max_load = metrics["maxCogLoad"]
+    av_load = metrics["avCogLoad"]
+    start_load = metrics["startCogLoad"]
+    end_load = metrics["endCogLoad"]
+
+    # --- PLOTS ---
+    # Heatmap action-amount per ground tile and time per ground tile
+    ser = pd.Series(list(lab_value.values()),
+                    index=pd.MultiIndex.from_tuples(lab_value.keys()))
+    df = ser.unstack().fillna(0)
+    ser = pd.Series(list(lab_time.values()),
+                    index=pd.MultiIndex.from_tuples(lab_time.keys()))
+    df2 = ser.unstack().fillna(0)
+    fig, ax = plt.subplots(1, 2, figsize=(25, 10))
+    plt1 = sns.heatmap(df, vmin=-1, vmax=max(lab_value.values()),
+                       cmap="Blues", ax=ax[0], cbar_kws={'label': 'Number of visits'})
+    plt1.collections[0].colorbar.set_label("Visit amount on tile")
+    plt1.collections[0].colorbar.ax.tick_params(labelsize=15)
+    plt1.figure.axes[-1].yaxis.label.set_size(20)
+    plt1.xaxis.tick_top()
+    plt2 = sns.heatmap(df2, vmin=-1, vmax=max(lab_time.values()),
+                       cmap="Blues", norm=LogNorm(), ax=ax[1])
+    plt2.collections[0].colorbar.set_label("Time on tile in ms")
+    plt2.xaxis.tick_top()
+    plt2.collections[0].colorbar.ax.tick_params(labelsize=15)
+    plt2.figure.axes[-1].yaxis.label.set_size(20)
+    ax[0].set_title('Number of actions on tile',
+                    fontsize=25, fontweight="bold", y=1.08)
+    ax[1].set_title('Time on tile', fontsize=25,
+                    fontweight="bold", y=1.08)
+
+    fig.figure.savefig(save_path + '/heatmaps.png')
+    plt.close(fig)
+
+    # Action types table
+    df = pd.DataFrame([['TOTAL', overall_actions],
+                       ["Total moves", move_number],
+                       ["Total turns", turn_number],
+                       ['North', north_number],
+                       ['East', east_number],
+                       ['South', south_number],
+                       ['West', west_number],
+                       ["Turn left", left_number],
+                       ["Turn right", right_number]],
+                      columns=['Action type', 'Amount'])
+
+    df = df.style.set_table_styles([
+        {
+            "selector": "thead",
+            "props": "background-color:whitesmoke; border-top: 2 px solid black;"
+        },
+        {
+            "selector": ".row0, .row2, .row6",
+            "props": "border-bottom: 2px solid black"
+        }
+    ]).background_gradient().hide_index()
+    dfi.export(df, save_path + '/action_types.png')
+
+    # Cognitive load table
+    df = pd.DataFrame.from_dict({'Minimal cognitive load': min_load,
+                                "Maximal cognitive load": max_load,
+                                 "Average cognitive load": av_load,
+                                 'Cognitive load start': start_load,
+                                 'Cognitive load end': end_load}, orient="index")
+
+    df = df.style.set_table_styles([
+        {
+            "selector": "thead",
+            "props": "display:none"
+        },
+        {
+            "selector": ".row2",
+            "props": "border-bottom: 2px solid black"
+        },
+        {"selector": "tbody td", "props": "border-left: 1px solid black"},
+    ]).highlight_max(color='#63a2cb')
+    dfi.export(df, save_path + '/cognitive_load.png')
+
+    # General information table
+    df = pd.DataFrame.from_dict({'Time in total': '{:,.5} ms'.format(time_total),
+                                "Actions in total": overall_actions,
+                                 "Action value in total": total_action_value,
+                                 "Time per action": '{:,.3} ms'.format(time_per_action),
+                                 'Path length': path_length,
+                                 'Visited ground tiles in total': visited_total,
+                                 'Percentage of visited ground tiles': '{:,.2%}'.format(visited_perc)}, orient="index")
+
+    df = df.style.set_table_styles([
+        {
+            "selector": "thead",
+            "props": "display:none"
+        },
+        {
+            "selector": ".row3",
+            "props": "border-bottom: 2px solid black"
+        },
+        {"selector": "tbody td", "props": "border-left: 1px solid black"},
+    ])
+    dfi.export(df, save_path + '/general_information.png')
+
+
+def _evaluate_condition(condition, experiments, plots=False):
+    """
+        Computes the metrics of all recorded runs of a condition within a
+        worker process, see ``pipeline._evaluate_participants``.
+
+        Parameters
+        ----------
+        condition: str
+            The name of the condition.
+        experiments: list
+            The recorded runs of the condition as returned by
+            ``playback.crawl_results``.
+        plots: bool, optional (Default: False)
+            If true, the graphs of each run are saved as well.
+
+        Returns
+        -------
+            list
+            A tuple (participant, metrics, termination) for each run.
+    """
+    results = []
+    trajectories = playback.recorded_trajectories(experiments)
+    for (_, _, agent, _), trajectory in zip(experiments, trajectories):
+        action_types, positions, time, load, length, action_values, lab, termination = trajectory
+        metrics = compute_metrics(action_types, positions, time, load, length, action_values, lab)
+        if plots:
+            save_path = PARTICIPANT_DIR + condition + "_participant/" + str(agent.id)
+            os.makedirs(save_path, exist_ok=True)
+            save_plots(save_path, metrics, *tile_statistics(positions, time, lab))
+        results.append((agent.id, metrics, termination))
+    return results
+
+
+def _run_shared_agent(pipe, handle, agent_type):
+    """
+        Runs an agent on a shared maze within a worker process, see
+        ``pipeline._run_parallel``.
+
+        Parameters
+        ----------
+        pipe: pipeline
+            The pipeline containing the settings of the runs.
+        handle: dict
+            The handle of the published SharedMaze.
+        agent_type: str
+            The name of the agent, one of the keys of AGENTS.
+    """
+    maze = SharedMaze.attach(handle)
+    try:
+        env = maze.create_environment()
+        if pipe.store_path:
+            pipe.store = ResultStore(pipe.store_path)
+        pipe._run_agent(env, agent_type)
+        if pipe.store is not None:
+            pipe.store.close()
+        flush()
+        del env
+    finally:
+        maze.close()
+
+
+def parse_shard(value):
+    """
+        Parses the value of the "--shard" argument of the form "i/N", where
+        0 <= i < N.
+    """
+    try:
+        index, shards = (int(v) for v in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("has to be of the form 'i/N', not '{}'".format(value))
+    if not 0 <= index < shards:
+        raise argparse.ArgumentTypeError("the index i of 'i/N' has to be between 0 and N-1")
+    return index, shards
+
+
+def parse_times(value):
+    """
+        Parses the value of the "--times" argument, which is either a natural
+        number or "auto".
+    """
+    if value == "auto":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "has to be a natural number or 'auto', not '{}'".format(value))
+
+
 if __name__ == "__main__":
     """
         Main method of the pipeline
@@ -663,18 +947,63 @@ if __name__ == "__main__":
 
     # --- ARGUMENT PARSER ---
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "command", help="'merge' combines the outputs of all shards of a sweep (see '--shard'), "
+        "'participants' computes the metrics of the recorded runs of the participants, "
+        "'export' renders the log-file given by '-p' headlessly into '--output'", choices=["merge", "participants", "export"], nargs="?")
     group = parser.add_mutually_exclusive_group()
     # pipeline either creates new agents or does playback, not both at once
     # TODO: add agents names once available
     group.add_argument(
-        "-a", "--agent", help="name of the agent that should be used", choices=['wall_follower', 'tremaux', 'directedTremaux', 'simple', 'greedy'], nargs="+")
+        "-a", "--agent", help="name of the agent that should be used", choices=list(AGENTS), nargs="+")
     group.add_argument(
         "-p", "--playback", help="file path to .txt file containing log-file that should be replayed")
     parser.add_argument(
-        "-t", "--times", help="determines how often agent shall run on labyrinth. Graph data will be generated over average values.", type=int)
+        "--viewport", help="number of rows and columns shown around the agent during the playback of '-p' instead of the whole labyrinth", type=int, nargs=2, metavar=("ROWS", "COLUMNS"))
+    parser.add_argument(
+        "--speedup", help="speedup factor of the playback of '-p'. Frames are dropped if rendering cannot keep up.", type=float, default=1)
+    parser.add_argument(
+        "--seek", help="number of actions of the log-file given by '-p' that are skipped before the playback starts", type=int, default=0)
+    parser.add_argument(
+        "-t", "--times", help="determines how often agent shall run on labyrinth. Graph data will be generated over average values. "
+        "Use 'auto' to run until the metrics given by '--converge-on' have converged.", type=parse_times)
+    parser.add_argument(
+        "--ci", help="relative half width of the 95%% confidence interval (compared to the mean) at which '-t auto' stops", type=float, default=CI_WIDTH)
+    parser.add_argument(
+        "--min-times", help="minimum number of runs with '-t auto'. Agents with identical results in these runs are considered deterministic.", type=int, default=MIN_TIMES)
+    parser.add_argument(
+        "--max-times", help="maximum number of runs with '-t auto'", type=int, default=MAX_TIMES)
+    parser.add_argument(
+        "--converge-on", help="metrics whose confidence interval has to be narrow enough with '-t auto'", choices=METRICS, nargs="+", default=CONVERGE_ON)
     # if -l is used for playback or graph generation only graphs are saved!
     parser.add_argument(
         "-l", "--labyrinth", help=" file path to .txt file containing to be used labyrinth(s)")
+    parser.add_argument(
+        "-n", "--names", help="names of the labyrinths in the labyrinth file that should be used. Uses an index file next to the labyrinth file for random access.", nargs="+")
+    parser.add_argument(
+        "--max-actions", help="maximum number of actions per run before it is aborted", type=int, default=MAX_ACTIONS)
+    parser.add_argument(
+        "--max-time", help="maximum wall clock time in seconds per run before it is aborted", type=float)
+    parser.add_argument(
+        "--max-repeats", help="how often an agent may reach the exact same state before its run is aborted as stalled", type=int, default=MAX_REPEATS)
+    parser.add_argument(
+        "-w", "--workers", help="number of worker processes running agents in parallel. The labyrinths are shared between them via shared memory.", type=int, default=1)
+    parser.add_argument(
+        "--shard", help="only run the shard i of N (0 <= i < N) of the sweep. Requires '--seed'. The outputs of all shards are combined by 'pipeline.py merge'.", type=parse_shard)
+    parser.add_argument(
+        "--store", help="path of a SQLite database the results are stored in instead of appending them to the .csv files, which are generated from it at the end")
+    parser.add_argument(
+        "--participant-data", help="folder containing the recordings evaluated by 'pipeline.py participants'", default=PARTICIPANT_DATA)
+    parser.add_argument(
+        "--plots", help="also save the graphs of each run with 'pipeline.py participants'", action="store_true")
+    parser.add_argument(
+        "--output", help="file (e.g. .gif or .mp4) the run is saved to by 'pipeline.py export'. Without a suitable encoder a folder of images is written instead.")
+    parser.add_argument(
+        "--frame-step", help="only every n-th action is rendered by 'pipeline.py export'", type=int, default=1)
+    parser.add_argument(
+        "--fps", help="frames per second of the run saved by 'pipeline.py export'", type=float, default=10)
+    parser.add_argument(
+        "-s", "--seed", help="seed of the sweep from which the seeds of all runs are derived. Chosen randomly if not given.", type=int)
     # parsing arguments
     args = parser.parse_args()
 
@@ -0,0 +1,76 @@
+import unittest
+
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from cogmodel.aggregation import RunningStatistic, QuantileSketch
+
+
+class RunningStatisticTest(unittest.TestCase):
+
+    def setUp(self):
+        self.values = np.random.default_rng(0).normal(10, 3, size=1000)
+
+    def test_mean_and_std(self):
+        stat = RunningStatistic()
+        for v in self.values:
+            stat.add(v)
+        self.assertEqual(stat.count, 1000)
+        self.assertAlmostEqual(stat.mean, np.mean(self.values))
+        self.assertAlmostEqual(stat.std, np.std(self.values, ddof=1))
+        self.assertEqual(stat.min, np.min(self.values))
+        self.assertEqual(stat.max, np.max(self.values))
+
+    def test_merge(self):
+        merged = RunningStatistic()
+        for chunk in np.array_split(self.values, 7):
+            part = RunningStatistic()
+            for v in chunk:
+                part.add(v)
+            merged.merge(part)
+        self.assertEqual(merged.count, 1000)
+        self.assertAlmostEqual(merged.mean, np.mean(self.values))
+        self.assertAlmostEqual(merged.std, np.std(self.values, ddof=1))
+
+    def test_single_value(self):
+        stat = RunningStatistic()
+        stat.add(4)
+        self.assertEqual(stat.std, 0.0)
+        self.assertTrue(np.isnan(stat.confidence_interval()))
+
+    def test_confidence_interval(self):
+        stat = RunningStatistic()
+        for v in self.values:
+            stat.add(v)
+        expected = 1.959964 * np.std(self.values, ddof=1) / np.sqrt(1000)
+        self.assertAlmostEqual(stat.confidence_interval(0.95), expected, places=4)
+
+
+class QuantileSketchTest(unittest.TestCase):
+
+    def test_exact_for_small_streams(self):
+        sketch = QuantileSketch(k=50)
+        for v in range(1, 22):
+            sketch.add(v)
+        self.assertEqual(sketch.quantile(0.5), 11)
+        self.assertEqual(sketch.quantile(1.0), 21)
+
+    def test_approximate_for_large_streams(self):
+        values = np.random.default_rng(1).uniform(0, 1, size=20000)
+        first, second = QuantileSketch(), QuantileSketch()
+        for v in values[:12000]:
+            first.add(v)
+        for v in values[12000:]:
+            second.add(v)
+        first.merge(second)
+        for q in [0.1, 0.5, 0.9]:
+            self.assertAlmostEqual(first.quantile(q), np.quantile(values, q),
+                                   delta=0.03)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+
+import os
+import sys
+import shutil
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from cogmodel.evaluation import read_logging
+from cogmodel import archive
+
+HEADER = """2022-06-20 10:04:02.432714:
+GridEnvironment Log:
+EnvString:
+#####
+#ggg#
+#####
+Goal:
+(1, 3)
+StartPosition:
+(1, 1)
+Facing:
+(0, 1)
+Name:
+lab0
+AgentType:
+simple
+"""
+
+ACTIONS = """
+2022-06-20 10:04:02.434848: Condition starting
+2022-06-20 10:04:02.451869: EAST
+2022-06-20 10:04:02.468315: TURN LEFT
+2022-06-20 10:04:02.483878: EAST
+2022-06-20 10:04:02.499300: Condition finished
+
+Position:
+[(1, 1), (1, 2), (1, 2), (1, 3)]
+Time:
+[0, 12368, 26070, 17367]
+Load:
+[560, 712, 712]
+Length:
+[0, 1, 1, 2]
+Action:
+[0.0, 1.0, 1.6, 2.6]
+"""
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp_dir, "Experiment_data")
+        runs = {0: HEADER + "Seed:\n42\n" + ACTIONS + "Termination:\ntarget\n",
+                # written before seeds and termination reasons were logged
+                1: HEADER + ACTIONS}
+        for run, content in runs.items():
+            os.makedirs(os.path.join(self.root, "lab0_simple", str(run)))
+            with open(os.path.join(self.root, "lab0_simple", str(run), "logging.txt"), "w") as f:
+                f.write(content)
+        os.makedirs(os.path.join(self.root, "graphs"))
+        self.archive_dir = os.path.join(self.tmp_dir, "archive")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_convert(self):
+        index, mismatches = archive.convert_tree(self.root, self.archive_dir, workers=1,
+                                                 validate=True)
+        self.assertEqual(mismatches, [])
+        self.assertEqual(archive.load_index(self.archive_dir), index)
+        self.assertEqual(list(index), ["lab0_simple"])
+        entry = index["lab0_simple"]
+        self.assertEqual((entry["lab"], entry["agent"], entry["runs"]), ("lab0", "simple", [0, 1]))
+        self.assertEqual(entry["terminations"], {"target": 1, "": 1})
+
+        runs = archive.load_pair(self.archive_dir, "lab0_simple")
+        for run in [0, 1]:
+            original = read_logging(os.path.join(self.root, "lab0_simple", str(run), "logging.txt"))
+            converted = runs[run]
+            self.assertEqual(converted[0], ["EAST", "TURN LEFT", "EAST"])
+            self.assertEqual(converted[0], original[0])
+            for expected, value in zip(original[1:6], converted[1:6]):
+                np.testing.assert_array_equal(value, expected)
+            self.assertEqual(converted[6:], original[6:])
+        self.assertEqual(runs[1][7], "")
+
+    def test_validate(self):
+        archive.convert_tree(self.root, self.archive_dir, workers=1)
+        path = os.path.join(self.root, "lab0_simple", "1", "logging.txt")
+        with open(path, "w") as f:
+            f.write(HEADER + ACTIONS.replace("[560, 712, 712]", "[560, 712, 832]"))
+        runs = archive.find_logs(self.root)["lab0_simple"]
+        self.assertEqual(archive.validate_pair("lab0_simple", runs, self.archive_dir), [path])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+from cogmodel.gridEnvironment import GridEnvironment, BudgetExhausted, EAST, WEST
+from cogmodel.gridEnvironment import TERMINATION_MAX_ACTIONS, TERMINATION_STALL, TERMINATION_TARGET
+from cogmodel.Agents.wallFollower import wallFollower
+
+
+class BudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        # The target lies within the pillars, so the wall follower keeps
+        # circling around them
+        self.str = "#######\n" + \
+                   "#ggggg#\n" + \
+                   "#g#g#g#\n" + \
+                   "#ggggg#\n" + \
+                   "#######"
+        self.env = GridEnvironment(target=(2, 3), initial_agent_pos=(1, 2),
+                                   view_radius=5, name="budget",
+                                   env_string=self.str, facing=EAST)
+
+    def test_max_actions(self):
+        self.env.set_budget(max_actions=3)
+        self.env.perform_action(EAST, self)
+        self.env.perform_action(WEST, self)
+        with self.assertRaises(BudgetExhausted):
+            self.env.perform_action(EAST, self)
+        self.assertEqual(self.env.termination_reason, TERMINATION_MAX_ACTIONS)
+        # No further actions are accepted once the budget is exhausted
+        with self.assertRaises(BudgetExhausted):
+            self.env.perform_action(EAST, self)
+        self.assertEqual(len(self.env.step_score), 4)
+
+    def test_stall_detection(self):
+        self.env.set_budget(max_repeats=3)
+        agent = wallFollower(self.env)
+        agent._choose_action = self._guarded(agent._choose_action)
+        with self.assertRaises(BudgetExhausted):
+            while True:
+                agent._choose_action()
+        self.assertEqual(self.env.termination_reason, TERMINATION_STALL)
+
+    def test_no_agent_limit(self):
+        agent = wallFollower(self.env)
+        calls = []
+
+        def choose_action():
+            # the target is only reached after many decisions
+            calls.append(None)
+            if len(calls) == 5000:
+                self.env.agent_pos = self.env.target
+        agent._choose_action = choose_action
+        agent.run()
+        # only the budgets of the environment end a run early
+        self.assertEqual(len(calls), 5000)
+        self.assertEqual(self.env.termination_reason, TERMINATION_TARGET)
+
+    def test_reset_keeps_budget(self):
+        self.env.set_budget(max_actions=1)
+        with self.assertRaises(BudgetExhausted):
+            self.env.perform_action(EAST, self)
+        self.env.reset()
+        self.assertIsNone(self.env.termination_reason)
+        self.assertEqual(self.env.max_actions, 1)
+
+    def _guarded(self, func):
+        calls = []
+
+        def wrapper():
+            calls.append(None)
+            self.assertLess(len(calls), 1000, "Stall was not detected")
+            func()
+        return wrapper
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+
+import os
+import sys
+import pickle
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+from cogmodel import labyrinths
+from cogmodel.gridEnvironment import NORTH, SOUTH, WEST, EAST, TURN_LEFT, TURN_RIGHT
+
+LAB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
+                                        'cogmodel', 'Labyrinths', 'testLabs'))
+
+ACTIONS = [NORTH, EAST, TURN_LEFT, SOUTH, SOUTH, WEST, TURN_RIGHT, EAST, NORTH]
+
+
+class CloningTest(unittest.TestCase):
+
+    def setUp(self):
+        spec = labyrinths.load_labyrinth(LAB_PATH, "lab0")
+        self.env = labyrinths.create_environment(spec, 5)
+        self.agent = object()
+        for action in ACTIONS[:4]:
+            self.env.perform_action(action, self.agent)
+
+    def _episode(self, env):
+        return (env.agent_pos, env.facing_direction, env.positions,
+                env.path_length, env.step_score, env.memoryUsage)
+
+    def test_pickle(self):
+        data = pickle.dumps(self.env)
+        self.assertLess(len(data), len(pickle.dumps(self.env.tiles)))
+        env = pickle.loads(data)
+        self.assertEqual(self._episode(env), self._episode(self.env))
+        self.assertEqual(set(env.tiles), set(self.env.tiles))
+        # environments of the same labyrinth share their tiles
+        self.assertIs(pickle.loads(data).tiles, env.tiles)
+        for action in ACTIONS[4:]:
+            env.perform_action(action, self.agent)
+            self.env.perform_action(action, self.agent)
+        self.assertEqual(env.positions, self.env.positions)
+
+    def test_clone(self):
+        clone = self.env.clone()
+        self.assertIs(clone.tiles, self.env.tiles)
+        self.assertEqual(self._episode(clone), self._episode(self.env))
+        episode = [list(x) if isinstance(x, list) else x
+                   for x in self._episode(self.env)]
+        for action in ACTIONS[4:]:
+            clone.perform_action(action, self.agent)
+        self.assertEqual(list(self._episode(self.env)), episode)
+        self.assertEqual(len(clone.positions), len(ACTIONS) + 1)
+
+    def test_targets(self):
+        clone = self.env.clone()
+        pos = next(iter(self.env.get_view_cone()))
+        clone.initialize_targets({pos: {"color": "red", "symbol": "R"}})
+        self.assertTrue(clone.tiles[pos].is_target)
+        self.assertFalse(self.env.tiles[pos].is_target)
+        self.assertEqual(self.env.targets, {})
+        # the visibility of the targets is kept per environment as well
+        other = clone.clone()
+        clone.get_view_cone(playback=True)
+        self.assertEqual(clone.tiles[pos].char, "R")
+        self.assertEqual(other.tiles[pos].char, "T")
+        # targets are kept when pickling, but not shared with other
+        # environments of the same labyrinth
+        env = pickle.loads(pickle.dumps(clone))
+        self.assertEqual(env.targets, clone.targets)
+        self.assertTrue(env.tiles[pos].is_target)
+        self.assertFalse(pickle.loads(pickle.dumps(self.env)).tiles[pos].is_target)
+
+    def test_snapshot(self):
+        episode = [list(x) if isinstance(x, list) else x
+                   for x in self._episode(self.env)]
+        snapshot = self.env.snapshot()
+        for action in ACTIONS[4:]:
+            self.env.perform_action(action, self.agent)
+        self.env.restore(snapshot)
+        self.assertEqual(list(self._episode(self.env)), episode)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+
+import os
+import sys
+import pickle
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from cogmodel import directions
+from cogmodel.gridEnvironment import GridEnvironment, NORTH, SOUTH, EAST, WEST, TURN_LEFT, TURN_RIGHT
+
+
+class DirectionsTest(unittest.TestCase):
+
+    def test_tables(self):
+        self.assertEqual([directions.VECTORS[h] for h in (directions.HEADING_NORTH, directions.HEADING_EAST,
+                                                          directions.HEADING_SOUTH, directions.HEADING_WEST)],
+                         [NORTH, EAST, SOUTH, WEST])
+        for h, (i, j) in enumerate(directions.VECTORS):
+            # rows grow downwards, so turning right maps (i, j) to (j, -i)
+            self.assertEqual(directions.VECTORS[directions.RIGHT[h]], (j, -i))
+            self.assertEqual(directions.VECTORS[directions.LEFT[h]], (-j, i))
+            self.assertEqual(directions.BACK[h], directions.RIGHT[directions.RIGHT[h]])
+
+    def test_to_heading(self):
+        self.assertEqual(directions.to_heading(WEST), directions.HEADING_WEST)
+        self.assertEqual(directions.to_heading(np.array([0, 1])), directions.HEADING_EAST)
+        self.assertEqual(directions.to_heading(np.int8(2)), directions.HEADING_SOUTH)
+        with self.assertRaises(ValueError):
+            directions.to_heading((1, 1))
+
+    def test_relative_offsets(self):
+        self.assertEqual(directions.to_absolute(directions.HEADING_NORTH, 2, 1), (-2, 1))
+        self.assertEqual(directions.to_absolute(directions.HEADING_EAST, 2, 1), (1, 2))
+        for h in range(4):
+            for offset in [(1, 0), (2, -1), (-3, 2)]:
+                self.assertEqual(directions.to_relative(h, *directions.to_absolute(h, *offset)),
+                                 offset)
+
+
+class EnvironmentHeadingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = GridEnvironment(target=(3, 3), initial_agent_pos=(2, 2), view_radius=2,
+                                   name="headings", env_string="#####\n#ggg#\n#g#g#\n#ggg#\n#####",
+                                   facing=directions.HEADING_EAST)
+
+    def test_facing_direction(self):
+        self.assertEqual(self.env.facing_direction, EAST)
+        self.env.perform_action(TURN_RIGHT, self)
+        self.assertEqual((self.env.heading, self.env.facing_direction), (directions.HEADING_SOUTH, SOUTH))
+        self.env.facing_direction = WEST
+        self.assertEqual(self.env.heading, directions.HEADING_WEST)
+        self.env.perform_action(TURN_LEFT, self)
+        self.assertEqual(self.env.facing_direction, SOUTH)
+        self.env.reset()
+        self.assertEqual(self.env.facing_direction, EAST)
+
+    def test_initial_facing(self):
+        # invalid facing directions fall back to north
+        for facing in [True, 4, (1, 1), ("a", "b"), None]:
+            env = GridEnvironment(target=(3, 3), initial_agent_pos=(2, 2), view_radius=2,
+                                  name="headings", facing=facing)
+            self.assertEqual(env.facing_direction, NORTH)
+        for facing in [directions.HEADING_WEST, np.int64(3), WEST]:
+            env = GridEnvironment(target=(3, 3), initial_agent_pos=(2, 2), view_radius=2,
+                                  name="headings", facing=facing)
+            self.assertEqual(env.facing_direction, WEST)
+
+    def test_relative_view_cone(self):
+        # rotation matrices previously used by get_view_cone(relative=True)
+        rotations = {NORTH: [[1, 0], [0, 1]], EAST: [[0, -1], [1, 0]],
+                     SOUTH: [[-1, 0], [0, -1]], WEST: [[0, 1], [-1, 0]]}
+        for facing, rotation in rotations.items():
+            self.env.facing_direction = facing
+            expected = {tuple(np.matmul(rotation, np.array(pos) - self.env.agent_pos)): tile
+                        for pos, tile in self.env.get_view_cone().items()}
+            self.assertEqual(self.env.get_view_cone(relative=True), expected)
+
+    def test_pickled_facing_direction(self):
+        state = self.env.__getstate__()
+        # environments pickled before the heading was introduced
+        del state["heading"]
+        state["facing_direction"] = SOUTH
+        env = pickle.loads(pickle.dumps(self.env))
+        env.__setstate__(state)
+        self.assertEqual(env.heading, directions.HEADING_SOUTH)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+
+
+import os
+import sys
+import pickle
+import shutil
+import tempfile
+import time
+from unittest import mock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from cogmodel import frameExport
+from cogmodel.gridEnvironment import GridEnvironment
+from cogmodel.playback import PlaybackAgent
+
+ACTIONS = ["2022-06-20 10:04:02.434848: Condition starting",
+           "2022-06-20 10:04:02.451869: EAST",
+           "2022-06-20 10:04:02.468315: TURN LEFT",
+           "2022-06-20 10:04:02.483878: EAST",
+           "2022-06-20 10:04:02.499300: Condition finished"]
+
+C = frameExport.CELL_SIZE
+
+
+class RenderFramesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = GridEnvironment(target=(1, 5), initial_agent_pos=(1, 1), view_radius=3,
+                                   name="lab", env_string="#######\n#ggggg#\n#######",
+                                   facing=(0, 1))
+        self.env.tiles[(1, 4)].set_as_target({"color": "skyblue", "symbol": "B"})
+        self.agent = PlaybackAgent("simple", ACTIONS, (1, 1), self.env)
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def cell(self, frame, pos):
+        return frame[pos[0] * C:(pos[0] + 1) * C, pos[1] * C:(pos[1] + 1) * C]
+
+    def test_render_frames(self):
+        frames = list(frameExport.render_frames(self.env, self.agent))
+        # one frame before the first and after each action
+        self.assertEqual(len(frames), 5)
+        self.assertEqual(frames[0].shape, (3 * C, 7 * C, 3))
+        self.assertEqual(frames[0].dtype, np.uint8)
+        yellow = frameExport._rgb("yellow")
+        red = frameExport._rgb("red")
+        for frame, pos in zip(frames, [(1, 1), (1, 1), (1, 2), (1, 2), (1, 3)]):
+            self.assertTrue((self.cell(frame, pos) == yellow).all(-1).any())
+        # the trajectory connects the centers of the visited tiles
+        self.assertFalse((frames[1] == red).all(-1).any())
+        self.assertTrue((self.cell(frames[-1], (1, 2)) == red).all(-1).any())
+        # the target is only shown while it is within the view cone
+        skyblue = frameExport._rgb("skyblue").astype(np.uint8)
+        green = frameExport._rgb("green").astype(np.uint8)
+        self.assertTrue((self.cell(frames[0], (1, 4)) == skyblue).all())
+        self.assertTrue((self.cell(frames[2], (1, 4)) == skyblue).all())
+        self.assertTrue((self.cell(frames[3], (1, 4)) == green).all())
+        # the environment and agent are not changed
+        self.assertEqual(self.env.agent_pos, (1, 1))
+        self.assertEqual(self.agent.cur_idx, 0)
+
+    def test_frame_step_and_workers(self):
+        frames = list(frameExport.render_frames(self.env, self.agent))
+        skipped = list(frameExport.render_frames(self.env, self.agent, frame_step=3))
+        self.assertEqual(len(skipped), 3)
+        np.testing.assert_array_equal(skipped[1], frames[3])
+        np.testing.assert_array_equal(skipped[2], frames[-1])
+        with mock.patch.object(frameExport, "CHUNK_SIZE", 2), \
+                mock.patch.object(frameExport, "_available_cpus", return_value=2):
+            parallel = list(frameExport.render_frames(self.env, self.agent, workers=2))
+        np.testing.assert_array_equal(np.array(parallel), np.array(frames))
+
+    def test_workers_share_frames(self):
+        sizes = []
+
+        class Executor(frameExport.ProcessPoolExecutor):
+            # records the size of the data passed to and from the workers
+            def submit(self, fn, *args):
+                sizes.append(len(pickle.dumps(args)))
+                future = super().submit(fn, *args)
+                future.add_done_callback(lambda f: sizes.append(len(pickle.dumps(f.result()))))
+                return future
+
+        actions = ACTIONS[:1] + ACTIONS[1:-1] * 50 + ACTIONS[-1:]
+        agent = PlaybackAgent("simple", actions, (1, 1), self.env)
+        frames = list(frameExport.render_frames(self.env, agent))
+        with mock.patch.object(frameExport, "ProcessPoolExecutor", Executor), \
+                mock.patch.object(frameExport, "SHARED_CHUNK_BYTES", 8 * frames[0].nbytes), \
+                mock.patch.object(frameExport, "_available_cpus", return_value=2):
+            parallel = list(frameExport.render_frames(self.env, agent, workers=2))
+        np.testing.assert_array_equal(np.array(parallel), np.array(frames))
+        # neither the scene nor the frames are sent for each chunk
+        self.assertEqual(len(sizes), 2 * 19)
+        self.assertLess(max(sizes), 200)
+
+    @unittest.skipUnless(frameExport._available_cpus() > 1, "only one CPU is available")
+    def test_workers_not_slower(self):
+        env = GridEnvironment(target=(1, 98), initial_agent_pos=(1, 1), view_radius=3, name="lab",
+                              env_string="\n".join(["#" * 100] + ["#" + "g" * 98 + "#"] * 98 +
+                                                   ["#" * 100]), facing=(0, 1))
+        actions = ACTIONS[:1] + ["2022-06-20 10:04:02.451869: EAST",
+                                 "2022-06-20 10:04:02.451869: WEST"] * 1000 + ACTIONS[-1:]
+        agent = PlaybackAgent("simple", actions, (1, 1), env)
+        durations = []
+        for workers in [1, 2]:
+            start = time.perf_counter()
+            for _ in frameExport.render_frames(env, agent, workers=workers):
+                pass
+            durations.append(time.perf_counter() - start)
+        self.assertLessEqual(durations[1], durations[0] * 1.2)
+
+    def test_save_frames_as_images(self):
+        path = os.path.join(self.tmp_dir, "run.gif")
+        with mock.patch.object(frameExport, "imageio_available", False):
+            folder = frameExport.export_run(self.env, self.agent, path)
+        self.assertEqual(folder, os.path.join(self.tmp_dir, "run"))
+        self.assertEqual(sorted(os.listdir(folder)),
+                         ["frame_{:06d}.png".format(i) for i in range(5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+
+import os
+import sys
+from collections import deque
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+from cogmodel.gridEnvironment import GridEnvironment, EAST, TERMINATION_TARGET
+from cogmodel.Agents.greedyDistance import greedyDistance
+
+
+class GreedyDistanceTest(unittest.TestCase):
+
+    def setUp(self):
+        # the straight way to the target is blocked, the agent has to go
+        # around the wall through the bottom row
+        self.str = "#######\n" + \
+                   "#ggg#g#\n" + \
+                   "#g#g#g#\n" + \
+                   "#g#ggg#\n" + \
+                   "#ggg#g#\n" + \
+                   "#######"
+        self.env = GridEnvironment(target=(1, 5), initial_agent_pos=(1, 1),
+                                   view_radius=2, name="greedy_distance",
+                                   env_string=self.str, facing=EAST)
+
+    def shortest_distances(self, agent):
+        """
+            Distances of all tiles which are not known walls, computed from
+            scratch by a breadth first search from the target.
+        """
+        rows, cols = self.env.size
+        distances = {self.env.target: 0}
+        queue = deque([self.env.target])
+        while queue:
+            i, j = queue.popleft()
+            for n in [(i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)]:
+                if 0 <= n[0] < rows and 0 <= n[1] < cols and n not in distances and \
+                        not agent._wall[agent._index(*n)]:
+                    distances[n] = distances[(i, j)] + 1
+                    queue.append(n)
+        return distances
+
+    def test_initial_distances(self):
+        agent = greedyDistance(self.env)
+        # without any known walls the distances are manhattan distances
+        self.assertEqual(agent.distance[agent._index(1, 1)], 4)
+        self.assertEqual(agent.distance[agent._index(4, 0)], 8)
+
+    def test_incremental_update(self):
+        agent = greedyDistance(self.env)
+        agent._add_walls([agent._index(1, 4), agent._index(2, 4)])
+        agent._add_walls([agent._index(4, 4), agent._index(0, 5)])
+        for (i, j), d in self.shortest_distances(agent).items():
+            self.assertEqual(agent.distance[agent._index(i, j)], d)
+        self.assertEqual(agent.distance[agent._index(1, 3)], 6)
+
+    def test_run(self):
+        agent = greedyDistance(self.env)
+        agent.run()
+        self.assertEqual(self.env.termination_reason, TERMINATION_TARGET)
+        self.assertEqual(self.env.agent_pos, self.env.target)
+        # the distances are the same as when computed from scratch
+        for (i, j), d in self.shortest_distances(agent).items():
+            self.assertEqual(agent.distance[agent._index(i, j)], d)
+        # the wall in front of the target is seen from (1, 3), so the agent
+        # takes the shortest way around it (turning in between)
+        self.assertEqual([pos for k, pos in enumerate(self.env.positions)
+                          if k == 0 or pos != self.env.positions[k - 1]],
+                         [(1, 1), (1, 2), (1, 3), (2, 3), (3, 3), (3, 4), (3, 5), (2, 5), (1, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+
+import os
+import sys
+import shutil
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+from cogmodel import labyrinths
+
+LAB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
+                                        'cogmodel', 'Labyrinths', 'testLabs'))
+
+
+class LabyrinthLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "testLabs")
+        shutil.copy(LAB_PATH, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_iter_labyrinths(self):
+        specs = list(labyrinths.iter_labyrinths(self.path))
+        self.assertEqual([s["name"] for s in specs],
+                         ["lab{}".format(i) for i in range(10)])
+        self.assertEqual(specs[0]["goal"], (9, 7))
+        self.assertEqual(specs[0]["start"], (1, 2))
+        self.assertEqual(specs[0]["facing"], (-1, 0))
+        rows = specs[0]["env_string"].split("\n")
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(rows[0], "#" * 20)
+
+    def test_load_labyrinth_by_name(self):
+        specs = {s["name"]: s for s in labyrinths.iter_labyrinths(self.path)}
+        spec = labyrinths.load_labyrinth(self.path, "lab7")
+        self.assertEqual(spec, specs["lab7"])
+        self.assertTrue(os.path.isfile(self.path + labyrinths.INDEX_SUFFIX))
+
+    def test_load_unknown_labyrinth(self):
+        with self.assertRaises(KeyError):
+            labyrinths.load_labyrinth(self.path, "lab42")
+
+    def test_create_environment(self):
+        spec = next(labyrinths.iter_labyrinths(self.path))
+        env = labyrinths.create_environment(spec, 5)
+        self.assertEqual(env.size, (20, 20))
+        self.assertEqual(env.name, "lab0")
+        self.assertEqual(env.agent_pos, (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+
+import os
+import sys
+import shutil
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+import cogmodel
+from cogmodel import log, flush
+
+
+class LogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_flush(self):
+        path = os.path.join(self.tmp_dir, "sub", "logging.txt")
+        log(path, msg="Header")
+        for i in range(100):
+            log(path, timestamp=i, msg="NORTH")
+        flush()
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 101)
+        self.assertEqual(lines[0], "Header")
+        self.assertEqual(lines[-1], "99: NORTH")
+
+    def test_invalid_items(self):
+        path = os.path.join(self.tmp_dir, "logging.txt")
+        # malformed items and failing writes do not stop the writer thread
+        cogmodel.log_queue.put((path, None))
+        cogmodel.log_queue.put(42)
+        log(None, msg="lost")
+        log(path, msg="written")
+        flush()
+        self.assertTrue(cogmodel.log_thread.is_alive())
+        with open(path) as f:
+            self.assertEqual(f.read(), "written\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
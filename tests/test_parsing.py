@@ -0,0 +1,89 @@
+import unittest
+
+
+import os
+import sys
+import shutil
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from cogmodel import parsing
+from cogmodel.parsing import ParseError
+from cogmodel.evaluation import read_logging
+from cogmodel.labyrinths import iter_labyrinths
+
+
+class ParserTest(unittest.TestCase):
+
+    def test_values(self):
+        self.assertEqual(parsing.parse_tuple("(9, 7)"), (9, 7))
+        self.assertEqual(parsing.parse_tuple(" (-1, 0)\n"), (-1, 0))
+        np.testing.assert_array_equal(parsing.parse_array("[0, 12368, -3]"), [0, 12368, -3])
+        self.assertEqual(len(parsing.parse_array("[]")), 0)
+        values = parsing.parse_array("[0.0, 0.6, 1.7999999999999998, 1e-05]", np.float64)
+        self.assertEqual(values.tolist(), [0.0, 0.6, 1.7999999999999998, 1e-05])
+        positions = parsing.parse_positions("[(1, 2), (1, 1), (2, 1)]")
+        self.assertEqual(positions.shape, (3, 2))
+        self.assertEqual(positions.tolist(), [[1, 2], [1, 1], [2, 1]])
+        self.assertEqual(parsing.parse_literal("{'target': (5, 9)}"), {"target": (5, 9)})
+
+    def test_invalid_values(self):
+        for parser, text in [(parsing.parse_tuple, "9, 7"), (parsing.parse_tuple, "(9, x)"),
+                             (parsing.parse_array, "[1, 2, x]"), (parsing.parse_array, "[1, 2.5]"),
+                             (parsing.parse_array, "(1, 2)"), (parsing.parse_positions, "[(1, 2), (3)]"),
+                             (parsing.parse_literal, "{(1, 2): "), (parsing.split_action, "EAST")]:
+            with self.assertRaises(ValueError, msg=text):
+                parser(text)
+
+    def test_tokenize(self):
+        lines = ["2017-07-31 14:24:31.150719: \n", "EnvString: \n", "###\n", "#g#\n",
+                 "Goal: (1, 1)\n", "StartPosition:\n", "(1, 1)\n", "\n",
+                 "2017-07-31 14:24:31.958246: Key-Right\n",
+                 "2017-07-31 14:24:42.741913: Condition Finished\n", "\n", "Position:\n", "[(1, 1)]\n"]
+        tokens = list(parsing.tokenize(lines, parsing.LOG_SECTIONS, actions=True))
+        self.assertEqual([(token.section, token.text, token.line) for token in tokens],
+                         [(None, "2017-07-31 14:24:31.150719: ", 1), ("EnvString", "###", 3),
+                          ("EnvString", "#g#", 4), ("Goal", "(1, 1)", 5), ("StartPosition", "(1, 1)", 7),
+                          (parsing.ACTIONS, "2017-07-31 14:24:31.958246: Key-Right", 9),
+                          (parsing.ACTIONS, "2017-07-31 14:24:42.741913: Condition Finished", 10),
+                          ("Position", "[(1, 1)]", 13)])
+
+
+class FileErrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "file.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, content):
+        with open(self.path, "w") as f:
+            f.write(content)
+
+    def test_log_error(self):
+        self.write("EnvString:\n#g#\nGoal:\n(0, 1)\n\n"
+                   "2022-06-20 10:04:02.434848: Condition starting\n"
+                   "2022-06-20 10:04:02.451869: EAST\n"
+                   "2022-06-20 10:04:02.499300: Condition finished\n\n"
+                   "Position:\n[(0, 1), (0, 1)]\nTime:\n[0, 1x]\n")
+        with self.assertRaises(ParseError) as context:
+            read_logging(self.path)
+        self.assertEqual((context.exception.path, context.exception.line), (self.path, 13))
+        self.assertIn("Time", str(context.exception))
+
+    def test_labyrinth(self):
+        self.write("EnvString:\n#g#\nGoal:\n(0, 1)\nStartPosition:\n(0, 1)\nFacing:\n(-1, 0)\nName:\nlab\n"
+                   "EnvString:\n#g#\nGoal:\n(0, 1)\nStart:\n(0 1)\nFacing:\n(-1, 0)\nName:\nbad\n")
+        labyrinths = iter_labyrinths(self.path)
+        self.assertEqual(next(labyrinths)["start"], (0, 1))
+        with self.assertRaises(ParseError) as context:
+            next(labyrinths)
+        self.assertEqual(context.exception.line, 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+import unittest
+
+
+import os
+import sys
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from cogmodel import playback
+from cogmodel.gridEnvironment import NORTH, EAST, TURN_LEFT
+
+RECORDING = """2017-07-31 14:24:31.150719:
+ConditionID: Custom_C1_V1
+EnvString:
+#####
+#ggg#
+#g#g#
+#####
+AlwaysVisibles: [(1, 3)]
+ViewRadius: 0
+TargetRadius: 15
+Targets: {(1, 3): {'color': 'skyblue', 'symbol': 'B'}}
+Goal: {'target': (1, 3), 'type': 'Reach', 'taskDesc': 'Reach the shown exit.'}
+StartPosition: (2, 1)
+
+2017-07-31 14:24:31.958246: Key-Up
+2017-07-31 14:24:32.656775: Button-Right
+2017-07-31 14:24:32.886102: Key-Right
+2017-07-31 14:24:33.062764: Key-Interaction
+"""
+
+
+class ParseActionsTest(unittest.TestCase):
+
+    def test_parse_actions(self):
+        timestamps, codes = playback.parse_actions([
+            "2022-06-20 10:04:02.434848: Condition starting",
+            "2022-06-20 10:04:03: TURN LEFT",
+            "2017-07-31 14:24:31.958246: Key-Up", "2017-07-31 14:24:32.656775: Button-Right",
+            "2017-07-31 14:24:33.062764: Key-Interaction",
+            "2017-07-31 14:24:42.741913: Condition Finished"])
+        self.assertEqual(timestamps.dtype, np.dtype("datetime64[us]"))
+        self.assertEqual(timestamps[:2].astype(np.int64).tolist(),
+                         [1655719442434848, 1655719443000000])
+        self.assertEqual(codes.tolist(), [playback.CODE_START,
+                                          playback.ACTION_CODES.index(TURN_LEFT),
+                                          playback.ACTION_CODES.index(NORTH),
+                                          playback.ACTION_CODES.index(EAST),
+                                          playback.CODE_NONE, playback.CODE_FINISH])
+
+
+class CrawlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = playback.CACHE_DIR
+        playback.CACHE_DIR = tempfile.mkdtemp()
+        for user in ["0", "1"]:
+            os.makedirs(os.path.join(self.tmp_dir, user))
+            self.write(user, RECORDING + "2017-07-31 14:24:33.062764: Condition Finished\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        shutil.rmtree(playback.CACHE_DIR)
+        playback.CACHE_DIR = self.cache_dir
+
+    def write(self, user, content):
+        with open(os.path.join(self.tmp_dir, user, "condMapCustom_C1_V1"), "w") as f:
+            f.write(content)
+
+    def test_crawl(self):
+        conditions = playback.crawl_results(self.tmp_dir, workers=1)
+        self.assertEqual(list(conditions), ["condMapCustom_C1_V1"])
+        self.assertEqual(len(conditions["condMapCustom_C1_V1"]), 2)
+        env, targets, agent, goal = conditions["condMapCustom_C1_V1"][0]
+        self.assertEqual(goal, (1, 3))
+        self.assertEqual(list(targets), [(1, 3)])
+        self.assertEqual(agent.id, "0")
+        self.assertEqual(env.agent_pos, (2, 1))
+        positions = []
+        while (pos := agent.perform_action()) is not None:
+            positions.append(pos)
+        self.assertEqual(positions, [(1, 1), (1, 2), (1, 3), (1, 3)])
+        # every experiment gets its own environment
+        self.assertEqual(conditions["condMapCustom_C1_V1"][1][0].agent_pos, (2, 1))
+
+    def test_replay_batch(self):
+        self.write("1", RECORDING.replace("Key-Right\n", "Key-Left\n") +
+                   "2017-07-31 14:24:34.062764: Key-Down\n"
+                   "2017-07-31 14:24:35.062764: Condition Finished\n")
+        experiments = playback.crawl_results(self.tmp_dir, workers=1)["condMapCustom_C1_V1"]
+        batch = playback.replay_batch(experiments, view_cones=True)
+        self.assertEqual(batch["lengths"].tolist(), [4, 5])
+        self.assertEqual(batch["positions"].shape, (2, 6, 2))
+        self.assertEqual(batch["positions"][1].tolist(),
+                         [[2, 1], [1, 1], [1, 2], [1, 1], [1, 1], [2, 1]])
+        # shorter runs keep their last state
+        self.assertEqual(batch["positions"][0, -1].tolist(), [1, 3])
+        self.assertTrue(np.isnat(batch["timestamps"][0, -1]))
+        for i, (env, _, agent, _) in enumerate(experiments):
+            states = [(env.agent_pos, env.facing_direction, sorted(env.get_view_cone()))]
+            while agent.perform_action() is not None:
+                states.append((env.agent_pos, env.facing_direction, sorted(env.get_view_cone())))
+            for k, (pos, facing, cone) in enumerate(states):
+                self.assertEqual(tuple(batch["positions"][i, k]), pos)
+                self.assertEqual(tuple(batch["facings"][i, k]), facing)
+                self.assertEqual(sorted(tuple(p) for p in batch["view_cones"][i, k].tolist()
+                                        if p[0] >= 0), cone)
+
+    def test_recorded_trajectories(self):
+        self.write("1", RECORDING.replace("Key-Right\n", "Key-Left\n") +
+                   "2017-07-31 14:24:34.062764: Condition Finished\n")
+        experiments = playback.crawl_results(self.tmp_dir, workers=1)["condMapCustom_C1_V1"]
+        (action_types, positions, time, load, length, action_values, lab,
+         termination) = playback.recorded_trajectories(experiments)[1]
+        self.assertEqual(action_types, ["NORTH", "EAST", "WEST"])
+        self.assertEqual(positions.tolist(), [[2, 1], [1, 1], [1, 2], [1, 1]])
+        self.assertEqual(time.tolist(), [0, 807527000, 698529000, 229327000])
+        self.assertTrue(np.isnan(load).all())
+        self.assertEqual(length.tolist(), [0, 1, 2, 3])
+        self.assertEqual(action_values.tolist(), [0.0, 1.0, 2.0, 3.0])
+        self.assertEqual(lab, ["#####", "#ggg#", "#g#g#", "#####"])
+        self.assertEqual(termination, "finished")
+        self.assertEqual(playback.recorded_trajectories(experiments)[0][-1], "target")
+
+    def test_seek(self):
+        self.write("1", RECORDING.replace("Key-Right\n", "Key-Left\n") +
+                   "2017-07-31 14:24:34.062764: Key-Down\n"
+                   "2017-07-31 14:24:34.162764: Button-Turn left\n"
+                   "2017-07-31 14:24:34.262764: Key-Up\n"
+                   "2017-07-31 14:24:35.062764: Condition Finished\n")
+        env, _, agent, _ = playback.crawl_results(self.tmp_dir, workers=1)["condMapCustom_C1_V1"][1]
+        states = [(env.agent_pos, env.facing_direction, env.path_length[-1], env.step_score[-1])]
+        while agent.perform_action() is not None:
+            states.append((env.agent_pos, env.facing_direction, env.path_length[-1],
+                           env.step_score[-1]))
+        self.assertEqual(len(states), 8)
+        agent.build_keyframes(interval=3)
+        self.assertEqual(agent.keyframes["positions"].tolist(), [[2, 1], [1, 1], [2, 1]])
+        for step in [7, 0, 5, 4, 1, 6, 3, 2]:
+            self.assertEqual(agent.seek(step), states[step][0])
+            self.assertEqual(agent.cur_idx, step)
+            self.assertEqual((env.agent_pos, env.facing_direction, env.path_length[-1],
+                              env.step_score[-1]), states[step])
+        self.assertEqual(agent.step_back(), states[1][0])
+        self.assertEqual(agent.step_back(), states[0][0])
+        self.assertIsNone(agent.step_back())
+        self.assertEqual(agent.seek(100), states[-1][0])
+        self.assertIsNone(agent.perform_action())
+        # the first action was recorded 0.81s after the start of the condition
+        self.assertEqual(agent.step_at(0.5), 0)
+        self.assertEqual(agent.step_at(0.81), 1)
+        self.assertEqual(agent.step_at(60), 7)
+
+    def test_replay_async(self):
+        self.write("1", RECORDING.replace("Key-Right\n", "Key-Left\n") +
+                   "2017-07-31 14:24:34.062764: Key-Down\n"
+                   "2017-07-31 14:24:35.062764: Condition Finished\n")
+        env, _, agent, _ = playback.crawl_results(self.tmp_dir, workers=1)["condMapCustom_C1_V1"][1]
+        calls = []
+
+        def callback(pos, facing, passed):
+            # the environment is not changed while replaying
+            self.assertEqual(env.agent_pos, (2, 1))
+            calls.append((pos, facing, passed))
+            time.sleep(0.05)
+
+        # the replay only takes 0.02s, so the slow callback drops frames
+        agent.replay_async(callback, speedup=100, fps=1000)
+        self.assertLess(len(calls), 5)
+        # but all positions are passed
+        self.assertEqual([p for pos, _, passed in calls for p in passed + [pos]],
+                         [(1, 1), (1, 2), (1, 1), (1, 1), (2, 1)])
+        self.assertEqual(calls[-1][1], NORTH)
+        self.assertEqual(agent.cur_idx, 5)
+        self.assertEqual(env.agent_pos, (2, 1))
+
+    def test_replay_async_error(self):
+        env, _, agent, _ = playback.crawl_results(self.tmp_dir, workers=1)["condMapCustom_C1_V1"][1]
+
+        length = agent.step_at(60)
+        # only two actions are left, the second of which is queued while
+        # the callback is running
+        agent.seek(length - 2)
+
+        def callback(pos, facing, passed):
+            # meanwhile the worker waits to queue the end of the replay
+            time.sleep(0.05)
+            raise RuntimeError("stopped")
+
+        with self.assertRaises(RuntimeError):
+            agent.replay_async(callback, speedup=1000, fps=20, queue_size=1)
+        self.assertEqual(agent.cur_idx, length - 1)
+
+    def test_cache(self):
+        playback.crawl_results(self.tmp_dir, workers=1)
+        # the cache is not written into the crawled folder
+        self.assertEqual(len(os.listdir(playback.CACHE_DIR)), 1)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ["0", "1"])
+        cached = playback.crawl_results(self.tmp_dir, workers=1)
+        self.assertEqual(cached["condMapCustom_C1_V1"][0][2].actions[1][1], "EAST")
+
+        # changed recordings are parsed again
+        self.write("1", RECORDING)
+        conditions = playback.crawl_results(self.tmp_dir, workers=1)
+        self.assertEqual(len(conditions["condMapCustom_C1_V1"]), 1)
+
+    def test_invalid_cache(self):
+        cache_path = os.path.join(playback.CACHE_DIR, "cache.pickle")
+        # references a module which does not exist (any longer)
+        for content in [b"cmissing_module\nRecord\n.", b"invalid"]:
+            with open(cache_path, "wb") as f:
+                f.write(content)
+            conditions = playback.crawl_results(self.tmp_dir, workers=1, cache_path=cache_path)
+            self.assertEqual(len(conditions["condMapCustom_C1_V1"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
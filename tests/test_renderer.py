@@ -0,0 +1,183 @@
+import unittest
+
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from unittest import mock
+
+import matplotlib
+import numpy as np
+
+from cogmodel import renderer
+from cogmodel.gridEnvironment import GridEnvironment, Tile, TileGrid
+
+if renderer.pygame_available:
+    import pygame
+
+
+class ViewportTest(unittest.TestCase):
+
+    def test_follow(self):
+        # centered on the agent at first
+        self.assertEqual(renderer._follow(None, 50, 20, 100), 40)
+        # the viewport only moves once the agent leaves its central half
+        self.assertEqual(renderer._follow(40, 54, 20, 100), 40)
+        self.assertEqual(renderer._follow(40, 55, 20, 100), 45)
+        # but never leaves the grid
+        self.assertEqual(renderer._follow(None, 2, 20, 100), 0)
+        self.assertEqual(renderer._follow(None, 99, 20, 100), 80)
+
+    def test_block_average(self):
+        image = np.arange(15, dtype=float).reshape(3, 5, 1)
+        self.assertIs(renderer._block_average(image, 1), image)
+        self.assertEqual(renderer._block_average(image, 2)[..., 0].tolist(),
+                         [[3.0, 5.0, 6.5], [10.5, 12.5, 14.0]])
+
+
+class CountingTiles(dict):
+    """
+        Tiles counting how often they are accessed.
+    """
+
+    accessed = 0
+
+    def __getitem__(self, pos):
+        self.accessed += 1
+        return dict.__getitem__(self, pos)
+
+
+class TileGridTest(unittest.TestCase):
+
+    def setUp(self):
+        env_string = "\n".join("#" * 300 if i % 10 == 0 else "#" + "g" * 298 + "#"
+                                for i in range(200))
+        self.env = GridEnvironment(target=(5, 5), initial_agent_pos=(101, 150), view_radius=5,
+                                   name="tile_grid", env_string=env_string)
+
+    def test_indexing(self):
+        grid = self.env.get_view_cone(playback=True)
+        self.assertIsInstance(grid, TileGrid)
+        self.assertEqual((len(grid), len(grid[0])), self.env.size)
+        self.assertIs(grid[3][4], self.env.tiles[(3, 4)])
+        self.assertIs(grid[-1][-1], self.env.tiles[(199, 299)])
+        self.assertEqual([[t.pos for t in row[4:6]] for row in grid[2:4]],
+                         [[(2, 4), (2, 5)], [(3, 4), (3, 5)]])
+        with self.assertRaises(IndexError):
+            grid[200]
+
+    def test_viewport(self):
+        matplotlib.use("Agg")
+        rend = renderer.MatplotlibRenderer(viewport=(10, 20))
+        self.env.tiles = CountingTiles(self.env.tiles)
+        for col in range(150, 160):
+            self.env.agent_pos = (101, col)
+            rend.plot(self.env.get_view_cone(playback=True), self.env.agent_pos)
+        rend.close_figure()
+        # only the tiles within the viewport are looked up
+        self.assertLessEqual(self.env.tiles.accessed, 10 * 10 * 20)
+
+
+    def test_changed_tiles(self):
+        matplotlib.use("Agg")
+        rend = renderer.MatplotlibRenderer()
+        target = (101, 152)
+        self.env.initialize_targets({target: {"color": "red", "symbol": "R"}})
+        rend.plot(self.env.get_view_cone(playback=True), self.env.agent_pos)
+        self.assertEqual(rend._palette.names[rend._indices[target]], "green")
+        self.env.tiles = CountingTiles(self.env.tiles)
+        # the target becomes visible, which is the only tile looked up again
+        self.env.facing_direction = (0, 1)
+        rend.plot(self.env.get_view_cone(playback=True), self.env.agent_pos)
+        self.assertEqual(rend._palette.names[rend._indices[target]], "red")
+        self.assertLess(self.env.tiles.accessed, 10)
+        # without changes only the visibility of the target is checked
+        accessed = self.env.tiles.accessed
+        rend.plot(self.env.get_view_cone(playback=True), self.env.agent_pos)
+        self.assertEqual(self.env.tiles.accessed, accessed + 1)
+        rend.close_figure()
+
+
+class MatplotlibRendererTest(unittest.TestCase):
+
+    def setUp(self):
+        matplotlib.use("Agg")
+        self.grid = [[Tile("#" if i % 10 == 0 else "g", i, j) for j in range(30)]
+                     for i in range(20)]
+        self.rend = renderer.MatplotlibRenderer()
+
+    def tearDown(self):
+        self.rend.close_figure()
+
+    def test_artists_are_reused(self):
+        self.rend.plot(self.grid, (5, 5), show_trajectory=True)
+        image, agent, trajectory = self.rend.image, self.rend.agent, self.rend.trajectory
+        background = self.rend._background
+        self.assertIsNotNone(background)
+        with mock.patch.object(image, "set_data", wraps=image.set_data) as set_data:
+            for col in range(6, 10):
+                self.rend.plot(self.grid, (5, col), show_trajectory=True)
+            self.assertIs(self.rend.image, image)
+            self.assertIs(self.rend.agent, agent)
+            self.assertIs(self.rend.trajectory, trajectory)
+            # only the agent and the trajectory were redrawn
+            set_data.assert_not_called()
+            self.assertIs(self.rend._background, background)
+            self.assertEqual(len(trajectory.get_xdata()), 5)
+
+            # a changed cell updates the image
+            tile = self.grid[3][4].clone()
+            tile.set_as_target({"color": "red", "symbol": "R"})
+            tile.target_visible = True
+            self.grid[3][4] = tile
+            self.rend.plot(self.grid, (5, 9), show_trajectory=True)
+            set_data.assert_called_once()
+            self.assertIs(self.rend.image, image)
+            self.assertIsNot(self.rend._background, background)
+            self.assertEqual(self.rend._palette.names[self.rend._indices[3, 4]], "red")
+
+            # as does a change of the visibility of a target
+            tile.target_visible = False
+            self.rend.plot(self.grid, (5, 9), show_trajectory=True)
+            self.assertEqual(set_data.call_count, 2)
+            self.assertEqual(self.rend._palette.names[self.rend._indices[3, 4]], "green")
+
+
+@unittest.skipUnless(renderer.pygame_available, "pygame is not installed")
+class PygameRendererTest(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = [[Tile("#" if i % 10 == 0 else "g", i, j) for j in range(1000)]
+                     for i in range(40)]
+
+    def tearDown(self):
+        self.rend.close_figure()
+
+    def test_viewport(self):
+        self.rend = renderer.PygameRenderer(viewport=(10, 20))
+        for col in range(500, 510):
+            self.rend.plot(self.grid, (5, col), (0, 1), show_trajectory=True)
+        self.assertEqual(self.rend.screen.get_size(), (620, 480))
+        self.assertEqual(self.rend._view, (0, 495, 10, 20, 1))
+
+    def test_agent_heading(self):
+        self.rend = renderer.PygameRenderer(viewport=(10, 20))
+        self.rend.plot(self.grid, (5, 500), (0, 1))
+        by_vector = self.rend.screen.copy()
+        self.rend.plot(self.grid, (5, 500), 1)
+        self.assertEqual(pygame.image.tobytes(self.rend.screen, "RGB"),
+                         pygame.image.tobytes(by_vector, "RGB"))
+
+    def test_overview(self):
+        self.rend = renderer.PygameRenderer()
+        self.rend.plot(self.grid, (5, 500), (0, 1))
+        # 1000 columns do not fit into 620 pixels with 4 pixels per tile
+        self.assertEqual(self.rend._view[4], 7)
+        self.assertEqual(self.rend.screen.get_size(), (572, 480))
+        self.assertEqual(self.rend.tile_width, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+
+import os
+import sys
+import shutil
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from cogmodel.evaluation import METRICS, EVALUATION_HEADER, MASTER_HEADER
+from cogmodel.resultStore import ResultStore
+
+
+def make_run(number):
+    metrics = {metric: float(i + number) for i, metric in enumerate(METRICS)}
+    trajectory = {"actions": ["NORTH", "TURN LEFT"],
+                  "positions": np.array([[1, 1], [0, 1], [0, 1]]),
+                  "time": [0, 12, 30], "load": [100, 120], "length": [0, 1, 1],
+                  "action_values": [0.0, 1.0, 1.6]}
+    return metrics, trajectory
+
+
+class ResultStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = ResultStore(os.path.join(self.tmp_dir, "results.sqlite"), batch_size=2)
+        for number in range(3):
+            metrics, trajectory = make_run(number)
+            self.store.add_run("lab0", "simple", number, metrics, "target", seed=2**64 - 1 - number,
+                               sweep_seed=7, trajectory=trajectory)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_runs(self):
+        runs = self.store.runs(lab="lab0", agent="simple")
+        self.assertEqual([run["run"] for run in runs], [0, 1, 2])
+        self.assertEqual(runs[1]["metrics"], make_run(1)[0])
+        self.assertEqual(runs[1]["seed"], 2**64 - 2)
+        self.assertEqual([run["run"] for run in self.store.runs(seed=2**64 - 3)], [2])
+        self.assertEqual(self.store.runs(agent="tremaux"), [])
+
+    def test_trajectory(self):
+        run = self.store.runs()[0]
+        trajectory = self.store.trajectory(run["id"])
+        expected = make_run(0)[1]
+        self.assertEqual(trajectory["actions"], expected["actions"])
+        for key in ["positions", "time", "load", "length", "action_values"]:
+            np.testing.assert_array_equal(trajectory[key], expected[key])
+
+    def test_replace(self):
+        metrics, _ = make_run(5)
+        self.store.add_run("lab0", "simple", 1, metrics, "stall", sweep_seed=7)
+        runs = self.store.runs()
+        self.assertEqual(len(runs), 3)
+        self.assertEqual(runs[-1]["termination"], "stall")
+        self.assertIsNone(self.store.trajectory(runs[-1]["id"]))
+
+    def test_export_csv(self):
+        self.store.export_csv(self.tmp_dir, sweep_seed=7)
+        with open(os.path.join(self.tmp_dir, "lab0_simple", "evaluation.csv")) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], EVALUATION_HEADER)
+        self.assertEqual([line.split(",")[0] for line in lines[1:4]], ["0", "1", "2"])
+        self.assertEqual(lines[4].split(",")[2], "AVERAGE")
+        self.assertEqual(float(lines[4].split(",")[3]), 1.0)
+        with open(os.path.join(self.tmp_dir, "overall_averages.csv")) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], MASTER_HEADER)
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith("lab0,simple,1.0,"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+from cogmodel import seeding
+
+
+class SeedingTest(unittest.TestCase):
+
+    def test_derive_seed_is_stable(self):
+        self.assertEqual(seeding.derive_seed(7, "lab3", "simple", 0),
+                         seeding.derive_seed(7, "lab3", "simple", 0))
+
+    def test_derive_seed_differs_per_key(self):
+        seeds = {seeding.derive_seed(7, "lab3", "simple", 0),
+                 seeding.derive_seed(8, "lab3", "simple", 0),
+                 seeding.derive_seed(7, "lab4", "simple", 0),
+                 seeding.derive_seed(7, "lab3", "tremaux", 0),
+                 seeding.derive_seed(7, "lab3", "simple", 1)}
+        self.assertEqual(len(seeds), 5)
+
+    def test_same_seed_same_stream(self):
+        seed = seeding.derive_seed(1, "lab0", "tremaux", 3)
+        first = seeding.make_rng(seed).integers(0, 100, size=10)
+        second = seeding.make_rng(seed).integers(0, 100, size=10)
+        self.assertEqual(list(first), list(second))
+
+
+if __name__ == "__main__":
+    unittest.main()
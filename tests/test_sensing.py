@@ -0,0 +1,70 @@
+import unittest
+
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+from cogmodel.gridEnvironment import GridEnvironment, NORTH, SOUTH, EAST, WEST
+from cogmodel.gridEnvironment import PATCH_UNSEEN, PATCH_WALL, PATCH_FREE
+
+
+class SensingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.str = "#######\n" + \
+                   "#ggg#g#\n" + \
+                   "#g#ggg#\n" + \
+                   "#ggg#g#\n" + \
+                   "#######"
+        self.env = GridEnvironment(target=(3, 5), initial_agent_pos=(2, 3),
+                                   view_radius=2, name="sensing",
+                                   env_string=self.str, facing=NORTH)
+
+    def test_is_passable_relative(self):
+        for pos in [(1, 1), (2, 3), (3, 5)]:
+            for facing in [NORTH, SOUTH, EAST, WEST]:
+                self.env.agent_pos = pos
+                self.env.facing_direction = facing
+                cone = self.env.get_view_cone(relative=True)
+                for forward in range(-3, 4):
+                    for right in range(-3, 4):
+                        tile = cone.get((-forward, right))
+                        self.assertEqual(self.env.is_passable_relative(forward, right),
+                                         tile is not None and tile.passable)
+
+    def test_local_patch(self):
+        # patches smaller and larger than the view cone
+        for k in [1, 2, 3]:
+            for facing in [NORTH, SOUTH, EAST, WEST]:
+                self.env.facing_direction = facing
+                patch = self.env.local_patch(k)
+                self.assertEqual(patch.shape, (2 * k + 1, 2 * k + 1))
+                cone = self.env.get_view_cone(relative=True)
+                for i in range(2 * k + 1):
+                    for j in range(2 * k + 1):
+                        tile = cone.get((i - k, j - k))
+                        if tile is None:
+                            self.assertEqual(patch[i, j], PATCH_UNSEEN)
+                        else:
+                            self.assertEqual(patch[i, j], PATCH_FREE if tile.passable else PATCH_WALL)
+        self.env.facing_direction = EAST
+        patch = self.env.local_patch(2)
+        # the tile in front of the agent (east of it), the one left of it
+        # and the one behind it, which is outside of the view cone
+        self.assertEqual(patch[1, 2], PATCH_FREE)
+        self.assertEqual(patch[1, 1], PATCH_WALL)
+        self.assertEqual(patch[3, 2], PATCH_UNSEEN)
+
+    def test_counts_towards_env_time(self):
+        self.env.env_time = 0
+        self.env.is_passable_relative(1, 0)
+        self.assertGreater(self.env.env_time, 0)
+        env_time = self.env.env_time
+        self.env.local_patch(1)
+        self.assertGreater(self.env.env_time, env_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+from cogmodel import labyrinths
+from cogmodel.gridEnvironment import NORTH, SOUTH, WEST, EAST
+from cogmodel.sharedMaze import SharedMaze
+
+LAB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
+                                        'cogmodel', 'Labyrinths', 'testLabs'))
+
+# octants of the view cone, see GridEnvironment._handle_octant
+OCTANTS = {NORTH: (5, 6), SOUTH: (1, 2), EAST: (0, 7), WEST: (3, 4)}
+
+
+class ViewConeTest(unittest.TestCase):
+
+    def test_offsets_match_shadowcasting(self):
+        spec = next(labyrinths.iter_labyrinths(LAB_PATH))
+        env = labyrinths.create_environment(spec, 5)
+        for pos in env.tiles:
+            env.agent_pos = pos
+            for facing, octants in OCTANTS.items():
+                env.facing_direction = facing
+                expected = set(p for octant in octants
+                               for p in env._handle_octant(pos, octant, 5, True)
+                               if p in env.tiles)
+                self.assertEqual(set(env.get_view_cone()), expected)
+
+
+class SharedMazeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.spec = labyrinths.load_labyrinth(LAB_PATH, "lab3")
+        self.env = labyrinths.create_environment(self.spec, 5)
+        self.maze = SharedMaze.publish(self.spec, 5)
+        self.attached = SharedMaze.attach(self.maze.handle)
+
+    def tearDown(self):
+        self.attached.close()
+        self.maze.unlink()
+
+    def test_environment(self):
+        env = self.attached.create_environment()
+        self.assertEqual(env.size, self.env.size)
+        self.assertEqual(env.env_string, self.env.env_string)
+        self.assertEqual(set(env.tiles), set(self.env.tiles))
+        for pos, tile in self.env.tiles.items():
+            self.assertEqual(env.tiles[pos].passable, tile.passable)
+            self.assertEqual(env.tiles[pos].neighbours, tile.neighbours)
+        self.assertNotIn((-1, 0), env.tiles)
+        del env
+
+    def test_view_cone(self):
+        env = self.attached.create_environment()
+        for pos in self.env.tiles:
+            for facing in OCTANTS:
+                env.agent_pos = self.env.agent_pos = pos
+                env.facing_direction = self.env.facing_direction = facing
+                self.assertEqual(set(env.get_view_cone()),
+                                 set(self.env.get_view_cone()))
+        del env
+
+    def test_distance(self):
+        env = self.attached.create_environment()
+        for pos in [self.spec["start"], (1, 1), (0, 0)]:
+            self.assertEqual(env.compute_distance(pos, self.spec["goal"]),
+                             self.env.compute_distance(pos, self.spec["goal"]))
+        del env
+
+    def test_tiles_are_kept(self):
+        env = self.attached.create_environment()
+        pos = self.spec["goal"]
+        self.assertIs(env.tiles[pos], env.tiles[pos])
+        env.tiles[pos].target_visible = True
+        self.assertTrue(env.tiles[pos].target_visible)
+        del env
+
+    def test_close_with_environment(self):
+        env = self.attached.create_environment()
+        self.attached.close()
+        with self.assertRaises(ValueError):
+            env.tiles[(0, 0)]
+
+    def test_read_only(self):
+        with self.assertRaises(ValueError):
+            self.attached.grid[0, 0] = 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+from cogmodel import labyrinths, seeding
+from cogmodel.gridEnvironment import TERMINATION_TARGET
+from cogmodel.Agents.tremaux import tremaux
+from cogmodel.Agents.directedTremaux import directedTremaux
+
+LABYRINTHS = os.path.join(os.path.dirname(__file__), '..', 'cogmodel', 'Labyrinths', 'testLabs')
+
+
+class TremauxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = labyrinths.create_environment(
+            labyrinths.load_labyrinth(LABYRINTHS, "lab0"), view_radius=2)
+
+    def run_agent(self, agent_type, seed):
+        agent = agent_type(self.env, rng=seeding.make_rng(seed))
+        agent.run()
+        result = (list(self.env.positions), self.env.termination_reason)
+        self.env.reset()
+        return agent, result
+
+    def test_same_seed_same_decisions(self):
+        for agent_type in (tremaux, directedTremaux):
+            agent, (positions, termination) = self.run_agent(agent_type, 3)
+            self.assertEqual(termination, TERMINATION_TARGET)
+            self.assertEqual(positions[-1], self.env.target)
+            self.assertEqual(self.run_agent(agent_type, 3)[1], (positions, termination))
+            self.assertEqual(sum(agent._marked.values()), agent._mark_count)
+
+    def test_directed_prefers_target(self):
+        agent = directedTremaux(self.env)
+        self.env.agent_pos = (5, 5)
+        self.env.facing_direction = (-1, 0)
+        # the target (9, 7) lies behind and to the right of the agent
+        self.assertEqual(agent._prefer([agent._go_left, agent._go_front, agent._go_right]),
+                         [agent._go_right])
+        # all directions are kept if none leads towards the target
+        self.assertEqual(agent._prefer([agent._go_left, agent._go_front]),
+                         [agent._go_left, agent._go_front])
+
+
+if __name__ == '__main__':
+    unittest.main()